@@ -9,14 +9,16 @@ import matplotlib.pyplot as plt
 from streamlit.runtime.scriptrunner import get_script_run_ctx, add_script_run_ctx
 import streamlit.components.v1 as components
 from streamlit_option_menu import option_menu
-from utils.auth import sign_up, sign_in, sign_out, get_current_user
-from utils.database import Database
+from utils.auth import sign_up, sign_in, sign_out, get_current_user, authenticate, hash_password
+from utils.database import db as shared_db, DAILY_CHALLENGE_TARGETS
 from utils.audio import AudioService
 from utils.translation import TranslationService
+from utils.achievements import achievement_engine
 from gtts import gTTS
 import io
 from utils.session import init_session_state, set_current_user, clear_current_user
-import bcrypt
+from utils.instrumentation import begin_rerun, render_debug_panel, span
+from utils.progress_analytics import SKILLS, progress_analytics
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -46,7 +48,7 @@ def init_services():
     
     # Initialize Database
     try:
-        db = Database()  # Assign the database instance
+        db = shared_db  # Shared with the pages, so their caches see this page's writes
         services['supabase'] = db
         print("✅ Database initialized successfully")
     except Exception as e:
@@ -103,10 +105,8 @@ def init_session_state():
     # Daily challenges
     if 'daily_challenges' not in st.session_state:
         st.session_state.daily_challenges = {
-            'learning': {'total': 5, 'current': 0},
-            'speaking': {'total': 3, 'current': 0},
-            'cultural': {'total': 2, 'current': 0},
-            'translation': {'target': 10, 'current': 0}
+            challenge: {'target': target, 'current': 0}
+            for challenge, target in DAILY_CHALLENGE_TARGETS.items()
         }
     
     # Learning state
@@ -205,15 +205,6 @@ def init_session_state():
     if 'resend_email' not in st.session_state:
         st.session_state.resend_email = ""
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
 def show_login():
     """Show login form"""
     st.header("Sign In")
@@ -224,13 +215,13 @@ def show_login():
         submitted = st.form_submit_button("Sign In")
         
         if submitted and email and password:
-            user = db.get_user(email)
-            if user and verify_password(password, user['password_hash']):
+            user, error = authenticate(email, password)
+            if user:
                 set_current_user(user)
                 st.success("Successfully signed in!")
                 st.rerun()
             else:
-                st.error("Invalid email or password")
+                st.error(error)
 
 def show_register():
     """Show registration form"""
@@ -340,12 +331,12 @@ def show_auth_section():
                         st.error("Please enter both email and password")
                     else:
                         with st.spinner("Signing in..."):
-                            result = db.sign_in(email, password)
-                            if result.get('error'):
-                                st.error(result['error'])
+                            user, error = authenticate(email, password)
+                            if error:
+                                st.error(error)
                             else:
                                 st.session_state.authenticated = True
-                                st.session_state.user = result['user']
+                                st.session_state.user = user
                                 st.success("Signed in successfully!")
                                 st.rerun()  
 
@@ -356,57 +347,51 @@ def show_auth_section():
             st.rerun()
 
 def update_user_activity():
-    """Update user activity timestamp and related metrics."""
+    """Update user activity timestamp and load durable progress from the ledger."""
     if st.session_state.authenticated and st.session_state.user_id:
-        current_time = datetime.now()
-        
-        # Only update if we have a previous activity time
-        if st.session_state.last_activity:
-            time_diff = current_time - st.session_state.last_activity
-            
-            # Check for new day
-            if time_diff.days > 0:
-                # Reset daily counters
-                st.session_state.progress['translations_today'] = 0
-                st.session_state.daily_challenges = {
-                    'translation': {'target': 10, 'current': 0},
-                    'learning': {'target': 3, 'current': 0},
-                    'cultural': {'target': 1, 'current': 0}
-                }
-                
-                # Update streak
-                if time_diff.days == 1:
-                    st.session_state.progress['daily_streak'] += 1
-                else:
-                    st.session_state.progress['daily_streak'] = 0
+        st.session_state.last_activity = datetime.now()
         
-        # Update last activity time
-        st.session_state.last_activity = current_time
-        
-        # Try to save to database if available
-        if st.session_state.features['database'] and db and hasattr(db, 'supabase'):
+        if st.session_state.features['database'] and db:
             try:
-                db.supabase.table('user_activity').upsert({
-                    'user_id': st.session_state.user_id,
-                    'last_activity': current_time.isoformat(),
-                    'daily_streak': st.session_state.progress['daily_streak'],
-                    'learning_points': st.session_state.progress['learning_points']
-                }).execute()
+                sync_progress(db.get_progress_summary(st.session_state.user_id))
             except Exception as e:
-                print(f"Failed to update user activity: {str(e)}")
+                print(f"Failed to load user progress: {str(e)}")
+
+def sync_progress(summary):
+    """Copy a ledger progress summary into session state for display."""
+    st.session_state.xp = summary['xp']
+    st.session_state.level = summary['level']
+    st.session_state.daily_streak = summary['daily_streak']
+    st.session_state.progress['xp'] = summary['xp']
+    st.session_state.progress['current_level'] = summary['level']
+    st.session_state.progress['daily_streak'] = summary['daily_streak']
+    st.session_state.daily_challenges = summary['daily_challenges']
+
+def award_xp(points, activity_type='xp', challenge=None):
+    """Award XP (and optionally daily challenge progress), persisting it when signed in."""
+    if st.session_state.user_id and db:
+        db.update_user_xp(st.session_state.user_id, points, activity_type)
+        if challenge:
+            db.update_daily_challenge_progress(st.session_state.user_id, challenge)
+        sync_progress(db.get_progress_summary(st.session_state.user_id))
+    else:
+        st.session_state.xp += points
+        st.session_state.level = calculate_level(st.session_state.xp)
+        if challenge:
+            st.session_state.daily_challenges[challenge]['current'] += 1
 
 def update_feature_status():
     """Update feature availability status based on service health."""
-    st.session_state.features['database'] = db is not None and hasattr(db, 'supabase')
+    st.session_state.features['database'] = db is not None
     st.session_state.features['translation'] = translator is not None
     st.session_state.features['tts'] = audio is not None
     st.session_state.features['ai'] = None
     st.session_state.features['offline_mode'] = not st.session_state.features['database']
 
-def show_progress_chart():
-    # Sample data - in real app, this would come from the database
-    dates = [datetime.now() - timedelta(days=x) for x in range(7)]
-    activity = np.random.randint(0, 100, size=7)
+def show_progress_chart(days=7):
+    analytics = progress_analytics.summary(st.session_state.user_id)
+    dates = analytics['days'][-days:]
+    activity = analytics['daily_xp'][-days:]
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -421,7 +406,7 @@ def show_progress_chart():
     fig.update_layout(
         title="Your Learning Activity",
         xaxis_title="Date",
-        yaxis_title="Activity Points",
+        yaxis_title="XP Earned",
         showlegend=False,
         height=300,
         margin=dict(l=20, r=20, t=40, b=20)
@@ -432,30 +417,24 @@ def show_progress_chart():
 def calculate_level(xp):
     return int(1 + (xp / 100))
 
-def check_achievements():
-    achievements = []
-    if st.session_state.translations_today >= 10:
-        achievements.append({
-            'title': 'Translation Master',
-            'description': 'Complete 10 translations in one day',
-            'icon': '🎯'
-        })
-    if st.session_state.daily_streak >= 7:
-        achievements.append({
-            'title': 'Weekly Warrior',
-            'description': 'Maintain a 7-day learning streak',
-            'icon': '🔥'
-        })
-    if st.session_state.learning_points >= 100:
-        achievements.append({
-            'title': 'Century Club',
-            'description': 'Earn 100 learning points',
-            'icon': '💯'
-        })
-    return achievements
-
-def show_achievements_popup():
-    new_achievements = check_achievements()
+def achievement_counters():
+    """Current values of the session counters that achievement rules depend on."""
+    return {
+        'translations_today': st.session_state.translations_today,
+        'daily_streak': st.session_state.daily_streak,
+        'learning_points': st.session_state.xp
+    }
+
+def check_achievements(event=None):
+    """Return achievements unlocked by an activity event (changed counters)."""
+    if event is None:
+        event = achievement_counters()
+    if st.session_state.user_id:
+        return achievement_engine.process_event(st.session_state.user_id, event)
+    return achievement_engine.evaluate(event)
+
+def show_achievements_popup(event=None):
+    new_achievements = check_achievements(event)
     for achievement in new_achievements:
         if achievement not in st.session_state.achievements:
             st.session_state.achievements.append(achievement)
@@ -494,9 +473,9 @@ def show_daily_challenges():
                 st.success("Completed! 🌟")
 
 def show_skill_radar():
-    categories = ['Grammar', 'Vocabulary', 'Pronunciation', 'Culture', 'Writing']
-    # Sample data - in real app, would come from database
-    values = np.random.randint(30, 100, size=len(categories))
+    categories = SKILLS
+    skills = progress_analytics.summary(st.session_state.user_id)['skills']
+    values = [skills[category] for category in categories]
     
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
@@ -574,8 +553,12 @@ def show_home():
         st.markdown("### 🤝 Join Community")
         st.write("Connect with other learners and native speakers.")
         if st.button("Visit Community", key="home_community"):
-            st.session_state.daily_challenges['cultural']['current'] += 1
-            show_achievements_popup()
+            if st.session_state.user_id and db:
+                db.update_daily_challenge_progress(st.session_state.user_id, 'cultural')
+                sync_progress(db.get_progress_summary(st.session_state.user_id))
+            else:
+                st.session_state.daily_challenges['cultural']['current'] += 1
+            show_achievements_popup({'cultural_today': st.session_state.daily_challenges['cultural']['current']})
             st.session_state.current_page = "Community"
             st.rerun()
     
@@ -594,10 +577,9 @@ def show_home():
         }
         st.info(f"{word['word']} ({word['language']})\n\n*{word['meaning']}*")
         if st.button("Learn Word (+5 XP)"):
-            st.session_state.xp += word['points']
-            st.session_state.level = calculate_level(st.session_state.xp)
+            award_xp(word['points'], 'word_of_the_day')
             st.success(f"Word learned! +{word['points']} XP")
-            show_achievements_popup()
+            show_achievements_popup({'learning_points': st.session_state.xp})
         
     with col2:
         st.markdown("### 🎯 Daily Challenge")
@@ -608,11 +590,12 @@ def show_home():
         }
         st.info(f"Today's Challenge: {challenge['task']}")
         if st.button(f"Complete (+{challenge['points']} XP)"):
-            st.session_state.xp += challenge['points']
-            st.session_state.level = calculate_level(st.session_state.xp)
-            st.session_state.daily_challenges['cultural']['current'] += 1
+            award_xp(challenge['points'], 'daily_challenge', challenge='cultural')
             st.success(f"Challenge completed! +{challenge['points']} XP")
-            show_achievements_popup()
+            show_achievements_popup({
+                'learning_points': st.session_state.xp,
+                'cultural_today': st.session_state.daily_challenges['cultural']['current']
+            })
             
     with col3:
         st.markdown("### 👥 Community")
@@ -650,13 +633,13 @@ def show_games():
         st.subheader("🎮 Word Match")
         st.write("Match words with their meanings")
         if st.button("Play Word Match"):
-            st.session_state.xp += 2
+            award_xp(2, 'game')
     
     with col2:
         st.subheader("🎲 Language Quiz")
         st.write("Test your knowledge")
         if st.button("Start Quiz"):
-            st.session_state.xp += 2
+            award_xp(2, 'game')
     
     with col3:
         st.subheader("🏆 Leaderboard")
@@ -730,11 +713,14 @@ def main():
     st.title("🌍 Ubuntu Language")
     
     # Initialize session state
-    init_session_state()
+    with span("session"):
+        init_session_state()
+        update_user_activity()
     
     # Show appropriate view based on authentication state
     if st.session_state.user:
-        show_welcome()
+        with span("welcome"):
+            show_welcome()
     else:
         # Toggle between login and register
         if 'show_login' not in st.session_state:
@@ -755,6 +741,9 @@ def main():
         else:
             show_register()
 
+    render_debug_panel()
+
 if __name__ == "__main__":
-    db = Database()
+    begin_rerun("Home")
+    db = shared_db
     main()
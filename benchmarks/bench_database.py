@@ -0,0 +1,372 @@
+"""Benchmarks for the Database hot paths on synthetic data.
+
+Generates users, learning progress, forum posts, conversations and training
+rows at one or more scales, times the read and write paths the pages hit most,
+and writes the results as JSON. Pass ``--baseline`` with an earlier results
+file to flag slowdowns. Run from the repository root:
+
+    python -m benchmarks.bench_database --scale 10000 100000 --out results.json
+    python -m benchmarks.bench_database --scale 10000 --baseline results.json
+
+``--scale`` is the row count of the largest tables (learning progress,
+training entries, validations and conversation messages); posts,
+conversations and users are generated in proportion. Databases are built in a
+temporary directory unless ``--db-dir`` is given, in which case they are kept
+and reused by later runs with the same scale and seed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List
+
+from utils.database import Database
+from utils.languages import LANGUAGES, TRAINING_CATEGORIES, DIFFICULTY_LEVELS, FORMALITY_LEVELS
+
+# Bump when the generated data changes shape, so cached databases are rebuilt
+GENERATOR_VERSION = 1
+
+FORUMS = ["general", "zulu", "xhosa", "afrikaans", "sotho", "culture", "help"]
+TOPICS = ["greetings", "family", "food", "travel", "shopping", "school", "weather"]
+RESOURCE_TYPES = ["lesson", "story", "video", "game"]
+VALIDATION_STATUSES = ["pending", "pending", "verified", "rejected"]
+ROLES = ["user", "assistant"]
+
+# Rows per executemany batch while generating
+INSERT_BATCH = 50000
+# Synthetic timestamps span this many days back from the start date
+TIMESPAN_DAYS = 365
+START_DATE = datetime(2024, 1, 1)
+
+
+def table_sizes(scale: int) -> Dict[str, int]:
+    """Row counts for each generated table at a given scale"""
+    return {
+        "users": max(scale // 100, 10),
+        "learning_progress": scale,
+        "posts": max(scale // 10, 1),
+        "conversations": max(scale // 50, 1),
+        "conversation_messages": scale,
+        "language_training": scale,
+        "training_validations": scale,
+    }
+
+
+class SyntheticData:
+    def __init__(self, scale: int, seed: int = 42):
+        """Deterministic rows for every benchmarked table"""
+        self.scale = scale
+        self.seed = seed
+        self.sizes = table_sizes(scale)
+        self.languages = list(LANGUAGES)
+        self.categories = list(TRAINING_CATEGORIES)
+
+    def _timestamp(self, rng: random.Random) -> str:
+        offset = timedelta(seconds=rng.randrange(TIMESPAN_DAYS * 86400))
+        return (START_DATE - offset).strftime("%Y-%m-%d %H:%M:%S")
+
+    def _user(self, rng: random.Random) -> int:
+        return rng.randrange(self.sizes["users"]) + 1
+
+    def users(self, rng: random.Random) -> Iterator[tuple]:
+        for i in range(1, self.sizes["users"] + 1):
+            yield (i, f"user{i}@bench.test", "x", self._timestamp(rng))
+
+    def user_stats(self, rng: random.Random) -> Iterator[tuple]:
+        for i in range(1, self.sizes["users"] + 1):
+            yield (i, rng.randrange(500), round(rng.random(), 3))
+
+    def learning_progress(self, rng: random.Random) -> Iterator[tuple]:
+        users = self.sizes["users"]
+        for i in range(self.sizes["learning_progress"]):
+            # (user_id, resource_type, resource_id) is unique
+            yield (
+                i % users + 1, rng.choice(self.languages), rng.choice(RESOURCE_TYPES), f"r{i // users}",
+                round(rng.random(), 2), rng.random() < 0.3, self._timestamp(rng)
+            )
+
+    def posts(self, rng: random.Random) -> Iterator[tuple]:
+        for i in range(self.sizes["posts"]):
+            yield (
+                self._user(rng), rng.choice(FORUMS), f"Post {i}",
+                "Sawubona! " * rng.randint(5, 40), self._timestamp(rng)
+            )
+
+    def conversations(self, rng: random.Random) -> Iterator[tuple]:
+        for i in range(self.sizes["conversations"]):
+            created = self._timestamp(rng)
+            yield (self._user(rng), rng.choice(self.languages), rng.choice(TOPICS), "context", created, created)
+
+    def conversation_messages(self, rng: random.Random) -> Iterator[tuple]:
+        conversations = self.sizes["conversations"]
+        for i in range(self.sizes["conversation_messages"]):
+            yield (
+                rng.randrange(conversations) + 1, ROLES[i % 2],
+                "Ngiyabonga kakhulu " * rng.randint(1, 10), self._timestamp(rng)
+            )
+
+    def language_training(self, rng: random.Random) -> Iterator[tuple]:
+        for i in range(self.sizes["language_training"]):
+            yield (
+                self._user(rng), rng.choice(self.languages), f"phrase {i}", f"translation {i}", None,
+                rng.choice(self.categories), rng.choice(DIFFICULTY_LEVELS), rng.choice(FORMALITY_LEVELS),
+                rng.choice(VALIDATION_STATUSES), rng.randrange(6), self._timestamp(rng)
+            )
+
+    def training_validations(self, rng: random.Random) -> Iterator[tuple]:
+        entries = self.sizes["language_training"]
+        for _ in range(self.sizes["training_validations"]):
+            yield (
+                rng.randrange(entries) + 1, self._user(rng),
+                "correct" if rng.random() < 0.7 else "incorrect", self._timestamp(rng)
+            )
+
+
+# Insert statement for each generated table, in dependency order
+INSERTS = [
+    ("users", "INSERT INTO users (id, email, password_hash, created_at) VALUES (?, ?, ?, ?)"),
+    ("user_stats", "INSERT INTO user_stats (user_id, validations, accuracy_score) VALUES (?, ?, ?)"),
+    ("learning_progress", """
+        INSERT INTO learning_progress
+            (user_id, language, resource_type, resource_id, progress, completed, last_accessed)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """),
+    ("posts", "INSERT INTO posts (user_id, forum, title, content, created_at) VALUES (?, ?, ?, ?, ?)"),
+    ("conversations", """
+        INSERT INTO conversations (user_id, language, topic, last_context, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """),
+    ("conversation_messages", """
+        INSERT INTO conversation_messages (conversation_id, role, content, created_at) VALUES (?, ?, ?, ?)
+    """),
+    ("language_training", """
+        INSERT INTO language_training
+            (user_id, language, phrase, translation, context, category, difficulty, formality,
+             validation_status, validation_count, submitted_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """),
+    ("training_validations", """
+        INSERT INTO training_validations (training_id, user_id, status, validated_at) VALUES (?, ?, ?, ?)
+    """),
+]
+
+
+def _batches(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _meta_matches(path: str, scale: int, seed: int) -> bool:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT scale, seed, version FROM bench_meta").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return row == (scale, seed, GENERATOR_VERSION)
+
+
+def build_database(path: str, scale: int, seed: int = 42, log: Callable[[str], None] = print) -> Database:
+    """Create (or reuse) a database at path filled with synthetic data"""
+    if os.path.exists(path) and _meta_matches(path, scale, seed):
+        log(f"  reusing {path}")
+        return Database(path)
+    if os.path.exists(path):
+        os.remove(path)
+    log(f"  generating {path}")
+
+    db = Database(path)
+    data = SyntheticData(scale, seed)
+    conn = sqlite3.connect(path)
+    try:
+        # Generation only; the benchmarks themselves run with the app's settings
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for table, sql in INSERTS:
+            started = time.perf_counter()
+            rng = random.Random(f"{seed}:{table}")
+            count = 0
+            for batch in _batches(getattr(data, table)(rng), INSERT_BATCH):
+                conn.executemany(sql, batch)
+                count += len(batch)
+            conn.commit()
+            log(f"  {table}: {count:,} rows in {time.perf_counter() - started:.1f}s")
+        conn.execute("CREATE TABLE bench_meta (scale INTEGER, seed INTEGER, version INTEGER)")
+        conn.execute("INSERT INTO bench_meta VALUES (?, ?, ?)", (scale, seed, GENERATOR_VERSION))
+        conn.commit()
+    finally:
+        conn.close()
+    return db
+
+
+def _sample(db: Database, sql: str, limit: int, rng: random.Random) -> List[tuple]:
+    with db._get_db_connection() as conn:
+        rows = [tuple(row) for row in conn.execute(sql, (limit * 10,))]
+    rng.shuffle(rows)
+    return rows[:limit] or [None]
+
+
+def hot_paths(db: Database, scale: int, seed: int) -> Dict[str, Callable[[], Any]]:
+    """Benchmarked calls, each drawing realistic arguments from the generated data"""
+    rng = random.Random(seed)
+    sizes = table_sizes(scale)
+    languages = list(LANGUAGES)
+    conversations = _sample(
+        db, "SELECT user_id, language, topic FROM conversations ORDER BY id DESC LIMIT ?", 100, rng
+    )
+
+    return {
+        "get_learning_progress": lambda: db.get_learning_progress(rng.randrange(sizes["users"]) + 1),
+        "get_forum_posts": lambda: db.get_forum_posts(rng.choice(FORUMS)),
+        "load_conversation": lambda: db.load_conversation(*rng.choice(conversations)),
+        "get_training_leaderboard": lambda: db.get_training_leaderboard(),
+        "get_training_leaderboard[language]": lambda: db.get_training_leaderboard(rng.choice(languages)),
+        "get_training_analytics": lambda: db.get_training_analytics(rng.choice(languages)),
+        "update_training_validation": lambda: db.update_training_validation(
+            rng.randrange(sizes["language_training"]) + 1,
+            "correct" if rng.random() < 0.7 else "incorrect",
+            rng.randrange(sizes["users"]) + 1
+        ),
+    }
+
+
+def time_call(func: Callable[[], Any], repeat: int, max_seconds: float, warmup: int = 1) -> Dict[str, Any]:
+    """Time func up to repeat times (stopping after max_seconds), returning stats in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat:
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+        if time.perf_counter() > deadline:
+            break
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def run(scales: List[int], db_dir: str, seed: int = 42, repeat: int = 30, max_seconds: float = 10.0,
+        only: List[str] = None, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Build a database per scale and time every hot path against it"""
+    results = []
+    for scale in scales:
+        path = os.path.join(db_dir, f"bench_{scale}_{seed}.db")
+        log(f"Scale {scale:,}")
+        db = build_database(path, scale, seed, log)
+        for name, func in hot_paths(db, scale, seed).items():
+            if only and name.split("[")[0] not in only:
+                continue
+            stats = time_call(func, repeat, max_seconds)
+            log(f"  {name:<36} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms")
+            results.append({"scale": scale, "benchmark": name, **stats})
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "generator_version": GENERATOR_VERSION,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2,
+            min_delta_ms: float = 0.5) -> List[Dict[str, Any]]:
+    """Median-time ratios against a baseline for benchmarks present in both.
+
+    A benchmark regresses when it is more than threshold slower and by at
+    least min_delta_ms, so sub-millisecond noise isn't reported.
+    """
+    previous = {(r["scale"], r["benchmark"]): r for r in baseline.get("results", [])}
+    comparisons = []
+    for result in current["results"]:
+        before = previous.get((result["scale"], result["benchmark"]))
+        if not before:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        comparisons.append({
+            "scale": result["scale"],
+            "benchmark": result["benchmark"],
+            "baseline_ms": before["median_ms"],
+            "current_ms": result["median_ms"],
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + threshold and result["median_ms"] - before["median_ms"] >= min_delta_ms,
+        })
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Database hot paths on synthetic data")
+    parser.add_argument("--scale", type=int, nargs="+", default=[10000],
+                        help="Rows in the largest tables, e.g. 10000 100000 1000000")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the generated data and arguments")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed calls per benchmark")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Time limit per benchmark")
+    parser.add_argument("--only", nargs="+", help="Only run these benchmarks")
+    parser.add_argument("--db-dir", help="Keep generated databases here and reuse them")
+    parser.add_argument("--out", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a regression, as a fraction")
+    args = parser.parse_args()
+
+    log = lambda message: print(message, file=sys.stderr)
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix="bench_database_")
+    os.makedirs(db_dir, exist_ok=True)
+    try:
+        report = run(args.scale, db_dir, args.seed, args.repeat, args.max_seconds, args.only, log)
+    finally:
+        if not args.db_dir:
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        for item in report["comparison"]:
+            flag = "REGRESSED" if item["regressed"] else ""
+            log(f"{item['scale']:>10,} {item['benchmark']:<36} {item['baseline_ms']:>10.3f} -> "
+                f"{item['current_ms']:>10.3f} ms  x{item['ratio']:<6} {flag}")
+        regressions = [item for item in report["comparison"] if item["regressed"]]
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if regressions:
+        log(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
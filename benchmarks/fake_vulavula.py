@@ -0,0 +1,89 @@
+"""Local stand-in for the VulaVula translation API.
+
+Answers ``POST /translate/process`` the way the real service does, with a
+configurable delay and failure rate, so the provider pool's timeouts,
+circuit breakers and hedging can be exercised without the network. Point
+the app at it with ``VULAVULA_BASE_URL`` (and any ``LELAPA_API_KEY``):
+
+    python -m benchmarks.fake_vulavula --port 8765 --delay 1.5 --fail-rate 0.2
+    VULAVULA_BASE_URL=http://127.0.0.1:8765 LELAPA_API_KEY=test streamlit run app.py
+
+Scripts can also start it in-process with ``serve()``, which returns the
+running server; its ``base_url`` goes straight into ``VulaVulaProvider``.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+
+class FakeVulaVulaHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        server.requests += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, {"detail": "Invalid JSON"})
+
+        if self.path.rstrip("/") != "/translate/process":
+            return self._reply(404, {"detail": "Not found"})
+        if not self.headers.get("X-CLIENT-TOKEN"):
+            return self._reply(401, {"detail": "Missing X-CLIENT-TOKEN"})
+        missing = [field for field in ("input_text", "source_lang", "target_lang") if not body.get(field)]
+        if missing:
+            return self._reply(422, {"detail": f"Missing {', '.join(missing)}"})
+
+        time.sleep(server.delay)
+        if random.random() < server.fail_rate:
+            return self._reply(503, {"detail": "Service unavailable"})
+        translated = f"[{body['target_lang']}] {body['input_text']}"
+        self._reply(200, {"translation": [{"translated_text": translated}]})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(port: int = 0, delay: float = 0.0, fail_rate: float = 0.0, verbose: bool = False) -> ThreadingHTTPServer:
+    """Start the fake API on a daemon thread; port 0 picks a free one. Call shutdown() to stop it"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeVulaVulaHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.fail_rate = fail_rate
+    server.verbose = verbose
+    server.requests = 0
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    Thread(target=server.serve_forever, name="fake-vulavula", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.delay, args.fail_rate, verbose=True)
+    print(f"Fake VulaVula listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Headless multi-session load test for the Streamlit pages.
+
+Each simulated learner is a ``streamlit.testing.v1.AppTest`` session signed
+in as its own user, following a scripted journey through ``app.py`` and the
+Learn, Games and Learning pages. Translation, text-to-speech and Gemini are
+replaced with local stubs, with an optional artificial delay, so the numbers
+measure this process rather than the upstream services. The report gives
+latency percentiles per interaction and the memory each session holds. Run
+from the repository root:
+
+    python -m benchmarks.load_test --users 50 --concurrency 10 --out load.json
+
+AppTest keeps a single process-wide Streamlit runtime, so concurrent learners
+run in separate worker processes, each taking its share of the sessions in
+turn. Sessions stay alive until their worker finishes, as they would on a
+server, so the memory figures reflect that many learners connected at once.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One silent MP3 frame, returned by the text-to-speech stub
+STUB_AUDIO = bytes.fromhex("fffb9064") + bytes(413)
+
+
+def install_stubs(delay: float = 0.0):
+    """Replace the network-backed services with local stubs taking delay seconds"""
+    from utils.audio import AudioService
+    from utils.translation import TranslationService
+
+    def translate_with_score(self, text, target_language, source_language=None):
+        time.sleep(delay)
+        return {"text": f"[{target_language}] {text}", "score": None, "source": "stub", "match": None}
+
+    def detect_language(self, text):
+        return "en"
+
+    def text_to_speech(self, text, language_code="en-US"):
+        time.sleep(delay)
+        return STUB_AUDIO
+
+    TranslationService.translate_with_score = translate_with_score
+    TranslationService.detect_language = detect_language
+    AudioService.text_to_speech = text_to_speech
+
+    class StubResponse:
+        def __init__(self, prompt):
+            self.text = f"Stub response to: {str(prompt)[:80]}"
+
+    class StubModel:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def generate_content(self, prompt, *args, **kwargs):
+            time.sleep(delay)
+            return StubResponse(prompt)
+
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        genai = types.ModuleType("google.generativeai")
+        sys.modules["google.generativeai"] = genai
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = StubModel
+
+
+def create_users(count: int) -> List[Dict[str, Any]]:
+    """Create load-test users directly, skipping password hashing"""
+    from utils.database import db
+
+    users = []
+    for i in range(count):
+        email = f"load{i}@loadtest.local"
+        db.create_user(email, "x")
+        user = db.get_user(email)
+        users.append({"id": user["id"], "email": email})
+    return users
+
+
+def _find(widgets, label: str):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+class Session:
+    def __init__(self, user: Dict[str, Any], rng: random.Random, timeout: float):
+        """One simulated learner, holding an AppTest per page it has visited"""
+        self.user = user
+        self.rng = rng
+        self.timeout = timeout
+        self.pages = {}
+        self.timings = []
+
+    def page(self, path: str):
+        from streamlit.testing.v1 import AppTest
+
+        if path not in self.pages:
+            app = AppTest.from_file(os.path.join(ROOT, path), default_timeout=self.timeout)
+            app.session_state.user = dict(self.user)
+            app.session_state.authenticated = True
+            self.pages[path] = app
+        return self.pages[path]
+
+    def step(self, path: str, name: str, action: Callable[[Any], Any]):
+        """Run one interaction and record how long the rerun took"""
+        app = self.page(path)
+        started = time.perf_counter()
+        error = None
+        try:
+            action(app)
+            if app.exception:
+                error = app.exception[0].message.splitlines()[0]
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.timings.append({
+            "step": f"{path}:{name}",
+            "ms": (time.perf_counter() - started) * 1000,
+            "error": error,
+        })
+
+    def state_bytes(self) -> int:
+        from utils.session_memory import deep_sizeof
+
+        return sum(deep_sizeof(app.session_state.to_dict()) for app in self.pages.values())
+
+
+def _spoken_language_index(rng: random.Random) -> int:
+    """Index into the LANGUAGES-ordered selectboxes, skipping sign language"""
+    from utils.languages import LANGUAGES, is_sign_language
+
+    codes = [info["code"] for info in LANGUAGES.values()]
+    return rng.choice([i for i, code in enumerate(codes) if not is_sign_language(code)])
+
+
+def journey(session: Session):
+    """The scripted path every simulated learner follows"""
+    rng = session.rng
+
+    session.step("app.py", "home", lambda app: app.run())
+
+    learn = "pages/1_Learn.py"
+    session.step(learn, "open", lambda app: app.run())
+    session.step(learn, "choose_language", lambda app: _find(app.selectbox, "Choose your language").select_index(
+        _spoken_language_index(rng)).run())
+    session.step(learn, "answer_exercise", lambda app: app.text_input[0].input("Sawubona").run())
+    session.step(learn, "generate_phrase", lambda app: _find(app.button, "Generate Random Phrase").click().run())
+    session.step(learn, "check_answer", lambda app: (
+        app.text_input(key="practice_answer").input("Dumela"), _find(app.button, "Check Answer").click().run()
+    ))
+
+    games = "pages/2_Games.py"
+    session.step(games, "open", lambda app: app.run())
+    session.step(games, "choose_language", lambda app: _find(app.selectbox, "Choose a language to practice:").select_index(
+        _spoken_language_index(rng)).run())
+    session.step(games, "choose_game", lambda app: _find(app.selectbox, "Choose a game:").select_index(
+        rng.randrange(len(_find(app.selectbox, "Choose a game:").options))).run())
+
+    learning = "pages/4_Learning.py"
+    session.step(learning, "open", lambda app: app.run())
+    session.step(learning, "choose_topic", lambda app: _find(app.selectbox, "Select a topic to learn").select_index(
+        rng.randrange(len(_find(app.selectbox, "Select a topic to learn").options))).run())
+    for _ in range(2):
+        session.step(learning, "chat", lambda app: app.chat_input[0].set_value("How do I say hello?").run())
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    pick = lambda p: round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+    return {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples), 2),
+        "p90_ms": pick(0.90),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1], 2),
+        "mean_ms": round(statistics.fmean(samples), 2),
+    }
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_worker(users: List[Dict[str, Any]], seed: int, delay: float, timeout: float) -> Dict[str, Any]:
+    """Drive a share of the sessions in this process, keeping them all alive until the end"""
+    install_stubs(delay)
+    sessions = [Session(user, random.Random(f"{seed}:{user['id']}"), timeout) for user in users]
+    # The first session pays for imports and caches; memory growth is measured after it
+    journey(sessions[0])
+    rss_warm = peak_rss_bytes()
+    for session in sessions[1:]:
+        journey(session)
+    return {
+        "timings": [timing for session in sessions for timing in session.timings],
+        "state_bytes": [session.state_bytes() for session in sessions],
+        "rss_warm": rss_warm,
+        "rss_after": peak_rss_bytes(),
+    }
+
+
+def run(users: int, concurrency: int, seed: int = 42, delay: float = 0.0, timeout: float = 30.0,
+        log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run users simulated learners across concurrency worker processes and summarize the results"""
+    accounts = create_users(users)
+    shares = [accounts[i::concurrency] for i in range(concurrency) if accounts[i::concurrency]]
+
+    results = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=len(shares), mp_context=get_context("spawn")) as executor:
+        futures = [executor.submit(run_worker, share, seed, delay, timeout) for share in shares]
+        for future in as_completed(futures):
+            results.append(future.result())
+            log(f"  {len(results)}/{len(shares)} workers finished")
+    elapsed = time.perf_counter() - started
+
+    by_step = {}
+    errors = {}
+    timings = [timing for result in results for timing in result["timings"]]
+    for timing in timings:
+        by_step.setdefault(timing["step"], []).append(timing["ms"])
+        if timing["error"]:
+            step_errors = errors.setdefault(timing["step"], {})
+            step_errors[timing["error"]] = step_errors.get(timing["error"], 0) + 1
+
+    state_sizes = [size for result in results for size in result["state_bytes"]]
+    rss_growth = [
+        (result["rss_after"] - result["rss_warm"]) / (len(result["state_bytes"]) - 1)
+        for result in results if len(result["state_bytes"]) > 1
+    ]
+    return {
+        "config": {"users": users, "concurrency": len(shares), "seed": seed, "stub_delay_s": delay},
+        "elapsed_s": round(elapsed, 2),
+        "interactions": len(timings),
+        "interactions_per_s": round(len(timings) / elapsed, 2) if elapsed else None,
+        "latency": percentiles([t["ms"] for t in timings]) if timings else {},
+        "steps": {step: percentiles(samples) for step, samples in by_step.items()},
+        "errors": errors,
+        "memory": {
+            "session_state_bytes_median": int(statistics.median(state_sizes)) if state_sizes else 0,
+            "session_state_bytes_max": max(state_sizes, default=0),
+            "worker_peak_rss_bytes": max((result["rss_after"] for result in results), default=0),
+            "rss_growth_per_session_bytes": int(statistics.fmean(rss_growth)) if rss_growth else None,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any], log: Callable[[str], None] = print):
+    log(f"{report['interactions']} interactions in {report['elapsed_s']}s "
+        f"({report['interactions_per_s']}/s) with {report['config']['concurrency']} concurrent sessions")
+    log(f"{'step':<42} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for step, stats in report["steps"].items():
+        log(f"{step:<42} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    memory = report["memory"]
+    growth = memory["rss_growth_per_session_bytes"]
+    log(f"session state: median {memory['session_state_bytes_median'] / 1024:.1f} KB, "
+        f"max {memory['session_state_bytes_max'] / 1024:.1f} KB; "
+        f"RSS growth {'n/a' if growth is None else f'{growth / 1024:.1f} KB'} per session")
+    for step, messages in report["errors"].items():
+        for message, count in messages.items():
+            log(f"ERROR {step} x{count}: {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent learners against the Streamlit pages")
+    parser.add_argument("--users", type=int, default=20, help="Simulated learners")
+    parser.add_argument("--concurrency", type=int, default=5, help="Worker processes, i.e. learners active at the same time")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for each learner's choices")
+    parser.add_argument("--stub-delay", type=float, default=0.0,
+                        help="Seconds each stubbed translation/TTS/Gemini call takes")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds allowed per page rerun")
+    parser.add_argument("--db", help="Database file to use (default: a temporary one)")
+    parser.add_argument("--out", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    # Must be set before utils.database is imported anywhere
+    db_dir = None
+    if args.db:
+        os.environ["DATABASE_PATH"] = args.db
+    else:
+        db_dir = tempfile.mkdtemp(prefix="load_test_")
+        os.environ["DATABASE_PATH"] = os.path.join(db_dir, "load_test.db")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    log = lambda message: print(message, file=sys.stderr)
+    try:
+        report = run(args.users, args.concurrency, args.seed, args.stub_delay, args.timeout, log)
+    finally:
+        if db_dir:
+            import shutil
+            shutil.rmtree(db_dir, ignore_errors=True)
+
+    print_report(report, log)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
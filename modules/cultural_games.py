@@ -1,6 +1,7 @@
 import random
 from utils.supabase_client import SupabaseClient
 from utils.translation import TranslationService
+from utils.achievements import achievement_engine
 
 class CulturalGames:
     def __init__(self):
@@ -150,24 +151,7 @@ class CulturalGames:
         self.db.update_user_progress(user_id, f'game_{game_id}', progress_data)
 
     def _calculate_achievements(self, game_progress):
-        achievements = []
-        
-        # Example achievement criteria
-        total_games = len(game_progress)
-        total_score = sum(game['progress'].get('score', 0) for game in game_progress)
-        
-        if total_games >= 10:
-            achievements.append({
-                'id': 'cultural_explorer',
-                'title': 'Cultural Explorer',
-                'description': 'Completed 10 cultural games'
-            })
-            
-        if total_score >= 1000:
-            achievements.append({
-                'id': 'cultural_master',
-                'title': 'Cultural Master',
-                'description': 'Earned 1000 points in cultural games'
-            })
-            
-        return achievements
+        return achievement_engine.evaluate({
+            'cultural_games_played': len(game_progress),
+            'cultural_game_score': sum(game['progress'].get('score', 0) for game in game_progress)
+        })
@@ -2,6 +2,7 @@ import json
 from utils.supabase_client import SupabaseClient
 from utils.translation import TranslationService
 from utils.audio import AudioService
+from utils.achievements import achievement_engine
 
 class LearningModule:
     def __init__(self):
@@ -118,14 +119,6 @@ class LearningModule:
         return f"Not quite right. The correct answer was: {exercise['correct_answer']}"
 
     def _check_achievements(self, progress):
-        achievements = []
-        
-        # Example achievement criteria
-        if progress.get('correct_exercises', 0) >= 10:
-            achievements.append({
-                'id': 'achievement_10_correct',
-                'title': '10 Correct Answers',
-                'description': 'Completed 10 exercises correctly'
-            })
-            
-        return achievements
+        return achievement_engine.evaluate({
+            'correct_exercises': progress.get('correct_exercises', 0)
+        })
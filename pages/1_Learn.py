@@ -12,6 +12,10 @@ from utils.translation import TranslationService
 from utils.database import db
 from utils.auth import get_current_user
 from utils.languages import LANGUAGES, get_language_code, get_native_name, is_sign_language
+from utils.lesson_content import lesson_bundles, lesson_count
+from utils.question_generator import daily_seed, lesson_generator
+from utils.blob_store import blob_store
+from utils.instrumentation import begin_rerun, render_debug_panel, span
 import time
 
 def initialize_services():
@@ -25,8 +29,11 @@ def initialize_services():
     audio = AudioService()
     print("Services initialized with local services for text-to-speech and translation")
 
+begin_rerun("Learn")
+
 # Initialize services
-initialize_services()
+with span("init_services"):
+    initialize_services()
 
 # Check if user is authenticated
 user = get_current_user()
@@ -43,13 +50,6 @@ if 'xp' not in st.session_state:
     st.session_state.xp = 0
 if 'level' not in st.session_state:
     st.session_state.level = 1
-if 'daily_challenges' not in st.session_state:
-    st.session_state.daily_challenges = {
-        'translation': {'target': 10, 'current': 0},
-        'learning': {'total': 5, 'current': 0},
-        'speaking': {'total': 3, 'current': 0},
-        'cultural': {'total': 2, 'current': 0}
-    }
 
 # Initialize session state for lesson progress
 if 'current_lesson' not in st.session_state:
@@ -71,190 +71,63 @@ if 'learned_words' not in st.session_state:
 if 'practice_history' not in st.session_state:
     st.session_state.practice_history = []
 
-# Lesson content for each level
-LESSON_CONTENT = {
-    "Beginner": {
-        1: {
-            "title": "Basic Greetings",
-            "description": "Learn essential greetings and introductions.",
-            "phrases": [
-                ("hello", "Hello"),
-                ("thank_you", "Thank you"),
-                ("how_are_you", "How are you?")
-            ]
-        },
-        2: {
-            "title": "Numbers and Counting",
-            "description": "Learn to count and use basic numbers.",
-            "phrases": [
-                ("one", "One"),
-                ("two", "Two"),
-                ("three", "Three")
-            ]
-        },
-        3: {
-            "title": "Days and Time",
-            "description": "Learn days of the week and telling time.",
-            "phrases": [
-                ("today", "Today"),
-                ("tomorrow", "Tomorrow"),
-                ("yesterday", "Yesterday")
-            ]
-        },
-        4: {
-            "title": "Family Members",
-            "description": "Learn words for family relationships.",
-            "phrases": [
-                ("mother", "Mother"),
-                ("father", "Father"),
-                ("sister", "Sister")
-            ]
-        },
-        5: {
-            "title": "Basic Phrases",
-            "description": "Learn common everyday phrases.",
-            "phrases": [
-                ("please", "Please"),
-                ("goodbye", "Goodbye"),
-                ("good_morning", "Good morning")
-            ]
-        }
-    },
-    "Intermediate": {
-        1: {
-            "title": "Weather and Seasons",
-            "description": "Learn to discuss weather and seasons.",
-            "phrases": [
-                ("sunny", "Sunny"),
-                ("rainy", "Rainy"),
-                ("cold", "Cold")
-            ]
-        },
-        2: {
-            "title": "Food and Drinks",
-            "description": "Learn vocabulary for food and drinks.",
-            "phrases": [
-                ("water", "Water"),
-                ("coffee", "Coffee"),
-                ("pizza", "Pizza")
-            ]
-        },
-        3: {
-            "title": "Travel and Directions",
-            "description": "Learn to ask for directions and discuss travel.",
-            "phrases": [
-                ("where_is", "Where is..."),
-                ("how_much", "How much is this?"),
-                ("i_am_lost", "I am lost")
-            ]
-        },
-        4: {
-            "title": "Shopping and Numbers",
-            "description": "Learn to shop and count in the target language.",
-            "phrases": [
-                ("how_much_is_this", "How much is this?"),
-                ("i_want_to_buy", "I want to buy..."),
-                ("do_you_have", "Do you have...?")
-            ]
-        },
-        5: {
-            "title": "Emergency and Help",
-            "description": "Learn to ask for help and discuss emergencies.",
-            "phrases": [
-                ("help", "Help!"),
-                ("call_police", "Call the police!"),
-                ("i_need_doctor", "I need a doctor")
-            ]
-        }
-    },
-    "Advanced": {
-        1: {
-            "title": "Complex Conversations",
-            "description": "Learn to handle complex dialogues.",
-            "phrases": [
-                ("can_you_help", "Can you help me?"),
-                ("i_understand", "I understand"),
-                ("explain", "Please explain")
-            ]
-        },
-        2: {
-            "title": "Debates and Discussions",
-            "description": "Learn to engage in debates and discussions.",
-            "phrases": [
-                ("i_agree", "I agree"),
-                ("i_disagree", "I disagree"),
-                ("what_do_you_think", "What do you think?")
-            ]
-        },
-        3: {
-            "title": "Formal and Informal Language",
-            "description": "Learn to use formal and informal language.",
-            "phrases": [
-                ("hello_formal", "Hello (formal)"),
-                ("hello_informal", "Hello (informal)"),
-                ("goodbye_formal", "Goodbye (formal)")
-            ]
-        },
-        4: {
-            "title": "Idioms and Expressions",
-            "description": "Learn common idioms and expressions.",
-            "phrases": [
-                ("break_a_leg", "Break a leg!"),
-                ("call_it_a_day", "Call it a day"),
-                ("cost_an_arm_and_a_leg", "Cost an arm and a leg")
-            ]
-        },
-        5: {
-            "title": "Business and Professional",
-            "description": "Learn business and professional vocabulary.",
-            "phrases": [
-                ("meeting", "Meeting"),
-                ("presentation", "Presentation"),
-                ("deadline", "Deadline")
-            ]
-        }
-    }
-}
+def lesson_resource_id(language_code, level, lesson_number):
+    return f"{language_code}_{level}_{lesson_number}"
 
-def show_lesson_content(lesson_number, language_code, level):
-    st.subheader(f"Lesson {lesson_number}: {LESSON_CONTENT[level][lesson_number]['title']}")
-    
-    # Get language info
-    language_info = None
-    for lang, info in LANGUAGES.items():
-        if info["code"] == language_code:
-            language_info = info
-            break
-    
-    if not language_info:
+def show_lesson_content(lesson_number, language_code, level, user_progress):
+    lesson = lesson_bundles.lesson(language_code, level, lesson_number)
+    if not lesson:
         st.error(f"Language not found: {language_code}")
         st.write("Available languages:", [info["code"] for info in LANGUAGES.values()])
         return
 
+    st.subheader(f"Lesson {lesson_number}: {lesson['title']}")
+
     # Show lesson description
-    st.write(f"### {LESSON_CONTENT[level][lesson_number]['description']}")
+    st.write(f"### {lesson['description']}")
 
-    # Get user's progress from database
-    user_progress = db.get_learning_progress(st.session_state.user['id'])
+    resource_id = lesson_resource_id(language_code, level, lesson_number)
     current_lesson_progress = next(
-        (p for p in user_progress if p['language'] == language_code and p['level'] == level and p['lesson_id'] == lesson_number),
+        (p for p in user_progress if p['resource_type'] == 'lesson' and p['resource_id'] == resource_id),
         None
-    ) if user_progress else None
+    )
+    saved_progress = current_lesson_progress['progress'] if current_lesson_progress else 0.0
+
+    language_name = lesson_bundles.get(language_code)["name"]
+    show_lesson_exercises(lesson_number, language_code, level, language_name, lesson, saved_progress)
+
+@st.fragment
+def show_lesson_exercises(lesson_number, language_code, level, language_name, lesson, saved_progress):
+    """Phrases, answers and progress for one lesson.
+
+    Runs as a fragment so typing an answer only reruns the exercises, not the
+    language pickers, progress queries and sidebar around them.
+    """
+    resource_id = lesson_resource_id(language_code, level, lesson_number)
+    written_key = f"lesson_progress_{resource_id}"
+    if written_key not in st.session_state:
+        st.session_state[written_key] = saved_progress
 
     # Lesson progress tracker
     progress_placeholder = st.empty()
-    progress = current_lesson_progress['progress'] if current_lesson_progress else 0.0
-    progress_placeholder.progress(progress)
+    progress_placeholder.progress(st.session_state[written_key])
 
     # Display phrases with audio support and practice
-    phrases = LESSON_CONTENT[level][lesson_number]['phrases']
+    exercises = {
+        exercise["phrase"]: exercise for exercise in lesson["exercises"] if exercise["type"] == "translate"
+    }
     
     correct_answers = 0
-    total_exercises = len(phrases)
+    total_exercises = len(exercises)
     
-    for phrase_key, english in phrases:
+    for phrase in lesson["phrases"]:
         st.write("---")
-        native = language_info.get(phrase_key, phrase_key)  # Fallback to key if translation not found
+        native = phrase["native"]
+        english = phrase["english"]
+        if native is None:
+            st.write(f"**{english}**")
+            st.caption(f"No {language_name} translation yet.")
+            continue
         
         col1, col2, col3 = st.columns([2,2,1])
         with col1:
@@ -266,105 +139,119 @@ def show_lesson_content(lesson_number, language_code, level):
             st.write(english)
         with col3:
             if not is_sign_language(language_code) and audio:
-                if st.button("🔊", key=f"play_{native}"):
-                    try:
-                        audio_content = audio.text_to_speech(native, language_code)
-                        st.audio(audio_content, format="audio/mp3")
-                    except Exception as e:
-                        st.error("Could not play audio")
+                play_phrase_audio(native, language_code, phrase["audio"])
             elif is_sign_language(language_code):
                 st.write("📹")
 
         # Practice exercise
+        exercise = exercises[phrase["key"]]
         user_answer = st.text_input(
-            f"Type the correct translation for '{english}' in {language_info['name']}:",
+            f"Type the correct translation for '{exercise['prompt']}' in {language_name}:",
             key=f"exercise_{native}"
         )
         
         if user_answer:
-            if user_answer.lower().strip() == native.lower().strip():
+            if user_answer.lower().strip() == exercise["answer"].lower().strip():
                 st.success("Correct! 🎉")
                 correct_answers += 1
             else:
-                st.error(f"Not quite. The correct answer is: {native}")
+                st.error(f"Not quite. The correct answer is: {exercise['answer']}")
 
-        # Update progress (as a value between 0 and 1)
-        progress = float(correct_answers) / float(total_exercises)
-        progress_placeholder.progress(progress)
+    # Update progress (as a value between 0 and 1)
+    progress = float(correct_answers) / float(total_exercises) if total_exercises else 0.0
+    progress_placeholder.progress(progress)
 
-        # Update progress in database
+    # Only write progress when it actually changed
+    if progress != st.session_state[written_key]:
+        st.session_state[written_key] = progress
         db.update_learning_progress(
             user_id=st.session_state.user['id'],
             resource_type='lesson',
-            resource_id=f"{level}_{lesson_number}",
+            resource_id=resource_id,
             progress=progress,
-            completed=(progress >= 1.0)
+            completed=(progress >= 1.0),
+            language=language_code
         )
 
     # Check if lesson is complete
-    if correct_answers == total_exercises:
+    if total_exercises and correct_answers == total_exercises:
         st.success("🎉 Congratulations! You've completed this lesson!")
         
-        # Award XP and update in database
-        xp_gained = 50
-        db.update_user_xp(st.session_state.user['id'], xp_gained)
-        
-        # Update daily challenge progress
-        db.update_daily_challenge_progress(
-            user_id=st.session_state.user['id'],
-            challenge_type='learning',
-            progress=1
-        )
+        # Award XP and update in database once per lesson completion
+        completion_key = f"lesson_awarded_{resource_id}"
+        if not st.session_state.get(completion_key):
+            st.session_state[completion_key] = True
+            xp_gained = 50
+            db.update_user_xp(st.session_state.user['id'], xp_gained, 'lesson')
+            
+            # Update daily challenge progress
+            db.update_daily_challenge_progress(
+                user_id=st.session_state.user['id'],
+                challenge_type='learning',
+                progress=1
+            )
+            # Refresh the sidebar XP and level progress
+            st.rerun()
         
         # Show next lesson button if not at last lesson
-        if lesson_number < 5:
+        if lesson_number < lesson_count(level):
             if st.button(f"Continue to Lesson {lesson_number + 1} →"):
                 st.session_state.current_lesson = lesson_number + 1
                 st.rerun()
         else:
             st.success("🎓 Congratulations! You've completed all lessons in this level!")
 
-def show_level_progress(level):
+@st.fragment
+def play_phrase_audio(native, language_code, audio_ref=None):
+    """Audio button for a single phrase, rerun on its own"""
+    if st.button("🔊", key=f"play_{native}"):
+        # Speech pre-generated into the lesson bundle plays without calling TTS
+        if audio_ref and blob_store.exists(audio_ref["blob"]):
+            st.audio(blob_store.path(audio_ref["blob"]), format="audio/mp3")
+            return
+        try:
+            audio_content = audio.text_to_speech(native, language_code)
+            st.audio(audio_content, format="audio/mp3")
+        except Exception as e:
+            st.error("Could not play audio")
+
+def show_level_progress(language_code, level, user_progress):
     st.sidebar.subheader("Level Progress")
-    # Get progress from database
-    user_progress = db.get_learning_progress(st.session_state.user['id'])
+    prefix = f"{language_code}_{level}_"
     completed_lessons = len([
         p for p in user_progress 
-        if p['level'] == level and p['completed']
-    ]) if user_progress else 0
+        if p['resource_type'] == 'lesson' and p['resource_id'].startswith(prefix) and p['completed']
+    ])
     
-    total_lessons = 5
+    total_lessons = lesson_count(level)
     progress = completed_lessons / total_lessons
     st.sidebar.progress(progress)
     st.sidebar.write(f"Completed: {completed_lessons}/{total_lessons} lessons")
 
+@st.fragment
 def show_practice_section(language_code):
     st.subheader("Practice")
     
-    # Get language info
-    language_info = None
-    for lang, info in LANGUAGES.items():
-        if info["code"] == language_code:
-            language_info = info
-            break
-    
-    if not language_info:
+    generator = lesson_generator(language_code)
+    if generator is None:
         st.error("Language not found")
         return
+    if not len(generator):
+        st.info("No translated phrases to practice in this language yet.")
+        return
 
     st.write("Practice what you've learned in the lessons!")
     
-    # Random phrase practice
+    # Phrases come in a per-learner daily order, without repeats until all have been practiced
     if st.button("Generate Random Phrase"):
-        import random
-        phrases = [
-            (language_info["hello"], "Hello"),
-            (language_info["thank_you"], "Thank you"),
-            (language_info["how_are_you"], "How are you?")
-        ]
-        phrase = random.choice(phrases)
-        st.session_state.current_practice_phrase = phrase
+        seen_key = f"practice_seen_{language_code}_{generator.version}"
+        if seen_key not in st.session_state:
+            st.session_state[seen_key] = generator.new_seen()
+        seed = daily_seed(st.session_state.user['id'], f"practice:{language_code}")
+        question = generator.sample(seed, 1, st.session_state[seen_key])[0]
+        st.session_state.current_practice_phrase = (question["answer"], question["prompt"])
         st.session_state.show_answer = False
+        st.session_state.practice_xp_awarded = False
 
     if 'current_practice_phrase' in st.session_state:
         native, english = st.session_state.current_practice_phrase
@@ -375,8 +262,10 @@ def show_practice_section(language_code):
         if st.button("Check Answer"):
             if user_answer.lower().strip() == native.lower().strip():
                 st.success("Correct! 🎉")
-                # Award XP for practice
-                st.session_state.xp += 10
+                # Award XP for practice, once per generated phrase
+                if not st.session_state.get('practice_xp_awarded'):
+                    st.session_state.practice_xp_awarded = True
+                    db.update_user_xp(st.session_state.user['id'], 10, 'practice')
             else:
                 st.error(f"Not quite. The correct answer is: {native}")
         
@@ -421,25 +310,35 @@ def main():
     active_tab = tabs.index(st.session_state.learn_page_tab)
     tab1, tab2 = st.tabs(tabs)
     
-    with tab1:
-        show_lesson_content(st.session_state.current_lesson, selected_language_code, level)
-        show_level_progress(level)
+    # Get user's progress from database once per run
+    user_progress = db.get_learning_progress(st.session_state.user['id'])
     
-    with tab2:
+    with tab1, span("lessons"):
+        show_lesson_content(st.session_state.current_lesson, selected_language_code, level, user_progress)
+        show_level_progress(selected_language_code, level, user_progress)
+    
+    with tab2, span("practice"):
         show_practice_section(selected_language_code)
     
     # Progress tracking
+    summary = db.get_progress_summary(st.session_state.user['id'])
+    st.session_state.xp = summary['xp']
+    st.session_state.level = summary['level']
+    st.session_state.daily_challenges = summary['daily_challenges']
+    
     st.sidebar.header("Progress")
-    st.sidebar.progress(st.session_state.xp % 100 / 100)
-    st.sidebar.write(f"Level: {st.session_state.level}")
-    st.sidebar.write(f"XP: {st.session_state.xp}")
+    st.sidebar.progress(summary['xp'] % 100 / 100)
+    st.sidebar.write(f"Level: {summary['level']}")
+    st.sidebar.write(f"XP: {summary['xp']}")
+    st.sidebar.write(f"🔥 Streak: {summary['daily_streak']} days")
     
     # Daily challenges
+    challenges = summary['daily_challenges']
     st.sidebar.header("Daily Challenges")
-    st.sidebar.write(f"🎯 Translations: {st.session_state.daily_challenges['translation']['current']}/{st.session_state.daily_challenges['translation']['target']}")
-    st.sidebar.write(f"📚 Lessons: {st.session_state.daily_challenges['learning']['current']}/{st.session_state.daily_challenges['learning']['total']}")
-    st.sidebar.write(f"🗣️ Speaking: {st.session_state.daily_challenges['speaking']['current']}/{st.session_state.daily_challenges['speaking']['total']}")
-    st.sidebar.write(f"🏺 Cultural: {st.session_state.daily_challenges['cultural']['current']}/{st.session_state.daily_challenges['cultural']['total']}")
+    st.sidebar.write(f"🎯 Translations: {challenges['translation']['current']}/{challenges['translation']['target']}")
+    st.sidebar.write(f"📚 Lessons: {challenges['learning']['current']}/{challenges['learning']['target']}")
+    st.sidebar.write(f"🗣️ Speaking: {challenges['speaking']['current']}/{challenges['speaking']['target']}")
+    st.sidebar.write(f"🏺 Cultural: {challenges['cultural']['current']}/{challenges['cultural']['target']}")
     
     # Try to load logo in sidebar, use text if image is not available
     with st.sidebar:
@@ -448,6 +347,8 @@ def main():
         except:
             st.title("Ubuntu Explorer")
             st.markdown("---")
+    
+    render_debug_panel()
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,5 @@
 import streamlit as st
+import time
 
 # Must be the first Streamlit command
 st.set_page_config(
@@ -9,13 +10,26 @@ st.set_page_config(
 
 from utils.cultural_games import CulturalGames
 from utils.languages import LANGUAGES
+from utils.achievements import achievement_engine
+from utils.adaptive_difficulty import difficulty_engine, probability
+from utils.question_generator import daily_seed, game_generator
+from utils.instrumentation import begin_rerun, render_debug_panel, span
+
+# Proverbs or quiz questions drawn per round
+QUESTIONS_PER_ROUND = 5
+
+@st.cache_resource
+def get_games():
+    """Shared game manager; the content catalog is static, so build it once per process"""
+    return CulturalGames()
 
 def display_game():
     st.title("Ubuntu Language Games")
     st.write("Learn South African languages through interactive cultural games!")
 
     # Initialize game manager
-    games = CulturalGames()
+    with span("get_games"):
+        games = get_games()
     
     # Language selection
     selected_language = st.selectbox(
@@ -41,49 +55,154 @@ def display_game():
         if game_info:
             st.write(f"**{game_info['description']}**")
             
-            # Get maximum difficulty for the selected game and language
-            max_difficulty = games.get_max_difficulty(selected_game, selected_language)
-            
-            # Difficulty selection
-            if max_difficulty > 1:
-                difficulty = st.slider(
-                    "Select difficulty level:",
-                    min_value=1,
-                    max_value=max_difficulty,
-                    value=1
-                )
-                st.write(f"Difficulty: {'🌟' * difficulty}")
+            user = st.session_state.get('user')
+            adaptive = bool(user) and st.toggle(
+                "Adaptive difficulty",
+                value=True,
+                help="Pick content matched to your level from your past answers"
+            )
+            if adaptive:
+                difficulty, stage = adaptive_level(games, user['id'], selected_game, selected_language)
             else:
-                difficulty = 1
-                st.info("This game currently has only one difficulty level.")
+                difficulty = select_difficulty(games, selected_game, selected_language)
             
             # Get available stages for selected difficulty
             available_stages = games.get_available_stages(selected_game, selected_language, difficulty)
             if available_stages:
-                stage = st.selectbox(
-                    "Select stage:",
-                    options=available_stages,
-                    format_func=lambda x: f"Stage {x}"
-                )
+                if not adaptive:
+                    stage = st.selectbox(
+                        "Select stage:",
+                        options=available_stages,
+                        format_func=lambda x: f"Stage {x}"
+                    )
                 
                 # Game content
-                if selected_game == "proverb_match":
-                    play_proverb_game(games, selected_language, difficulty, stage)
-                elif selected_game == "cultural_quiz":
-                    play_cultural_quiz(games, selected_language, difficulty, stage)
-                elif selected_game == "story_completion":
-                    play_story_completion(games, selected_language, difficulty, stage)
-                elif selected_game == "word_association":
-                    play_word_association(games, selected_language, difficulty, stage)
-                elif selected_game == "memory_match":
-                    play_memory_match(games, selected_language, difficulty, stage)
-                elif selected_game == "sign_language_practice":
-                    play_sign_language_game(games, selected_language, difficulty, stage)
+                with span(selected_game, kind="game"):
+                    if selected_game == "proverb_match":
+                        play_proverb_game(games, selected_language, difficulty, stage)
+                    elif selected_game == "cultural_quiz":
+                        play_cultural_quiz(games, selected_language, difficulty, stage)
+                    elif selected_game == "story_completion":
+                        play_story_completion(games, selected_language, difficulty, stage)
+                    elif selected_game == "word_association":
+                        play_word_association(games, selected_language, difficulty, stage)
+                    elif selected_game == "memory_match":
+                        play_memory_match(games, selected_language, difficulty, stage)
+                    elif selected_game == "sign_language_practice":
+                        play_sign_language_game(games, selected_language, difficulty, stage)
             else:
                 st.warning(f"No stages available for difficulty level {difficulty}")
     else:
         st.warning(f"No games available for {LANGUAGES[selected_language]['native_name']} yet. Please check back later!")
 
+def select_difficulty(games, game_type, language):
+    """Difficulty picked by hand with a slider"""
+    # Get maximum difficulty for the selected game and language
+    max_difficulty = games.get_max_difficulty(game_type, language)
+    
+    # Difficulty selection
+    if max_difficulty > 1:
+        difficulty = st.slider(
+            "Select difficulty level:",
+            min_value=1,
+            max_value=max_difficulty,
+            value=1
+        )
+        st.write(f"Difficulty: {'🌟' * difficulty}")
+    else:
+        difficulty = 1
+        st.info("This game currently has only one difficulty level.")
+    return difficulty
+
+def adaptive_level(games, user_id, game_type, language):
+    """Difficulty and stage of the item nearest the learner's level.
+
+    The pick is kept in session state until the learner asks for a new
+    challenge, so answering doesn't move the game out from under them.
+    """
+    pick_key = f"adaptive_pick_{game_type}_{language}"
+    items = games.get_items(game_type, language)
+    if not items:
+        return 1, 1
+    if pick_key not in st.session_state:
+        answered = st.session_state.get('answered_items', set())
+        item_id = difficulty_engine.next_item(
+            user_id, game_type, language,
+            items=[(item["item_id"], item.get("difficulty", 1)) for item in items],
+            exclude=answered
+        )
+        item = next((item for item in items if item["item_id"] == item_id), items[0])
+        st.session_state[pick_key] = (item.get("difficulty", 1), item.get("stage", 1), item["item_id"])
+    difficulty, stage, item_id = st.session_state[pick_key]
+
+    pool = difficulty_engine.pool(game_type, language)
+    chance = probability(difficulty_engine.ability(user_id, language), pool.difficulties.get(item_id, 0.0))
+    st.write(f"Difficulty: {'🌟' * difficulty} · Stage {stage}")
+    st.caption(f"Matched to your level: about {chance:.0%} chance of getting it right.")
+    if st.button("New challenge 🔀"):
+        del st.session_state[pick_key]
+        st.rerun()
+    return difficulty, stage
+
+def mark_shown(item):
+    """Remember when an item was first shown, to time the answer"""
+    if "item_id" in item:
+        st.session_state.setdefault('item_shown_at', {}).setdefault(item["item_id"], time.time())
+
+def draw_round(games, game_type, language, difficulty, stage):
+    """Items for the current round of a proverb or quiz game.
+
+    Items come in the learner's seeded order for the day, skipping those
+    drawn in earlier rounds until the level has been worked through. The
+    round is kept in session state until new_round, so reruns don't
+    reshuffle it.
+    """
+    round_key = f"round_{game_type}_{language}_{difficulty}_{stage}"
+    if round_key not in st.session_state:
+        generator = game_generator(games, game_type, language, difficulty, stage)
+        seen_key = f"seen_{game_type}_{language}_{difficulty}_{stage}_{generator.version}"
+        seen = st.session_state.setdefault(seen_key, generator.new_seen())
+        user = st.session_state.get('user')
+        seed = daily_seed(user['id'] if user else None, f"{game_type}:{language}")
+        questions = generator.sample(seed, QUESTIONS_PER_ROUND, seen, options=0)
+        st.session_state[round_key] = [question["item"] for question in questions]
+    return st.session_state[round_key]
+
+def new_round(game_type, language, difficulty, stage):
+    """Draw fresh items on the next call to draw_round"""
+    st.session_state.pop(f"round_{game_type}_{language}_{difficulty}_{stage}", None)
+
+def record_answer(game_type, language, item, correct, answer=None, once_key=None):
+    """Log a graded answer and feed it to the adaptive difficulty engine.
+
+    once_key makes answers that can be graded more than once (text inputs
+    re-graded on every rerun, the same pair checked again) count only the
+    first time.
+    """
+    user = st.session_state.get('user')
+    if not user or "item_id" not in item:
+        return
+    if once_key:
+        recorded = st.session_state.setdefault('recorded_answers', set())
+        if once_key in recorded:
+            return
+        recorded.add(once_key)
+    st.session_state.setdefault('answered_items', set()).add(item["item_id"])
+    shown_at = st.session_state.get('item_shown_at', {}).pop(item["item_id"], None)
+    latency_ms = (time.time() - shown_at) * 1000 if shown_at else None
+    difficulty_engine.record_answer(user['id'], game_type, language, item["item_id"], correct,
+                                    latency_ms=latency_ms, answer=answer)
+
+def award_achievements(event):
+    """Report a game activity event and celebrate any newly unlocked achievements"""
+    user = st.session_state.get('user')
+    if not user:
+        return
+    for achievement in achievement_engine.process_event(user['id'], event):
+        st.balloons()
+        st.success(f"🏆 New Achievement Unlocked: {achievement['title']}!")
+
+@st.fragment
 def play_proverb_game(games, language, difficulty, stage):
     """Proverb matching game implementation"""
     game_data = games.get_proverb_game(language, difficulty, stage)
@@ -104,7 +223,7 @@ def play_proverb_game(games, language, difficulty, stage):
     if 'show_meaning' not in st.session_state:
         st.session_state.show_meaning = False
 
-    proverbs = game_data["content"]
+    proverbs = draw_round(games, "proverb_match", language, difficulty, stage)
     total_proverbs = len(proverbs)
 
     # Show progress
@@ -114,6 +233,7 @@ def play_proverb_game(games, language, difficulty, stage):
 
     if st.session_state.current_proverb_index < total_proverbs:
         current_proverb = proverbs[st.session_state.current_proverb_index]
+        mark_shown(current_proverb)
         
         # Display current proverb
         st.write(f"**Proverb:** {current_proverb['proverb']}")
@@ -127,11 +247,14 @@ def play_proverb_game(games, language, difficulty, stage):
 
         if user_answer and not st.session_state.show_meaning:
             st.session_state.show_meaning = True
-            if user_answer.lower() == current_proverb['meaning'].lower():
+            result = games.check_answer(current_proverb['item_id'], user_answer)
+            record_answer("proverb_match", language, current_proverb, result['correct'], answer=user_answer)
+            if result['correct']:
                 st.success("Correct! 🎉")
                 st.session_state.proverb_score += 1
+                award_achievements({'proverbs_learned': st.session_state.proverb_score})
             else:
-                st.error(f"Not quite. The meaning is: {current_proverb['meaning']}")
+                st.error(f"Not quite. The meaning is: {result['answer']}")
             st.write(f"**Context:** {current_proverb['context']}")
 
         # Show next button after showing meaning
@@ -139,7 +262,7 @@ def play_proverb_game(games, language, difficulty, stage):
             if st.button("Next Proverb ➡️"):
                 st.session_state.current_proverb_index += 1
                 st.session_state.show_meaning = False
-                st.experimental_rerun()
+                st.rerun(scope="fragment")
 
     else:
         # Game completed
@@ -148,8 +271,10 @@ def play_proverb_game(games, language, difficulty, stage):
             st.session_state.current_proverb_index = 0
             st.session_state.proverb_score = 0
             st.session_state.show_meaning = False
-            st.experimental_rerun()
+            new_round("proverb_match", language, difficulty, stage)
+            st.rerun(scope="fragment")
 
+@st.fragment
 def play_cultural_quiz(games, language, difficulty, stage):
     """Cultural quiz game implementation"""
     game_data = games.get_cultural_quiz(language, difficulty, stage)
@@ -163,7 +288,8 @@ def play_cultural_quiz(games, language, difficulty, stage):
     if 'quiz_score' not in st.session_state:
         st.session_state.quiz_score = 0
 
-    for question in game_data["content"]:
+    for question in draw_round(games, "cultural_quiz", language, difficulty, stage):
+        mark_shown(question)
         st.write(f"**Question:** {question['question']}")
         user_answer = st.radio(
             "Choose your answer:",
@@ -171,13 +297,21 @@ def play_cultural_quiz(games, language, difficulty, stage):
             key=f"quiz_{question['question']}"
         )
         if st.button("Check Answer", key=f"check_{question['question']}"):
-            if user_answer == question['options'][question['correct']]:
+            result = games.check_answer(question['item_id'], user_answer)
+            record_answer("cultural_quiz", language, question, result['correct'], answer=user_answer,
+                          once_key=f"quiz_{question['item_id']}")
+            if result['correct']:
                 st.success("Correct! 🎉")
                 st.session_state.quiz_score += 1
             else:
-                st.error(f"Not quite. The correct answer is: {question['options'][question['correct']]}")
-                st.write(f"**Explanation:** {question['explanation']}")
+                st.error(f"Not quite. The correct answer is: {result['answer']}")
+                st.write(f"**Explanation:** {result['explanation']}")
+
+    if st.button("New Questions 🔀", key="quiz_new_round"):
+        new_round("cultural_quiz", language, difficulty, stage)
+        st.rerun(scope="fragment")
 
+@st.fragment
 def play_story_completion(games, language, difficulty, stage):
     """Story completion game implementation"""
     game_data = games.get_story_completion(language, difficulty, stage)
@@ -203,13 +337,15 @@ def play_story_completion(games, language, difficulty, stage):
             )
             
             if user_answer:
-                if user_answer == missing['correct']:
+                result = games.check_answer(story['item_id'], user_answer, part=missing['position'])
+                if result['correct']:
                     st.success("Correct! 🎉")
                     st.session_state.story_score += 1
                 else:
-                    st.error(f"Not quite. The correct word is: {missing['correct']}")
-                st.write(f"**Context:** {missing['context']}")
+                    st.error(f"Not quite. The correct word is: {result['answer']}")
+                st.write(f"**Context:** {result['context']}")
 
+@st.fragment
 def play_word_association(games, language, difficulty, stage):
     """Word association game implementation"""
     game_data = games.get_word_association(language, difficulty, stage)
@@ -224,9 +360,10 @@ def play_word_association(games, language, difficulty, stage):
         st.session_state.word_score = 0
 
     for category in game_data["content"]:
+        mark_shown(category)
         st.write(f"**Category: {category['category']}**")
         
-        for word, meaning in category['words']:
+        for word, _ in category['words']:
             col1, col2 = st.columns(2)
             with col1:
                 st.write(f"**{word}**")
@@ -236,12 +373,16 @@ def play_word_association(games, language, difficulty, stage):
                     key=f"word_{word}"
                 )
                 if user_answer:
-                    if user_answer.lower() == meaning.lower():
+                    result = games.check_answer(category['item_id'], user_answer, part=word)
+                    record_answer("word_association", language, category, result['correct'], answer=user_answer,
+                                  once_key=f"word_{category['item_id']}_{word}")
+                    if result['correct']:
                         st.success("Correct! 🎉")
                         st.session_state.word_score += 1
                     else:
-                        st.error(f"Not quite. The meaning is: {meaning}")
+                        st.error(f"Not quite. The meaning is: {result['answer']}")
 
+@st.fragment
 def play_memory_match(games, language, difficulty, stage):
     """Memory matching game implementation"""
     game_data = games.get_memory_match(language, difficulty, stage)
@@ -257,6 +398,7 @@ def play_memory_match(games, language, difficulty, stage):
         st.session_state.matched_pairs = set()
 
     for category_set in game_data["content"]:
+        mark_shown(category_set)
         st.write(f"**Category: {category_set['category']}**")
         
         # Create columns for the matching game
@@ -286,11 +428,11 @@ def play_memory_match(games, language, difficulty, stage):
             pair_key = f"{selected_word}_{selected_translation}"
             
             # Check if this pair is correct
-            is_correct = False
-            for pair in pairs:
-                if selected_word in pair and pair[selected_word] == selected_translation:
-                    is_correct = True
-                    break
+            is_correct = games.check_answer(category_set['item_id'], selected_translation, part=selected_word)['correct']
+            
+            if pair_key not in st.session_state.matched_pairs:
+                record_answer("memory_match", language, category_set, is_correct, answer=pair_key,
+                              once_key=f"match_{category_set['item_id']}_{pair_key}")
             
             if is_correct and pair_key not in st.session_state.matched_pairs:
                 st.success("Correct match! 🎉")
@@ -303,6 +445,7 @@ def play_memory_match(games, language, difficulty, stage):
 
         st.write("---")
 
+@st.fragment
 def play_sign_language_game(games, language, difficulty, stage):
     """Sign language practice game implementation"""
     game_data = games.get_sign_language_practice(language, difficulty, stage)
@@ -338,4 +481,6 @@ def play_sign_language_game(games, language, difficulty, stage):
                 st.session_state.sign_score += 1
 
 if __name__ == "__main__":
+    begin_rerun("Games")
     display_game()
+    render_debug_panel()
@@ -1,8 +1,10 @@
 import streamlit as st
-from utils.database import Database
-from utils.translation import TranslationService
+from utils.database import db
+from utils.culture_content import CULTURAL_CONTENT, culture_translations
+from utils.languages import get_short_code
 from utils.audio import AudioService
-import json
+from utils.translation import TranslationService
+from utils.instrumentation import begin_rerun, render_debug_panel
 
 st.set_page_config(
     page_title="Ubuntu Language - Culture",
@@ -11,10 +13,23 @@ st.set_page_config(
 )
 
 # Initialize services
-db = Database()
 translator = TranslationService()
 audio = AudioService()
 
+def show_translations(text, source_language, preferred_language):
+    """Show the built English and preferred-language translations; any not built yet are translated on request"""
+    for target in dict.fromkeys(['en', preferred_language]):
+        if target == source_language:
+            continue
+        label = "Translation" if target == 'en' else f"Translation ({target})"
+        translation = culture_translations.get(text, source_language, target)
+        if translation is None and st.button(f"🌐 {label}", key=f"translate_{target}_{source_language}_{text}"):
+            translation = culture_translations.translate(text, source_language, target, translator)
+            if translation is None:
+                st.error("Translation is unavailable right now. Please try again later.")
+        if translation:
+            st.write(f"{label}: {translation}")
+
 def main():
     st.title("🎭 Cultural Corner")
     
@@ -24,68 +39,10 @@ def main():
         
     # Get user's preferred language
     user = st.session_state.user
-    preferred_language = user.get('preferred_language', 'en')
-    
-    # Cultural content for South African languages
-    cultural_content = {
-        'zu': {
-            'name': 'Zulu',
-            'proverbs': [
-                "Umuntu ngumuntu ngabantu - A person is a person through other people",
-                "Isandla siyageza esinye - One hand washes the other",
-                "Inkosi yinkosi ngabantu - A chief is a chief through his people"
-            ],
-            'traditions': [
-                "Reed Dance (Umkhosi woMhlanga)",
-                "Lobola (Marriage customs)",
-                "Ancestral ceremonies (Amadlozi)"
-            ],
-            'festivals': [
-                "Umkhosi Womhlanga (Reed Dance Festival)",
-                "Umkhosi wokweshwama (First Fruits Festival)",
-                "Umgcagco (Traditional Wedding)"
-            ]
-        },
-        'xh': {
-            'name': 'Xhosa',
-            'proverbs': [
-                "Umntu ngumntu ngabantu - A person is a person through others",
-                "Inkomo ingazala umniniya - The cow can give birth to its owner",
-                "Ubuntu ngumuntu ngabanye abantu - Humanity is a person through other people"
-            ],
-            'traditions': [
-                "Ulwaluko (Male initiation)",
-                "Intonjane (Female initiation)",
-                "Imbeleko (Child naming ceremony)"
-            ],
-            'festivals': [
-                "Abakwetha (Initiation ceremonies)",
-                "Umgidi (Homecoming celebration)",
-                "Umthombo (Spring festival)"
-            ]
-        },
-        'af': {
-            'name': 'Afrikaans',
-            'proverbs': [
-                "'n Boer maak 'n plan - A farmer makes a plan",
-                "Al dra 'n aap 'n goue ring, bly hy 'n lelike ding - Even if a monkey wears a gold ring, it remains an ugly thing",
-                "Die een se dood is die ander se brood - One's death is another's bread"
-            ],
-            'traditions': [
-                "Braai (Barbecue culture)",
-                "Volkspele (Folk games)",
-                "Boeremusiek (Traditional music)"
-            ],
-            'festivals': [
-                "KKNK (Klein Karoo National Arts Festival)",
-                "Aardklop Arts Festival",
-                "Innibos Arts Festival"
-            ]
-        }
-    }
+    preferred_language = get_short_code(user.get('preferred_language')) or 'en'
     
     # Language selection
-    languages = [(code, content['name']) for code, content in cultural_content.items()]
+    languages = [(code, content['name']) for code, content in CULTURAL_CONTENT.items()]
     selected_language = st.selectbox(
         "Choose a language to explore its culture:",
         [code for code, _ in languages],
@@ -93,16 +50,13 @@ def main():
     )
     
     if selected_language:
-        content = cultural_content[selected_language]
+        content = CULTURAL_CONTENT[selected_language]
         
         # Proverbs section
         st.header("📜 Traditional Proverbs")
         for proverb in content['proverbs']:
             with st.expander(f"🔍 {proverb}"):
-                if selected_language != 'en':
-                    translation = translator.translate(proverb, 'en', selected_language)
-                    if translation:
-                        st.write(f"Translation: {translation}")
+                show_translations(proverb, selected_language, preferred_language)
                 # Add audio button
                 if st.button(f"🔊 Listen", key=f"listen_proverb_{proverb}"):
                     audio_content = audio.text_to_speech(proverb, selected_language)
@@ -113,10 +67,7 @@ def main():
         st.header("🏺 Cultural Traditions")
         for tradition in content['traditions']:
             with st.expander(f"🎯 {tradition}"):
-                if selected_language != 'en':
-                    translation = translator.translate(tradition, 'en', selected_language)
-                    if translation:
-                        st.write(f"Translation: {translation}")
+                show_translations(tradition, selected_language, preferred_language)
                 # Add audio button
                 if st.button(f"🔊 Listen", key=f"listen_tradition_{tradition}"):
                     audio_content = audio.text_to_speech(tradition, selected_language)
@@ -127,10 +78,7 @@ def main():
         st.header("🎉 Cultural Festivals")
         for festival in content['festivals']:
             with st.expander(f"🎪 {festival}"):
-                if selected_language != 'en':
-                    translation = translator.translate(festival, 'en', selected_language)
-                    if translation:
-                        st.write(f"Translation: {translation}")
+                show_translations(festival, selected_language, preferred_language)
                 # Add audio button
                 if st.button(f"🔊 Listen", key=f"listen_festival_{festival}"):
                     audio_content = audio.text_to_speech(festival, selected_language)
@@ -138,4 +86,6 @@ def main():
                         st.audio(audio_content, format='audio/mp3')
 
 if __name__ == "__main__":
+    begin_rerun("Culture")
     main()
+    render_debug_panel()
@@ -1,6 +1,7 @@
 import streamlit as st
-from utils.database import Database
+from utils.database import db
 from utils.translation import TranslationService
+from utils.instrumentation import begin_rerun, render_debug_panel
 from datetime import datetime
 
 # Must be the first Streamlit command
@@ -11,7 +12,6 @@ st.set_page_config(
 )
 
 # Initialize services
-db = Database()
 translator = TranslationService()
 
 def initialize_session_state():
@@ -135,7 +135,7 @@ def display_posts():
                     st.write(post['content'])
                 with col2:
                     author = db.get_user_by_id(post['user_id'])
-                    st.write(f"Posted by: {author['first_name']} {author['last_name']}")
+                    st.write(f"Posted by: {author['email'] if author else 'Unknown'}")
                     st.write(f"Date: {post['created_at']}")
                 st.markdown("---")
     except Exception as e:
@@ -171,4 +171,6 @@ def main():
     display_posts()
 
 if __name__ == "__main__":
+    begin_rerun("Community")
     main()
+    render_debug_panel()
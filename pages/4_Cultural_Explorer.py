@@ -1,5 +1,6 @@
 import streamlit as st
 from utils.languages import LANGUAGES
+from utils.instrumentation import begin_rerun, render_debug_panel
 from dotenv import load_dotenv
 import os
 import json
@@ -281,4 +282,6 @@ def display_cultural_explorer():
             st.info("Add items to your favorites by clicking the ❤️ button!")
 
 if __name__ == "__main__":
+    begin_rerun("Cultural Explorer")
     display_cultural_explorer()
+    render_debug_panel()
@@ -1,11 +1,16 @@
 import streamlit as st
-from utils.database import Database
+from utils.database import db
 from utils.translation import TranslationService
 from utils.audio import AudioService
 from utils.learning_content import LearningContent
+from utils.blob_store import blob_store, is_blob_key
+from utils.session_memory import render_session_memory_panel
+from utils.instrumentation import begin_rerun, render_debug_panel, span
+import os
+
+begin_rerun("Learning")
 
 # Initialize services
-db = Database()
 translator = TranslationService()
 audio = AudioService()
 learning_content = LearningContent()
@@ -210,7 +215,11 @@ def display_learning_interface():
         with st.chat_message(message["role"]):
             st.write(message["content"])
             if message.get("audio"):
-                st.audio(message["audio"])
+                if is_blob_key(message["audio"]):
+                    if blob_store.exists(message["audio"]):
+                        st.audio(blob_store.path(message["audio"]), format="audio/mp3")
+                else:
+                    st.audio(message["audio"])
     
     # Chat input
     if prompt := st.chat_input("Type your message..." if st.session_state.conversation_mode else f"Ask about {topics[st.session_state.selected_topic]['title']}..."):
@@ -244,7 +253,8 @@ def display_learning_interface():
                     st.session_state.selected_language
                 )
                 if audio_content:
-                    response_message["audio"] = audio_content
+                    # Keep only the blob key in session state and the database
+                    response_message["audio"] = blob_store.put(audio_content)
             
             # Add response to chat history
             st.session_state.chat_history.append(response_message)
@@ -265,7 +275,8 @@ def display_learning_interface():
                 user_id=st.session_state.user['id'],
                 resource_type=st.session_state.selected_topic,
                 resource_id=st.session_state.selected_language,
-                progress=0.5  # Update this based on actual progress
+                progress=0.5,  # Update this based on actual progress
+                language=st.session_state.selected_language
             )
             
             st.rerun()
@@ -277,11 +288,17 @@ def main():
     initialize_session_state()
     
     # Display sidebar elements
-    display_language_selection()
-    display_topic_selection()
+    with span("selection"):
+        display_language_selection()
+        display_topic_selection()
     
     # Main content
-    display_learning_interface()
+    with span("learning_interface"):
+        display_learning_interface()
+    
+    if os.getenv("SESSION_MEMORY_DEBUG"):
+        render_session_memory_panel()
+    render_debug_panel()
 
 if __name__ == "__main__":
     main()
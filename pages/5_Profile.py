@@ -7,8 +7,12 @@ st.set_page_config(
     layout="wide"
 )
 
+import pandas as pd
+import plotly.express as px
 from utils.database import db
+from utils.progress_analytics import progress_analytics
 from utils.translation import TranslationService
+from utils.instrumentation import begin_rerun, render_debug_panel
 from datetime import datetime
 
 # Initialize services
@@ -63,34 +67,47 @@ def display_profile_overview():
 
 def display_progress_tracking():
     """Display user's learning progress."""
-    progress = db.get_learning_progress(st.session_state.user['id'])
+    analytics = progress_analytics.summary(st.session_state.user['id'])
     
-    if not progress:
+    if not analytics['completion'] and not any(analytics['daily_events']):
         st.info("No learning progress recorded yet. Start learning to see your progress!")
         return
         
     st.subheader("Learning Progress")
     
-    # Group progress by language
-    progress_by_language = {}
-    for entry in progress:
-        lang = entry['language']
-        if lang not in progress_by_language:
-            progress_by_language[lang] = []
-        progress_by_language[lang].append(entry)
-    
-    # Display progress for each language
-    for language, entries in progress_by_language.items():
-        with st.expander(f"{language} Progress"):
-            for entry in entries:
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.write(f"**{entry['resource_type']}**")
-                with col2:
-                    st.progress(entry['progress'])
-                with col3:
-                    status = "Completed" if entry['completed'] else f"{int(entry['progress']*100)}% Complete"
-                    st.write(status)
+    # Completion per language, one bar per resource type
+    if analytics['completion']:
+        completion = pd.DataFrame(analytics['completion'])
+        fig = px.bar(
+            completion,
+            x='language',
+            y='completion',
+            color='resource_type',
+            barmode='group',
+            range_y=[0, 1],
+            hover_data=['items', 'completed', 'progress'],
+            labels={'language': 'Language', 'completion': 'Completed', 'resource_type': 'Type'}
+        )
+        fig.update_layout(yaxis_tickformat='.0%', height=350)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Daily activity over the last month
+    st.subheader("Recent Activity")
+    activity = pd.DataFrame({
+        'Date': analytics['days'],
+        'XP Earned': analytics['daily_xp'],
+        'Activities': analytics['daily_events']
+    })
+    fig = px.bar(activity, x='Date', y='XP Earned', hover_data=['Activities'])
+    fig.update_layout(height=300)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    # Skill mastery
+    st.subheader("Skills")
+    cols = st.columns(len(analytics['skills']))
+    for col, (skill, mastery) in zip(cols, analytics['skills'].items()):
+        with col:
+            st.metric(skill, f"{mastery:.0f}%")
 
 def display_achievements():
     """Display user achievements"""
@@ -114,9 +131,7 @@ def display_achievements():
         with col1 if i % 2 == 0 else col2:
             with st.expander(f"🏆 {achievement['title']}", expanded=True):
                 st.write(achievement['description'])
-                st.caption(f"Earned on: {achievement['earned_date']}")
-                if achievement.get('progress'):
-                    st.progress(achievement['progress'])
+                st.caption(f"Earned on: {achievement['earned_at']}")
 
 def display_settings():
     """Display user settings"""
@@ -174,4 +189,6 @@ def main():
         display_settings()
 
 if __name__ == "__main__":
+    begin_rerun("Profile")
     main()
+    render_debug_panel()
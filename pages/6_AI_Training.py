@@ -1,7 +1,8 @@
 import streamlit as st
 import google.generativeai as genai
 from utils.database import db
-from utils.languages import LANGUAGES
+from utils.languages import LANGUAGES, TRAINING_CATEGORIES, DIFFICULTY_LEVELS, FORMALITY_LEVELS
+from utils.instrumentation import begin_rerun, render_debug_panel
 import os
 from dotenv import load_dotenv
 import json
@@ -27,16 +28,6 @@ except Exception as e:
     st.error("Unable to initialize AI model. Please check your API key.")
     model = None
 
-# Training categories
-TRAINING_CATEGORIES = {
-    "daily_phrases": "Daily Conversations",
-    "cultural": "Cultural Expressions",
-    "idioms": "Idioms & Proverbs",
-    "formal": "Formal Language",
-    "slang": "Modern Slang",
-    "storytelling": "Traditional Stories"
-}
-
 def get_ai_feedback(phrase: str, translation: str, language: str, context: str) -> dict:
     """Get AI feedback on the translation quality and cultural relevance"""
     if not model:
@@ -119,47 +110,22 @@ def show_training_dashboard():
 
 def save_training_data(language: str, phrase: str, translation: str, context: str, category: str, difficulty: str, formality: str):
     """Save the training data to the database"""
-    try:
-        with db._get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO language_training (
-                    user_id, language, phrase, translation, context, category, difficulty, formality, submitted_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (st.session_state.user['id'], language, phrase, translation, context, category, difficulty, formality))
-            conn.commit()
-        return True
-    except Exception as e:
-        st.error(f"Error saving training data: {e}")
-        return False
+    result = db.add_training_entry(
+        st.session_state.user['id'], language, phrase, translation, context, category, difficulty, formality
+    )
+    if not result['success']:
+        st.error(f"Error saving training data: {result['error']}")
+    return result['success']
 
 def get_training_history(language: str = None, categories: list = None, statuses: list = None):
     """Get the training history for a specific language or all languages"""
     try:
-        with db._get_db_connection() as conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT * FROM language_training 
-                WHERE user_id = ?
-            """
-            params = (st.session_state.user['id'],)
-            
-            if language:
-                query += " AND language = ?"
-                params += (language,)
-            
-            if categories:
-                query += " AND category IN (%s)" % ','.join('?' for _ in categories)
-                params += tuple(categories)
-            
-            if statuses:
-                query += " AND validation_status IN (%s)" % ','.join('?' for _ in statuses)
-                params += tuple(statuses)
-            
-            query += " ORDER BY submitted_at DESC LIMIT 10"
-            
-            cursor.execute(query, params)
-            return cursor.fetchall()
+        return db.get_training_history(
+            st.session_state.user['id'],
+            language=language,
+            categories=categories,
+            statuses=statuses
+        )
     except Exception as e:
         st.error(f"Error fetching training history: {e}")
         return []
@@ -210,12 +176,12 @@ def main():
             with col1:
                 difficulty = st.select_slider(
                     "Difficulty Level",
-                    options=["Beginner", "Intermediate", "Advanced"]
+                    options=DIFFICULTY_LEVELS
                 )
             with col2:
                 formality = st.select_slider(
                     "Formality Level",
-                    options=["Informal", "Neutral", "Formal"]
+                    options=FORMALITY_LEVELS
                 )
             
             submitted = st.form_submit_button("Submit & Get AI Feedback")
@@ -387,17 +353,20 @@ def main():
                     f"Contributions: {leader['contributions']}"
                 )
             
-            # Show contribution map
-            st.write("#### Global Contribution Map")
-            fig = px.scatter_mapbox(
-                leaderboard,
-                lat='latitude',
-                lon='longitude',
-                size='contributions',
-                hover_name='user_email',
-                title="Where Contributors Are From"
-            )
-            st.plotly_chart(fig)
+            # Show contribution map when contributor locations are available
+            if all('latitude' in leader for leader in leaderboard):
+                st.write("#### Global Contribution Map")
+                fig = px.scatter_mapbox(
+                    leaderboard,
+                    lat='latitude',
+                    lon='longitude',
+                    size='contributions',
+                    hover_name='user_email',
+                    title="Where Contributors Are From"
+                )
+                st.plotly_chart(fig)
 
 if __name__ == "__main__":
+    begin_rerun("AI Training")
     main()
+    render_debug_panel()
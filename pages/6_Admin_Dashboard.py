@@ -1,5 +1,8 @@
 import streamlit as st
 from utils.languages import LANGUAGES
+from utils.translation import get_provider_pool
+from utils.database import db
+from utils.instrumentation import begin_rerun, render_debug_panel
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -165,6 +168,36 @@ def leaderboard_management():
         if st.button("Update Points"):
             st.success(f"Updated points for {user}")
 
+def service_health():
+    st.subheader("🩺 Translation Providers")
+
+    health = pd.DataFrame(get_provider_pool().health())
+    if health.empty:
+        st.info("No translation providers configured")
+        return
+
+    open_circuits = health[health['state'] != 'closed']
+    if not open_circuits.empty:
+        st.warning(f"Circuit open for: {', '.join(open_circuits['provider'])}")
+
+    st.dataframe(health, use_container_width=True)
+
+def game_items():
+    st.subheader("🎯 Game Items")
+    days = st.selectbox("Period", [1, 7, 30, 90], index=2, format_func=lambda d: f"Last {d} days")
+
+    summary = pd.DataFrame(db.get_item_answer_summary(days=days))
+    if summary.empty:
+        st.info("No game answers logged in this period")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Answers", int(summary['attempts'].sum()))
+    col2.metric("Accuracy", f"{(summary['accuracy'] * summary['attempts']).sum() / summary['attempts'].sum():.0%}")
+    col3.metric("Items answered", len(summary))
+
+    st.dataframe(summary, use_container_width=True)
+
 def display_admin_dashboard():
     st.title("👨‍💼 Admin Dashboard")
     
@@ -184,10 +217,12 @@ def display_admin_dashboard():
         return
     
     # Admin navigation
-    tab1, tab2, tab3 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Content Management",
         "Analytics",
-        "Leaderboard"
+        "Leaderboard",
+        "Service Health",
+        "Game Items"
     ])
     
     with tab1:
@@ -199,5 +234,13 @@ def display_admin_dashboard():
     with tab3:
         leaderboard_management()
 
+    with tab4:
+        service_health()
+
+    with tab5:
+        game_items()
+
 if __name__ == "__main__":
+    begin_rerun("Admin Dashboard")
     display_admin_dashboard()
+    render_debug_panel()
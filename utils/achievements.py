@@ -0,0 +1,126 @@
+"""Declarative achievement rules evaluated incrementally from activity events."""
+from collections import defaultdict
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Mapping, Set
+
+
+class AchievementRule:
+    __slots__ = ("id", "title", "description", "icon", "thresholds")
+
+    def __init__(self, id: str, title: str, description: str, icon: str, thresholds: Dict[str, float]):
+        """A rule unlocks once every counter in thresholds reaches its minimum value"""
+        self.id = id
+        self.title = title
+        self.description = description
+        self.icon = icon
+        self.thresholds = thresholds
+
+    def is_met(self, counters: Mapping[str, Any]) -> bool:
+        """Check the rule against a counter snapshot"""
+        return all((counters.get(counter) or 0) >= minimum for counter, minimum in self.thresholds.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "icon": self.icon
+        }
+
+
+ACHIEVEMENT_RULES = [
+    # Home page activity
+    AchievementRule("translation_master", "Translation Master", "Complete 10 translations in one day", "🎯",
+                    {"translations_today": 10}),
+    AchievementRule("weekly_warrior", "Weekly Warrior", "Maintain a 7-day learning streak", "🔥",
+                    {"daily_streak": 7}),
+    AchievementRule("century_club", "Century Club", "Earn 100 learning points", "💯",
+                    {"learning_points": 100}),
+    # Language games
+    AchievementRule("games_10", "Game Explorer", "Played 10 different games", "🎮",
+                    {"games_played": 10}),
+    AchievementRule("proverbs_5", "Wisdom Seeker", "Learned 5 traditional proverbs", "📚",
+                    {"proverbs_learned": 5}),
+    AchievementRule("cultural_explorer", "Cultural Explorer", "Completed 10 cultural games", "🌍",
+                    {"cultural_games_played": 10}),
+    AchievementRule("cultural_master", "Cultural Master", "Earned 1000 points in cultural games", "👑",
+                    {"cultural_game_score": 1000}),
+    # Interactive lessons
+    AchievementRule("achievement_10_correct", "10 Correct Answers", "Completed 10 exercises correctly", "✅",
+                    {"correct_exercises": 10}),
+]
+
+
+class AchievementEngine:
+    def __init__(self, rules: Iterable[AchievementRule], db=None):
+        """Index rules by the counters they depend on"""
+        self.rules = {rule.id: rule for rule in rules}
+        self._rules_by_counter = defaultdict(list)
+        for rule in self.rules.values():
+            for counter in rule.thresholds:
+                self._rules_by_counter[counter].append(rule)
+
+        self._db = db
+        self._lock = Lock()
+        self._counters = defaultdict(dict)
+        self._unlocked = {}
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    def affected_rules(self, counters: Iterable[str]) -> List[AchievementRule]:
+        """Rules that depend on at least one of the given counters"""
+        seen = {}
+        for counter in counters:
+            for rule in self._rules_by_counter.get(counter, ()):
+                seen[rule.id] = rule
+        return list(seen.values())
+
+    def evaluate(self, counters: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Statelessly evaluate the rules touched by a counter snapshot"""
+        return [rule.to_dict() for rule in self.affected_rules(counters) if rule.is_met(counters)]
+
+    def _unlocked_for(self, user_id: int) -> Set[str]:
+        if user_id not in self._unlocked:
+            titles = self.db.get_achievement_titles(user_id)
+            self._unlocked[user_id] = {rule.id for rule in self.rules.values() if rule.title in titles}
+        return self._unlocked[user_id]
+
+    def process_event(self, user_id: int, event: Mapping[str, Any]) -> List[Dict[str, Any]]:
+        """Apply counter updates and return achievements newly unlocked by them.
+
+        The event maps counter names to their current values. Only rules that
+        depend on those counters are checked, and each unlock is persisted to
+        user_achievements at most once per user.
+        """
+        newly_unlocked = []
+        with self._lock:
+            counters = self._counters[user_id]
+            counters.update(event)
+            unlocked = self._unlocked_for(user_id)
+
+            for rule in self.affected_rules(event):
+                if rule.id in unlocked or not rule.is_met(counters):
+                    continue
+                awarded = self.db.award_achievement(user_id, rule.title, rule.description)
+                if awarded is None:
+                    # Not saved; leave it locked so the next event retries
+                    continue
+                unlocked.add(rule.id)
+                if awarded:
+                    newly_unlocked.append(rule.to_dict())
+
+        return newly_unlocked
+
+    def forget_user(self, user_id: int):
+        """Drop cached counters and unlocks for a user"""
+        with self._lock:
+            self._counters.pop(user_id, None)
+            self._unlocked.pop(user_id, None)
+
+
+achievement_engine = AchievementEngine(ACHIEVEMENT_RULES)
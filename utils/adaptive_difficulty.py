@@ -0,0 +1,269 @@
+"""Adaptive item selection for the language games.
+
+Items and learners share one logit scale (a Rasch model): a learner with
+ability ``a`` answers an item of difficulty ``d`` correctly with probability
+``1 / (1 + exp(d - a))``. Each answer moves both estimates Elo-style, with
+step sizes that shrink as they collect answers. A nightly refit replays the
+whole answer log and solves for every estimate jointly:
+
+    python -m utils.adaptive_difficulty --refit
+
+Answers go through the buffered answer log, which writes them in batches
+together with how much they moved the estimates. Until a batch is flushed,
+the buffered changes are added to the stored estimates. Because batches
+write changes rather than values, a refit run by another process is never
+overwritten, and app processes reload their pools when they see a new fit.
+
+Items start at a prior taken from their authored difficulty. Each game and
+language keeps an in-process pool of items sorted by difficulty, so picking
+the item nearest a learner's target is a binary search.
+"""
+import argparse
+import json
+import math
+import time
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from utils.answer_log import answer_log
+
+# Chance of a correct answer that selection aims for: challenging but encouraging
+TARGET_SUCCESS = 0.7
+# Prior difficulty per authored level; level 2 is average
+PRIOR_PER_LEVEL = 1.0
+# Elo step sizes for a new learner and a new item, and the floor they decay to
+ABILITY_K = 0.6
+DIFFICULTY_K = 0.4
+MIN_K = 0.05
+# Answers after which a step size has halved
+K_HALF_LIFE = 20
+# Seconds before a pool is reloaded, picking up other processes' updates
+POOL_REFRESH_SECONDS = 300
+# Seconds between checks for a refit saved by another process
+FIT_CHECK_SECONDS = 30
+# Refit settings: pull toward the prior (items) or 0 (learners), and Newton iterations
+REFIT_REGULARIZATION = 0.5
+REFIT_ITERATIONS = 200
+REFIT_TOLERANCE = 1e-5
+
+
+def prior_difficulty(level: int) -> float:
+    return (level - 2) * PRIOR_PER_LEVEL
+
+
+def probability(ability: float, difficulty: float) -> float:
+    """Chance that a learner of this ability answers an item of this difficulty correctly"""
+    return 1.0 / (1.0 + math.exp(difficulty - ability))
+
+
+def step_size(k: float, attempts: int) -> float:
+    return max(MIN_K, k / (1.0 + attempts / K_HALF_LIFE))
+
+
+def elo_update(ability: float, user_attempts: int, difficulty: float, item_attempts: int,
+               correct: bool) -> Tuple[float, float]:
+    """New ability and difficulty after one answer"""
+    surprise = float(correct) - probability(ability, difficulty)
+    return (
+        ability + step_size(ABILITY_K, user_attempts) * surprise,
+        difficulty - step_size(DIFFICULTY_K, item_attempts) * surprise,
+    )
+
+
+class ItemPool:
+    def __init__(self, difficulties: Dict[str, float]):
+        """Items of one game and language, sorted by difficulty"""
+        self.difficulties = dict(difficulties)
+        self._entries = sorted((d, item_id) for item_id, d in self.difficulties.items())
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, item_id: str, difficulty: float):
+        old = self.difficulties.get(item_id)
+        if old is not None:
+            i = bisect_left(self._entries, (old, item_id))
+            if i < len(self._entries) and self._entries[i] == (old, item_id):
+                del self._entries[i]
+        self.difficulties[item_id] = difficulty
+        insort(self._entries, (difficulty, item_id))
+
+    def nearest(self, target: float, exclude: Iterable[str] = ()) -> Optional[str]:
+        """Item whose difficulty is closest to target, skipping excluded ones"""
+        exclude = set(exclude)
+        lo = bisect_left(self._entries, (target, ""))
+        hi = lo
+        lo -= 1
+        # Walk outwards from the insertion point; only excluded items are passed over
+        while lo >= 0 or hi < len(self._entries):
+            below = self._entries[lo] if lo >= 0 else None
+            above = self._entries[hi] if hi < len(self._entries) else None
+            if above is None or (below is not None and target - below[0] <= above[0] - target):
+                candidate, lo = below, lo - 1
+            else:
+                candidate, hi = above, hi + 1
+            if candidate[1] not in exclude:
+                return candidate[1]
+        return None
+
+
+class DifficultyEngine:
+    def __init__(self, db=None):
+        """Per-item difficulty and per-learner ability, persisted in the database"""
+        self._db = db
+        self._pools = {}
+        self._fit_version = None
+        self._fit_checked_at = 0.0
+        self._lock = Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    def pool(self, game_type: str, language: str, items: Iterable[Tuple[str, int]] = ()) -> ItemPool:
+        """Pool for a game and language, registering items (id, authored level) not yet in the database"""
+        key = (game_type, language)
+        with self._lock:
+            if time.monotonic() - self._fit_checked_at > FIT_CHECK_SECONDS:
+                fit_version = self.db.get_fit_version()
+                if fit_version != self._fit_version:
+                    self._pools.clear()
+                    self._fit_version = fit_version
+                self._fit_checked_at = time.monotonic()
+            pool = self._pools.get(key)
+            if pool is not None and time.monotonic() - pool.loaded_at < POOL_REFRESH_SECONDS:
+                missing = [(item_id, level) for item_id, level in items if item_id not in pool.difficulties]
+                if not missing:
+                    return pool
+            else:
+                missing = list(items)
+            if missing:
+                self.db.register_items([
+                    {"item_id": item_id, "game_type": game_type, "language": language,
+                     "prior": prior_difficulty(level)}
+                    for item_id, level in missing
+                ])
+            pool = self._pools[key] = ItemPool(self.db.get_item_difficulties(game_type, language))
+            return pool
+
+    def _learner(self, user_id: int, language: str) -> Dict[str, Any]:
+        stored = self.db.get_user_ability(user_id, language)
+        pending = answer_log.pending_ability(user_id, language)
+        if pending is None:
+            return stored
+        return {"ability": stored["ability"] + pending["change"], "attempts": stored["attempts"] + pending["attempts"]}
+
+    def _item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        stored = self.db.get_item_stats(item_id)
+        pending = answer_log.pending_item(item_id)
+        if stored is None or pending is None:
+            return stored
+        return {**stored, "difficulty": stored["difficulty"] + pending["change"],
+                "attempts": stored["attempts"] + pending["attempts"]}
+
+    def ability(self, user_id: int, language: str) -> float:
+        return self._learner(user_id, language)["ability"]
+
+    def next_item(self, user_id: int, game_type: str, language: str, items: Iterable[Tuple[str, int]] = (),
+                  exclude: Iterable[str] = ()) -> Optional[str]:
+        """Item a learner should succeed on about TARGET_SUCCESS of the time"""
+        pool = self.pool(game_type, language, items)
+        target = self.ability(user_id, language) - math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+        return pool.nearest(target, exclude) or pool.nearest(target)
+
+    def record_answer(self, user_id: int, game_type: str, language: str, item_id: str, correct: bool,
+                      latency_ms: int = None, answer: str = None) -> dict:
+        """Update the learner's ability and the item's difficulty from one answer, and log it"""
+        user = self._learner(user_id, language)
+        item = self._item(item_id)
+        if item is None:
+            return {"success": False, "error": f"Unknown item: {item_id}"}
+        ability, difficulty = elo_update(user["ability"], user["attempts"], item["difficulty"], item["attempts"], correct)
+        answer_log.append(user_id, item_id, game_type, language, correct, latency_ms=latency_ms, answer=answer,
+                          ability_change=ability - user["ability"], difficulty_change=difficulty - item["difficulty"])
+        with self._lock:
+            pool = self._pools.get((game_type, language))
+            if pool is not None:
+                pool.update(item_id, difficulty)
+        return {"success": True, "ability": ability, "difficulty": difficulty}
+
+    def refit(self) -> Dict[str, Any]:
+        """Jointly re-estimate every ability and difficulty from the answer log.
+
+        Maximizes the Rasch likelihood with a Gaussian penalty toward each
+        item's prior and toward 0 for learners, using per-parameter Newton
+        steps that alternate between learners and items.
+        """
+        answer_log.flush()
+        rows = list(self.db.iter_item_responses())
+        if not rows:
+            return {"responses": 0, "items": 0, "abilities": 0, "iterations": 0}
+
+        users, languages, item_ids, correct = zip(*rows)
+        learner_keys = np.array([f"{user_id}:{language}" for user_id, language in zip(users, languages)])
+        learners, u = np.unique(learner_keys, return_inverse=True)
+        items, i = np.unique(np.array(item_ids), return_inverse=True)
+        y = np.array(correct, dtype=float)
+
+        priors = self.db.get_item_priors()
+        prior = np.array([priors[item_id] for item_id in items])
+        theta = np.zeros(len(learners))
+        b = prior.copy()
+
+        iterations = 0
+        for iterations in range(1, REFIT_ITERATIONS + 1):
+            p = 1.0 / (1.0 + np.exp(b[i] - theta[u]))
+            residual = y - p
+            weight = p * (1.0 - p)
+            theta_step = (np.bincount(u, residual, len(learners)) - REFIT_REGULARIZATION * theta) / (
+                np.bincount(u, weight, len(learners)) + REFIT_REGULARIZATION)
+            theta += theta_step
+
+            p = 1.0 / (1.0 + np.exp(b[i] - theta[u]))
+            residual = y - p
+            weight = p * (1.0 - p)
+            b_step = (-np.bincount(i, residual, len(items)) - REFIT_REGULARIZATION * (b - prior)) / (
+                np.bincount(i, weight, len(items)) + REFIT_REGULARIZATION)
+            b += b_step
+
+            if max(np.abs(theta_step).max(), np.abs(b_step).max()) < REFIT_TOLERANCE:
+                break
+
+        item_attempts = np.bincount(i, minlength=len(items))
+        item_correct = np.bincount(i, y, len(items)).astype(int)
+        learner_attempts = np.bincount(u, minlength=len(learners))
+        result = self.db.save_item_fit(
+            [(float(b[n]), int(item_attempts[n]), int(item_correct[n]), items[n]) for n in range(len(items))],
+            [
+                (float(theta[n]), int(learner_attempts[n]), int(user_id), language)
+                for n, (user_id, language) in enumerate(key.split(":", 1) for key in learners)
+            ],
+        )
+        with self._lock:
+            self._pools.clear()
+        return {"responses": len(rows), "iterations": iterations, **result}
+
+
+difficulty_engine = DifficultyEngine()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain adaptive game difficulty estimates")
+    parser.add_argument("--refit", action="store_true", help="Re-estimate everything from the answer log (run nightly)")
+    args = parser.parse_args()
+
+    if args.refit:
+        print(json.dumps(difficulty_engine.refit(), indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Batched AI scoring for community translation contributions.
+
+Packs many (phrase, translation, context) items into a single prompt, parses the
+per-item JSON results and re-queues only the items whose results were missing or
+invalid. Run ``python -m utils.ai_scoring`` to rescan pending contributions.
+"""
+import argparse
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.languages import LANGUAGES
+
+# Required numeric fields and their valid range
+SCORE_FIELDS = ("accuracy", "cultural_relevance")
+# Optional free-text fields, defaulted to "" when absent
+TEXT_FIELDS = ("feedback", "suggestions", "cultural_notes")
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+
+class BatchScorer:
+    def __init__(self, model, batch_size: int = 20, max_attempts: int = 3):
+        """Initialize the scorer with a generative model exposing generate_content()"""
+        self.model = model
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+    def build_prompt(self, items: List[Dict[str, Any]]) -> str:
+        """Build one structured prompt covering every item in the batch."""
+        entries = [
+            {
+                "id": str(item["id"]),
+                "language": LANGUAGES.get(item["language"], {}).get("name", item["language"]),
+                "english": item["phrase"],
+                "translation": item["translation"],
+                "context": item.get("context") or ""
+            }
+            for item in items
+        ]
+        return f"""
+        As a South African language expert, analyze each of these translations.
+
+        Items (JSON):
+        {json.dumps(entries, ensure_ascii=False)}
+
+        For every item provide:
+        1. Translation accuracy (0-100)
+        2. Cultural relevance (0-100)
+        3. Specific feedback
+        4. Suggested improvements
+        5. Cultural context notes
+
+        Respond with a JSON array only, one object per item, using the item id:
+        [
+            {{
+                "id": "string",
+                "accuracy": number,
+                "cultural_relevance": number,
+                "feedback": "string",
+                "suggestions": "string",
+                "cultural_notes": "string"
+            }}
+        ]
+        """
+
+    def parse_response(self, text: str) -> List[Dict[str, Any]]:
+        """Extract per-item result objects from a model response.
+
+        Tolerates code fences, prose around the JSON, a wrapping object and
+        truncated output, keeping every object that still decodes.
+        """
+        text = _FENCE_RE.sub("", (text or "").strip())
+
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            parsed = None
+            start, end = text.find("["), text.rfind("]")
+            if start != -1 and end > start:
+                try:
+                    parsed = json.loads(text[start:end + 1])
+                except ValueError:
+                    parsed = None
+
+        if isinstance(parsed, dict):
+            parsed = parsed.get("results", parsed.get("items", [parsed]))
+        if isinstance(parsed, list):
+            return [obj for obj in parsed if isinstance(obj, dict)]
+
+        # Fall back to decoding objects one by one
+        decoder = json.JSONDecoder()
+        objects = []
+        pos = text.find("{")
+        while pos != -1:
+            try:
+                obj, end = decoder.raw_decode(text, pos)
+            except ValueError:
+                pos = text.find("{", pos + 1)
+                continue
+            if isinstance(obj, dict):
+                objects.append(obj)
+            pos = text.find("{", end)
+        return objects
+
+    def validate(self, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate a single result against the score schema, or return None"""
+        if "id" not in result:
+            return None
+
+        validated = {"id": str(result["id"])}
+        for field in SCORE_FIELDS:
+            value = result.get(field)
+            if isinstance(value, str):
+                value = value.strip().rstrip("%")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None
+            if not 0 <= value <= 100:
+                return None
+            validated[field] = value
+
+        for field in TEXT_FIELDS:
+            value = result.get(field) or ""
+            if not isinstance(value, str):
+                value = json.dumps(value, ensure_ascii=False)
+            validated[field] = value
+        return validated
+
+    def score_batch(self, items: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+        """Score one batch, returning (valid results by id, items that failed)."""
+        wanted = {str(item["id"]): item for item in items}
+        try:
+            response = self.model.generate_content(self.build_prompt(items))
+            results = self.parse_response(response.text)
+        except Exception as e:
+            print(f"Batch scoring error: {str(e)}")
+            return {}, items
+
+        scored = {}
+        for result in results:
+            validated = self.validate(result)
+            if validated and validated["id"] in wanted:
+                scored[validated["id"]] = validated
+
+        failed = [item for item_id, item in wanted.items() if item_id not in scored]
+        return scored, failed
+
+    def score(self, items: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+        """Score all items, re-queuing failed ones for up to max_attempts rounds."""
+        scored = {}
+        queue = list(items)
+
+        for _ in range(self.max_attempts):
+            if not queue:
+                break
+            retry = []
+            for i in range(0, len(queue), self.batch_size):
+                batch_scored, batch_failed = self.score_batch(queue[i:i + self.batch_size])
+                scored.update(batch_scored)
+                retry.extend(batch_failed)
+            queue = retry
+
+        return scored, queue
+
+
+def rescan_pending(db, scorer: BatchScorer, language: str = None, limit: int = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Score pending language_training rows and store the results."""
+    pending = db.get_pending_training(language, limit)
+    scored, failed = scorer.score(pending)
+
+    scores = [
+        {
+            "training_id": int(item_id),
+            "accuracy": result["accuracy"],
+            "cultural_relevance": result["cultural_relevance"],
+            "feedback": result["feedback"],
+            "suggestions": result["suggestions"],
+            "cultural_notes": result["cultural_notes"]
+        }
+        for item_id, result in scored.items()
+    ]
+    summary = {
+        "pending": len(pending),
+        "scored": len(scores),
+        "failed": [item["id"] for item in failed]
+    }
+    if scores and not dry_run:
+        result = db.save_training_ai_scores(scores)
+        if not result.get("success"):
+            print(f"Error saving AI scores: {result.get('error')}")
+            summary["scored"] = 0
+            summary["save_failed"] = [score["training_id"] for score in scores]
+            summary["save_error"] = result.get("error")
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score pending training contributions with Gemini")
+    parser.add_argument("--language", help="Only rescan this language (e.g. zulu)")
+    parser.add_argument("--limit", type=int, help="Maximum number of pending rows to score")
+    parser.add_argument("--batch-size", type=int, default=20, help="Items per prompt")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Rounds for re-queued items")
+    parser.add_argument("--dry-run", action="store_true", help="Score without saving results")
+    args = parser.parse_args()
+
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+    from utils.database import db
+
+    load_dotenv()
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    model = genai.GenerativeModel('gemini-pro')
+
+    scorer = BatchScorer(model, batch_size=args.batch_size, max_attempts=args.max_attempts)
+    summary = rescan_pending(db, scorer, args.language, args.limit, args.dry_run)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
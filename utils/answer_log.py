@@ -0,0 +1,167 @@
+"""Buffered log of graded game answers.
+
+Each answer becomes a compact event: user, item, game, language,
+correctness, time taken to answer, and a hash of the answer text (enough
+to spot common wrong answers without storing what learners typed). Events
+are held in memory and written in batches, together with how much they moved
+the adaptive difficulty estimates, so a click costs no database write.
+Estimates are written as changes added to the stored value rather than as
+absolute values, so a batch flushed after a refit builds on the fit instead
+of overwriting it. A batch
+is flushed once it reaches ``ANSWER_LOG_BATCH_SIZE`` events, when its oldest
+event is ``ANSWER_LOG_FLUSH_SECONDS`` old, and at exit. Events still
+buffered when the process is killed are lost.
+"""
+import atexit
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from utils.translation_memory import normalize_text
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_SECONDS = 5.0
+# Events kept when the database is unavailable, oldest dropped first
+MAX_BUFFERED = 10000
+
+
+def answer_hash(answer: str) -> Optional[str]:
+    """Short hash of a normalized answer, so equal answers group together"""
+    if answer is None:
+        return None
+    return hashlib.sha256(normalize_text(str(answer)).encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerLog:
+    def __init__(self, db=None, batch_size: int = None, flush_seconds: float = None):
+        """Buffer answer events and write them in batches"""
+        self._db = db
+        self._batch_size = batch_size
+        self._flush_seconds = flush_seconds
+        self._events = []
+        # Summed estimate changes per learner and item, with answer counts since the last flush
+        self._abilities = {}
+        self._items = {}
+        # The batch being written, still visible to readers until it commits
+        self._inflight = ({}, {})
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    # Settings are read on use so a .env loaded after import still applies
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size or int(os.getenv("ANSWER_LOG_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+
+    @property
+    def flush_seconds(self) -> float:
+        return self._flush_seconds or float(os.getenv("ANSWER_LOG_FLUSH_SECONDS", DEFAULT_FLUSH_SECONDS))
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def append(self, user_id: int, item_id: str, game_type: str, language: str, correct: bool,
+               latency_ms: Optional[int] = None, answer: str = None,
+               ability_change: float = None, difficulty_change: float = None):
+        """Buffer one answer, with how much it moved the learner's ability and the item's difficulty"""
+        event = {
+            "user_id": user_id,
+            "item_id": item_id,
+            "game_type": game_type,
+            "language": language,
+            "correct": int(bool(correct)),
+            "latency_ms": int(latency_ms) if latency_ms is not None else None,
+            "answer_hash": answer_hash(answer),
+            # Same format as SQLite's CURRENT_TIMESTAMP, taken now rather than at flush
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self._events.append(event)
+            if ability_change is not None:
+                entry = self._abilities.setdefault((user_id, language), [0.0, 0])
+                entry[0] += ability_change
+                entry[1] += 1
+            if difficulty_change is not None:
+                entry = self._items.setdefault(item_id, [0.0, 0, 0])
+                entry[0] += difficulty_change
+                entry[1] += 1
+                entry[2] += event["correct"]
+            full = len(self._events) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def _pending(self, buffered: Dict, inflight: Dict, key) -> Optional[list]:
+        entry, earlier = buffered.get(key), inflight.get(key)
+        if entry is None:
+            return earlier
+        return [entry[0] + earlier[0], entry[1] + earlier[1]] if earlier else entry
+
+    def pending_ability(self, user_id: int, language: str) -> Optional[Dict[str, Any]]:
+        """Unwritten ability change for a learner as {change, attempts}, where attempts are unwritten answers"""
+        with self._lock:
+            entry = self._pending(self._abilities, self._inflight[0], (user_id, language))
+            return {"change": entry[0], "attempts": entry[1]} if entry else None
+
+    def pending_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Unwritten difficulty change for an item as {change, attempts}, where attempts are unwritten answers"""
+        with self._lock:
+            entry = self._pending(self._items, self._inflight[1], item_id)
+            return {"change": entry[0], "attempts": entry[1]} if entry else None
+
+    def flush(self) -> Dict[str, Any]:
+        """Write everything buffered so far as one batch"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                events, self._events = self._events, []
+                abilities, self._abilities = self._abilities, {}
+                items, self._items = self._items, {}
+                self._inflight = (abilities, items)
+            if not events:
+                return {"success": True, "events": 0}
+
+            result = self.db.save_answer_batch(
+                events,
+                [(change, count, user_id, language) for (user_id, language), (change, count) in abilities.items()],
+                [(change, count, correct, item_id) for item_id, (change, count, correct) in items.items()],
+            )
+            if not result["success"]:
+                print(f"Error writing answer log: {result['error']}")
+                self._requeue(events, abilities, items)
+            with self._lock:
+                self._inflight = ({}, {})
+            return result
+
+    def _requeue(self, events: List[Dict[str, Any]], abilities: Dict, items: Dict):
+        # Put a failed batch back in front of anything buffered since, for the next flush
+        with self._lock:
+            self._events = (events + self._events)[-MAX_BUFFERED:]
+            for key, (change, count) in abilities.items():
+                newer = self._abilities.get(key)
+                self._abilities[key] = [newer[0] + change, newer[1] + count] if newer else [change, count]
+            for key, (change, count, correct) in items.items():
+                newer = self._items.get(key)
+                self._items[key] = [newer[0] + change, newer[1] + count, newer[2] + correct] if newer else [change, count, correct]
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+
+answer_log = AnswerLog()
@@ -1,5 +1,6 @@
 import os
 import io
+import hashlib
 from gtts import gTTS
 import streamlit as st
 
@@ -8,6 +9,12 @@ class AudioService:
         """Initialize audio service with gTTS"""
         print("Initialized AudioService with gTTS")
 
+    @staticmethod
+    def cache_key(text, language_code='en-US'):
+        """Stable key for the speech of text in a language, for caching generated audio"""
+        base_lang = language_code.split('-')[0]
+        return hashlib.sha256(f"gtts\x00{base_lang}\x00{text}".encode('utf-8')).hexdigest()
+
     def text_to_speech(self, text, language_code='en-US'):
         """Convert text to speech using gTTS"""
         try:
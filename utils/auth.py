@@ -1,15 +1,47 @@
-import bcrypt
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import streamlit as st
 from .database import db
+from . import auth_worker
+from .auth_worker import login_throttle
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return auth_worker.hash_password(password)
 
-def verify_password(password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+def verify_password(password: str, hashed_password: str) -> Optional[bool]:
+    """Verify a password against its hash; None if it couldn't be checked"""
+    return auth_worker.verify_password(password, hashed_password)
+
+def client_ip() -> Optional[str]:
+    """Best-effort client address of the current session"""
+    try:
+        forwarded = st.context.headers.get('X-Forwarded-For', '')
+        return forwarded.split(',')[0].strip() or st.context.headers.get('X-Real-Ip')
+    except Exception:
+        return None
+
+def authenticate(email: str, password: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Check credentials and return (user, error).
+
+    Attempts are throttled per email and client IP, and a hash made at an
+    outdated bcrypt cost is replaced once the password is known to be right.
+    """
+    if not login_throttle.allow(email, client_ip()):
+        return None, 'Too many sign-in attempts. Please wait a minute and try again.'
+
+    user = db.get_user(email)
+    verified = verify_password(password, user['password_hash']) if user else False
+    if verified is None:
+        return None, 'Sign-in is temporarily unavailable. Please try again in a moment.'
+    if not verified:
+        return None, 'Invalid email or password'
+
+    if auth_worker.needs_rehash(user['password_hash']):
+        try:
+            db.update_password_hash(user['id'], hash_password(password))
+        except Exception as e:
+            print(f"Error upgrading password hash: {e}")
+    return user, None
 
 def sign_up(email: str, password: str) -> Dict[str, Any]:
     """Sign up a new user"""
@@ -31,20 +63,17 @@ def sign_up(email: str, password: str) -> Dict[str, Any]:
 
 def sign_in(email: str, password: str) -> Dict[str, Any]:
     """Sign in an existing user"""
-    user = db.get_user(email)
+    user, error = authenticate(email, password)
     
-    if not user:
-        return {'success': False, 'error': 'Invalid email or password'}
+    if error:
+        return {'success': False, 'error': error}
     
-    if verify_password(password, user['password_hash']):
-        # Set session state
-        st.session_state['user'] = {
-            'id': user['id'],
-            'email': user['email']
-        }
-        return {'success': True, 'message': 'Signed in successfully!'}
-    else:
-        return {'success': False, 'error': 'Invalid email or password'}
+    # Set session state
+    st.session_state['user'] = {
+        'id': user['id'],
+        'email': user['email']
+    }
+    return {'success': True, 'message': 'Signed in successfully!'}
 
 def sign_out():
     """Sign out the current user"""
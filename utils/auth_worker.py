@@ -0,0 +1,202 @@
+"""Password hashing off the Streamlit script thread, plus login throttling.
+
+bcrypt runs in a small process pool so a burst of sign-ins doesn't stall
+every session on the server. The bcrypt cost is calibrated once to fit
+AUTH_HASH_BUDGET_MS and saved, so every process and restart uses the same
+cost, and it never drops below AUTH_BCRYPT_MIN_ROUNDS. Hashes made at a lower
+cost are upgraded transparently on the next successful login; hashes are
+never rehashed at a lower cost.
+"""
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Optional
+
+import bcrypt
+
+# Target time for a single hash, in milliseconds
+HASH_BUDGET_MS = int(os.getenv("AUTH_HASH_BUDGET_MS", "250"))
+# bcrypt cost bounds; 10 is the floor OWASP still accepts
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+# Cost new hashes never go below, whatever calibration measures
+ROUNDS_FLOOR = int(os.getenv("AUTH_BCRYPT_MIN_ROUNDS", "12"))
+# Calibrated cost, shared by all processes
+ROUNDS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "auth_rounds")
+# Seconds to wait for a worker before giving up
+HASH_TIMEOUT = 30
+
+_pool = None
+_pool_lock = Lock()
+_rounds = None
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _time_hash(rounds: int) -> float:
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+    return (time.perf_counter() - start) * 1000
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Get the shared auth worker pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.getenv("AUTH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+            # spawn avoids forking the threaded Streamlit server process
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def calibrate_rounds(budget_ms: int = HASH_BUDGET_MS) -> int:
+    """Pick the highest bcrypt cost whose hash time fits the budget.
+
+    Each extra round doubles the work, so one measurement at MIN_ROUNDS is
+    enough to extrapolate.
+    """
+    base_ms = get_pool().submit(_time_hash, MIN_ROUNDS).result(timeout=HASH_TIMEOUT)
+    rounds = MIN_ROUNDS
+    while rounds < MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - MIN_ROUNDS) <= budget_ms:
+        rounds += 1
+    return rounds
+
+
+def _saved_rounds() -> int:
+    """Calibrated cost from ROUNDS_PATH, calibrating and saving it on first use"""
+    try:
+        with open(ROUNDS_PATH) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        pass
+    rounds = calibrate_rounds()
+    try:
+        os.makedirs(os.path.dirname(ROUNDS_PATH), exist_ok=True)
+        tmp_path = f"{ROUNDS_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(rounds))
+        os.replace(tmp_path, ROUNDS_PATH)
+    except OSError as e:
+        print(f"Could not save bcrypt calibration: {e}")
+    return rounds
+
+
+def current_rounds() -> int:
+    """bcrypt cost used for new hashes"""
+    global _rounds
+    if _rounds is None:
+        configured = os.getenv("AUTH_BCRYPT_ROUNDS")
+        _rounds = max(ROUNDS_FLOOR, int(configured) if configured else _saved_rounds())
+    return _rounds
+
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt in the worker pool"""
+    future = get_pool().submit(_hash, password.encode('utf-8'), current_rounds())
+    return future.result(timeout=HASH_TIMEOUT).decode('utf-8')
+
+
+def verify_password(password: str, hashed: str) -> Optional[bool]:
+    """Verify a password against its hash in the worker pool; None if the worker failed or timed out"""
+    pool = get_pool()
+    try:
+        future = pool.submit(_check, password.encode('utf-8'), hashed.encode('utf-8'))
+        return future.result(timeout=HASH_TIMEOUT)
+    except ValueError:
+        # Malformed hash
+        return False
+    except FutureTimeoutError:
+        print(f"Password check timed out after {HASH_TIMEOUT}s")
+        return None
+    except BrokenProcessPool as e:
+        print(f"Auth worker pool failed: {e}")
+        _discard_pool(pool)
+        return None
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Read the cost factor from a bcrypt hash like $2b$12$..."""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Whether a hash was made at a lower cost than new hashes use"""
+    rounds = hash_rounds(hashed)
+    return rounds is not None and rounds < current_rounds()
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+
+class LoginThrottle:
+    def __init__(self, email_limit: int = 5, ip_limit: int = 60, max_keys: int = 10000):
+        """Token buckets per email and per client IP, kept in memory.
+
+        Limits are attempts per minute, also used as the burst size. The IP
+        limit is higher because a whole classroom often shares one address.
+        """
+        self.limits = {"email": email_limit, "ip": ip_limit}
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    def _take(self, kind: str, key: str) -> bool:
+        capacity = self.limits[kind]
+        now = time.monotonic()
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            bucket = self._buckets[(kind, key)] = TokenBucket(capacity)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((kind, key))
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated_at) * capacity / 60.0)
+            bucket.updated_at = now
+
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def allow(self, email: str, ip: str = None) -> bool:
+        """Consume one attempt for the email and IP; False means throttled"""
+        with self._lock:
+            allowed = self._take("email", (email or "").strip().lower())
+            if ip:
+                allowed = self._take("ip", ip) and allowed
+            return allowed
+
+
+login_throttle = LoginThrottle(
+    email_limit=int(os.getenv("LOGIN_ATTEMPTS_PER_EMAIL", "5")),
+    ip_limit=int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "60"))
+)
@@ -0,0 +1,58 @@
+"""Content-addressed on-disk storage for binary blobs such as TTS audio."""
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_blob_key(value) -> bool:
+    """Check whether a value looks like a blob store key"""
+    return isinstance(value, str) and bool(_KEY_RE.match(value))
+
+
+class BlobStore:
+    def __init__(self, root: str = None):
+        """Store blobs under root, sharded by the first two hex digits of their key"""
+        self.root = root or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'blobs')
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Get the file path for a blob key"""
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their SHA-256 key; identical content is stored once"""
+        key = hashlib.sha256(data).hexdigest()
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Read a blob, or None if it is missing"""
+        try:
+            with open(self.path(key), 'rb') as f:
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def exists(self, key: str) -> bool:
+        return is_blob_key(key) and os.path.exists(self.path(key))
+
+
+blob_store = BlobStore()
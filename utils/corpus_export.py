@@ -0,0 +1,296 @@
+"""Streaming export of the contributed language corpus.
+
+Verified ``language_training`` rows (with their validation votes) and the
+``translations`` log are read in fixed-size chunks and written as JSONL and,
+when pyarrow is installed, Parquet, with one shard per language. Memory use
+stays flat however large the tables grow.
+
+Each run covers the rows added, edited or verified since the previous run's
+watermark, recorded in ``manifest.json`` in the output directory along with
+the SHA-256 of every file written. Rows reappear in a later run if they are
+edited (e.g. re-imported with a new translation) or receive more votes, so
+consumers should dedupe by ``id`` and keep the latest. Run ``python -m utils.corpus_export``
+to export.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+MANIFEST_NAME = "manifest.json"
+CHECKSUMS_NAME = "SHA256SUMS"
+FORMATS = ("jsonl", "parquet")
+
+# Columns and Parquet types for each dataset
+DATASET_COLUMNS = {
+    "training": (
+        ("id", "int64"),
+        ("language", "string"),
+        ("phrase", "string"),
+        ("translation", "string"),
+        ("context", "string"),
+        ("category", "string"),
+        ("difficulty", "string"),
+        ("formality", "string"),
+        ("correct_votes", "int64"),
+        ("total_votes", "int64"),
+        ("submitted_at", "string"),
+    ),
+    "translations": (
+        ("id", "int64"),
+        ("source_text", "string"),
+        ("source_language", "string"),
+        ("target_text", "string"),
+        ("target_language", "string"),
+        ("created_at", "string"),
+    ),
+}
+
+# Column each dataset is sharded by
+SHARD_COLUMNS = {"training": "language", "translations": "target_language"}
+
+
+def _shard_name(value: Optional[str]) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", value or "").strip("_") or "unknown"
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class JsonlShard:
+    def __init__(self, path: str, columns: Tuple[Tuple[str, str], ...]):
+        self.path = path
+        self.rows = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]):
+        self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self.rows += len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetShard:
+    def __init__(self, path: str, columns: Tuple[Tuple[str, str], ...]):
+        self.path = path
+        self.rows = 0
+        self._names = [name for name, _ in columns]
+        self._schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows: List[Dict[str, Any]]):
+        # One row group per chunk
+        table = pa.Table.from_pydict({name: [row[name] for row in rows] for name in self._names}, schema=self._schema)
+        self._writer.write_table(table)
+        self.rows += len(rows)
+
+    def close(self):
+        self._writer.close()
+
+
+SHARD_WRITERS = {"jsonl": JsonlShard, "parquet": ParquetShard}
+
+
+class CorpusExporter:
+    def __init__(self, db, out_dir: str, formats: Iterable[str] = ("jsonl",), chunk_size: int = 5000):
+        """Export from a Database into out_dir in the given formats"""
+        self.db = db
+        self.out_dir = out_dir
+        self.formats = tuple(formats)
+        self.chunk_size = chunk_size
+
+        unknown = set(self.formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export format(s): {', '.join(sorted(unknown))}")
+        if "parquet" in self.formats and pa is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install -r requirements.txt)")
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.out_dir, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"watermarks": {}, "exports": []}
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _upper_bounds(self, conn) -> Dict[str, Dict[str, int]]:
+        """Highest ids present now; a run exports up to these so the next run starts there"""
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0), COALESCE(MAX(revision), 0) FROM language_training")
+        training_id, revision = cursor.fetchone()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM training_validations")
+        validation_id = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM translations")
+        translation_id = cursor.fetchone()[0]
+        return {
+            "training": {"training_id": training_id, "validation_id": validation_id, "revision": revision},
+            "translations": {"id": translation_id},
+        }
+
+    def _query(self, dataset: str, since: Dict[str, int], until: Dict[str, int]) -> Tuple[str, tuple]:
+        if dataset == "training":
+            # New verified rows, plus older ones edited, verified or re-voted since the last run
+            return """
+                SELECT lt.id, lt.language, lt.phrase, lt.translation, lt.context, lt.category,
+                       lt.difficulty, lt.formality,
+                       COALESCE(v.correct_votes, 0) AS correct_votes,
+                       COALESCE(v.total_votes, 0) AS total_votes,
+                       lt.submitted_at
+                FROM language_training lt
+                LEFT JOIN (
+                    SELECT training_id,
+                           SUM(status = 'correct') AS correct_votes,
+                           COUNT(*) AS total_votes,
+                           MAX(id) AS last_validation_id
+                    FROM training_validations
+                    WHERE id <= ?
+                    GROUP BY training_id
+                ) v ON v.training_id = lt.id
+                WHERE lt.validation_status = 'verified'
+                  AND lt.id <= ?
+                  AND (lt.id > ? OR v.last_validation_id > ? OR lt.revision > ?)
+                ORDER BY lt.id
+            """, (
+                until["validation_id"], until["training_id"],
+                since.get("training_id", 0), since.get("validation_id", 0), since.get("revision", 0)
+            )
+        return """
+            SELECT id, source_text, source_language, target_text, target_language, created_at
+            FROM translations
+            WHERE id > ? AND id <= ?
+            ORDER BY id
+        """, (since.get("id", 0), until["id"])
+
+    def _export_dataset(self, conn, dataset: str, run_id: str, since: Dict[str, int],
+                        until: Dict[str, int]) -> List[Dict[str, Any]]:
+        columns = DATASET_COLUMNS[dataset]
+        shard_column = SHARD_COLUMNS[dataset]
+        shards = {}
+
+        def shard_for(shard: str, fmt: str):
+            if (shard, fmt) not in shards:
+                directory = os.path.join(self.out_dir, dataset, shard)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{run_id}.{fmt}.partial")
+                shards[(shard, fmt)] = SHARD_WRITERS[fmt](path, columns)
+            return shards[(shard, fmt)]
+
+        cursor = conn.cursor()
+        cursor.execute(*self._query(dataset, since, until))
+        try:
+            while True:
+                chunk = cursor.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                by_shard = {}
+                for row in chunk:
+                    by_shard.setdefault(_shard_name(row[shard_column]), []).append(dict(row))
+                for shard, rows in by_shard.items():
+                    for fmt in self.formats:
+                        shard_for(shard, fmt).write(rows)
+        finally:
+            for writer in shards.values():
+                writer.close()
+
+        files = []
+        for (shard, fmt), writer in sorted(shards.items()):
+            final_path = writer.path[:-len(".partial")]
+            os.replace(writer.path, final_path)
+            files.append({
+                "path": os.path.relpath(final_path, self.out_dir),
+                "dataset": dataset,
+                "language": shard,
+                "format": fmt,
+                "rows": writer.rows,
+                "bytes": os.path.getsize(final_path),
+                "sha256": file_sha256(final_path),
+            })
+        return files
+
+    def export(self, datasets: Iterable[str] = None, incremental: bool = True) -> Dict[str, Any]:
+        """Export the given datasets (all by default) and record the run in the manifest.
+
+        With incremental=False everything is exported again, but the watermark
+        still advances so the next incremental run continues from here.
+        """
+        datasets = list(datasets or DATASET_COLUMNS)
+        os.makedirs(self.out_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        # Random suffix so two runs in the same second don't share shard names
+        run_id = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{secrets.token_hex(3)}"
+
+        run = {
+            "run_id": run_id,
+            "incremental": incremental,
+            "formats": list(self.formats),
+            "datasets": {},
+            "files": [],
+        }
+        with self.db._get_db_connection() as conn:
+            until = self._upper_bounds(conn)
+            for dataset in datasets:
+                since = manifest["watermarks"].get(dataset, {}) if incremental else {}
+                files = self._export_dataset(conn, dataset, run_id, since, until[dataset])
+                run["files"].extend(files)
+                run["datasets"][dataset] = {
+                    "since": since,
+                    "watermark": until[dataset],
+                    "rows": sum(f["rows"] for f in files if f["format"] == self.formats[0]),
+                }
+
+        with open(os.path.join(self.out_dir, CHECKSUMS_NAME), "a", encoding="utf-8") as f:
+            f.writelines(f"{entry['sha256']}  {entry['path']}\n" for entry in run["files"])
+
+        # Only advance watermarks once every file is in place
+        for dataset in datasets:
+            manifest["watermarks"][dataset] = until[dataset]
+        manifest["exports"].append(run)
+        self._save_manifest(manifest)
+        return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the verified language corpus as sharded JSONL/Parquet")
+    parser.add_argument("--out", default="exports", help="Output directory (holds the manifest)")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["jsonl"], help="Output formats")
+    parser.add_argument("--dataset", nargs="+", choices=list(DATASET_COLUMNS), help="Datasets to export (default: all)")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and export everything")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per chunk")
+    args = parser.parse_args()
+
+    from utils.database import db
+
+    exporter = CorpusExporter(db, args.out, formats=args.format, chunk_size=args.chunk_size)
+    run = exporter.export(args.dataset, incremental=not args.full)
+    print(json.dumps({"run_id": run["run_id"], "datasets": run["datasets"], "files": len(run["files"])}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
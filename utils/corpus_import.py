@@ -0,0 +1,181 @@
+"""Bulk import of curated phrase lists into language_training.
+
+Reads CSV or JSONL one row at a time, validates and normalizes each row, and
+writes them in large batches through ``Database.upsert_training_entries``:
+one transaction per batch, upserting on (language, phrase) for the importing
+user. Invalid rows are skipped and reported. Run
+``python -m utils.corpus_import phrases.csv --user-id 1`` to import.
+
+Expected columns: language, phrase, translation, and optionally context,
+category, difficulty and formality.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.languages import TRAINING_CATEGORIES, DIFFICULTY_LEVELS, FORMALITY_LEVELS, resolve_language
+
+_CATEGORY_ALIASES = {key: key for key in TRAINING_CATEGORIES}
+_CATEGORY_ALIASES.update({label.lower(): key for key, label in TRAINING_CATEGORIES.items()})
+
+
+def read_rows(path: str, file_format: str = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, raw row) from a CSV or JSONL file without loading it all"""
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if file_format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, {"_error": f"invalid JSON: {e}"}
+                    continue
+                yield line_no, row if isinstance(row, dict) else {"_error": "expected a JSON object"}
+
+
+def _pick(value: Any, options: List[str], default: str) -> Optional[str]:
+    if value in (None, ""):
+        return default
+    for option in options:
+        if option.lower() == str(value).strip().lower():
+            return option
+    return None
+
+
+def validate_row(raw: Dict[str, Any], default_category: str = "daily_phrases") -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Normalize one raw row, returning (entry, None) or (None, error)"""
+    if "_error" in raw:
+        return None, raw["_error"]
+
+    # Accepts keys ("zulu"), names ("Zulu"), native names ("isiZulu") and codes ("zu-ZA", "zu")
+    language = resolve_language(raw.get("language"))
+    if not language:
+        return None, f"unknown language {raw.get('language')!r}"
+
+    phrase = str(raw.get("phrase") or "").strip()
+    translation = str(raw.get("translation") or "").strip()
+    if not phrase or not translation:
+        return None, "phrase and translation are required"
+
+    category = _CATEGORY_ALIASES.get(str(raw.get("category") or default_category).strip().lower())
+    if not category:
+        return None, f"unknown category {raw.get('category')!r}"
+
+    difficulty = _pick(raw.get("difficulty"), DIFFICULTY_LEVELS, DIFFICULTY_LEVELS[0])
+    formality = _pick(raw.get("formality"), FORMALITY_LEVELS, "Neutral")
+    if not difficulty or not formality:
+        return None, "difficulty or formality is not a known level"
+
+    return {
+        "language": language,
+        "phrase": phrase,
+        "translation": translation,
+        "context": str(raw.get("context") or "").strip() or None,
+        "category": category,
+        "difficulty": difficulty,
+        "formality": formality
+    }, None
+
+
+class BulkImporter:
+    def __init__(self, db, user_id: int, status: str = "pending", batch_size: int = 5000,
+                 default_category: str = "daily_phrases", max_errors: int = 100,
+                 progress: Callable[[Dict[str, Any]], None] = None, dry_run: bool = False):
+        """Import rows as user_id's contributions with the given validation status"""
+        self.db = db
+        self.user_id = user_id
+        self.status = status
+        self.batch_size = batch_size
+        self.default_category = default_category
+        self.max_errors = max_errors
+        self.progress = progress
+        self.dry_run = dry_run
+
+    def _flush(self, batch: Dict[Tuple[str, str], Dict[str, Any]], summary: Dict[str, Any]):
+        if not batch:
+            return
+        if self.dry_run:
+            summary["inserted"] += len(batch)
+        else:
+            result = self.db.upsert_training_entries(self.user_id, list(batch.values()), self.status)
+            summary["inserted"] += result["inserted"]
+            summary["updated"] += result["updated"]
+        batch.clear()
+        if self.progress:
+            self.progress(summary)
+
+    def import_rows(self, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Validate and upsert rows in batches, returning counts and the first errors"""
+        summary = {"read": 0, "inserted": 0, "updated": 0, "skipped": 0, "errors": [], "started_at": time.monotonic()}
+        # Keyed by the natural key so a repeated phrase in one batch keeps its last row
+        batch = {}
+
+        for line_no, raw in rows:
+            summary["read"] += 1
+            entry, error = validate_row(raw, self.default_category)
+            if error:
+                summary["skipped"] += 1
+                if len(summary["errors"]) < self.max_errors:
+                    summary["errors"].append({"line": line_no, "error": error})
+                continue
+
+            batch[(entry["language"], entry["phrase"])] = entry
+            if len(batch) >= self.batch_size:
+                self._flush(batch, summary)
+
+        self._flush(batch, summary)
+        summary["seconds"] = round(time.monotonic() - summary.pop("started_at"), 2)
+        return summary
+
+    def import_file(self, path: str, file_format: str = None) -> Dict[str, Any]:
+        return self.import_rows(read_rows(path, file_format))
+
+
+def print_progress(summary: Dict[str, Any]):
+    elapsed = max(time.monotonic() - summary["started_at"], 1e-6)
+    print(
+        f"read {summary['read']:,} rows ({summary['read'] / elapsed:,.0f}/s): "
+        f"{summary['inserted']:,} inserted, {summary['updated']:,} updated, {summary['skipped']:,} skipped"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import a CSV/JSONL phrase list into language_training")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--user-id", type=int, required=True, help="User the rows are attributed to")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="File format (default: from the extension)")
+    parser.add_argument("--status", choices=["pending", "verified"], default="pending",
+                        help="Validation status for imported rows; use verified for curated lists")
+    parser.add_argument("--category", default="daily_phrases", choices=list(TRAINING_CATEGORIES),
+                        help="Category for rows without one")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Validate without writing")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+
+    from utils.database import db
+
+    if not db.get_user_by_id(args.user_id):
+        parser.error(f"no user with id {args.user_id}")
+
+    importer = BulkImporter(
+        db, args.user_id, status=args.status, batch_size=args.batch_size,
+        default_category=args.category, progress=print_progress, dry_run=args.dry_run
+    )
+    summary = importer.import_file(args.path, args.format)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,42 @@
 """Cultural games and activities for the Ubuntu Language Explorer."""
+import hashlib
+import json
 import random
 from datetime import datetime
 from typing import List, Dict, Any, Optional
+from utils.achievements import achievement_engine
+from utils.translation_memory import normalize_text
+
+
+def content_item_id(game_type: str, language: str, item: Dict[str, Any]) -> str:
+    """Stable id for a game item, derived from its content; editing the item gives it a new id"""
+    content = {key: value for key, value in item.items() if key != "item_id"}
+    digest = hashlib.sha256(
+        json.dumps([game_type, language, content], sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{game_type}:{digest}"
+
+
+def _answer_key(game_type: str, item: Dict[str, Any]):
+    """Expected answers as (normalized, display, context), keyed by part for multi-part items"""
+    if game_type == "proverb_match":
+        return (normalize_text(item["meaning"]), item["meaning"], item.get("context", ""))
+    if game_type == "cultural_quiz":
+        answer = item["options"][item["correct"]]
+        return (normalize_text(answer), answer, item.get("explanation", ""))
+    if game_type == "story_completion":
+        return {
+            part["position"]: (normalize_text(part["correct"]), part["correct"], part.get("context", ""))
+            for part in item["missing_parts"]
+        }
+    if game_type == "word_association":
+        return {normalize_text(word): (normalize_text(meaning), meaning, "") for word, meaning in item["words"]}
+    if game_type == "memory_match":
+        return {
+            normalize_text(word): (normalize_text(translation), translation, "")
+            for pair in item["pairs"] for word, translation in pair.items()
+        }
+    return None
 
 class CulturalGames:
     def __init__(self):
@@ -1101,6 +1136,20 @@ class CulturalGames:
             }
         }
 
+        # Index every item by a content-hash id and precompute its answer key,
+        # so lookups and answer checks don't depend on list positions
+        self.items = {}
+        self.answer_keys = {}
+        for game_type, languages in self.games_data.items():
+            for language, content in languages.items():
+                for item in content:
+                    item_id = content_item_id(game_type, language, item)
+                    item["item_id"] = item_id
+                    self.items.setdefault(item_id, (game_type, language, item))
+                    answer_key = _answer_key(game_type, item)
+                    if answer_key is not None:
+                        self.answer_keys[item_id] = answer_key
+
     def get_game_content(self, game_type: str, language: str, difficulty: int = 1, stage: int = 1) -> Dict[str, Any]:
         """Get content for a specific game type, language, difficulty level, and stage."""
         if game_type not in self.games_data:
@@ -1128,6 +1177,10 @@ class CulturalGames:
             "content": filtered_content
         }
 
+    def get_items(self, game_type: str, language: str) -> List[Dict[str, Any]]:
+        """Get every item of a game type in a language, across difficulty levels and stages."""
+        return self.games_data.get(game_type, {}).get(language, [])
+
     def get_available_stages(self, game_type: str, language: str, difficulty: int = 1) -> List[int]:
         """Get available stages for a specific game type, language, and difficulty level."""
         if game_type not in self.games_data or language not in self.games_data[game_type]:
@@ -1225,50 +1278,37 @@ class CulturalGames:
             return [game for game in games if language in game["languages"]]
         return games
 
-    def check_answer(self, game_type: str, language: str, question_id: int, answer: str) -> Dict[str, Any]:
-        """Check if an answer is correct for a given game question."""
-        game_content = self.games_data.get(game_type, {}).get(language, [])
-        if not game_content or question_id >= len(game_content):
+    def get_item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """Get a game item by its id."""
+        entry = self.items.get(item_id)
+        return entry[2] if entry else None
+
+    def check_answer(self, item_id: str, answer: str, part=None) -> Dict[str, Any]:
+        """Check an answer to a game item.
+
+        Multi-part items (story blanks, word association and memory match
+        words) need the part: a story blank's position, or the word being
+        answered. Answers are compared after normalizing case, spacing and
+        surrounding punctuation.
+        """
+        answer_key = self.answer_keys.get(item_id)
+        if answer_key is None:
             return {"error": "Invalid question"}
-            
-        question = game_content[question_id]
-        is_correct = False
-        
-        if game_type == "proverb_match":
-            is_correct = answer.lower() == question["meaning"].lower()
-        elif game_type == "cultural_quiz":
-            is_correct = answer == question["options"][question["correct"]]
-        elif game_type == "story_completion":
-            for part in question["missing_parts"]:
-                if part["position"] == question_id:
-                    is_correct = answer == part["correct"]
-                    break
-        
+
+        if isinstance(answer_key, dict):
+            answer_key = answer_key.get(normalize_text(part) if isinstance(part, str) else part)
+            if answer_key is None:
+                return {"error": "Invalid question part"}
+
+        expected, display, context = answer_key
+        game_type = self.items[item_id][0]
         return {
-            "correct": is_correct,
-            "explanation": question.get("explanation", ""),
-            "context": question.get("context", "")
+            "correct": normalize_text(str(answer or "")) == expected,
+            "answer": display,
+            "explanation": context if game_type == "cultural_quiz" else "",
+            "context": "" if game_type == "cultural_quiz" else context
         }
 
     def get_achievements(self, user_progress: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get achievements based on user progress."""
-        achievements = []
-        
-        # Example achievement criteria
-        if user_progress.get("games_played", 0) >= 10:
-            achievements.append({
-                "id": "games_10",
-                "title": "Game Explorer",
-                "description": "Played 10 different games",
-                "icon": "🎮"
-            })
-            
-        if user_progress.get("proverbs_learned", 0) >= 5:
-            achievements.append({
-                "id": "proverbs_5",
-                "title": "Wisdom Seeker",
-                "description": "Learned 5 traditional proverbs",
-                "icon": "📚"
-            })
-            
-        return achievements
+        return achievement_engine.evaluate(user_progress)
@@ -0,0 +1,276 @@
+"""Static Cultural Corner content and its precomputed translations.
+
+Every proverb, tradition and festival is translated into all supported
+languages by a build step, and the results are stored next to this module in
+``culture_translations.json``. Entries are keyed by a hash of the source text
+and language, so editing a string invalidates only that entry. Rendering the
+Culture page is a dictionary read of that file. An entry that is missing (new
+or edited content, or a language not built yet) is only translated when the
+learner asks for it, and the result is saved for next time. Only exact
+translation-memory matches and provider translations are written to the
+file; other results are kept in memory so they aren't fetched again. Run
+``python -m utils.culture_content`` after changing the content and before
+deploying; ``--check`` exits non-zero while any entry is missing or stale.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TRANSLATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "culture_translations.json")
+
+# Target languages, matching TranslationService.google_codes
+TARGET_LANGUAGES = ["af", "en", "nr", "nso", "st", "ss", "ts", "tn", "ve", "xh", "zu"]
+
+CONTENT_SECTIONS = ("proverbs", "traditions", "festivals")
+
+# Cultural content for South African languages
+CULTURAL_CONTENT = {
+    'zu': {
+        'name': 'Zulu',
+        'proverbs': [
+            "Umuntu ngumuntu ngabantu - A person is a person through other people",
+            "Isandla siyageza esinye - One hand washes the other",
+            "Inkosi yinkosi ngabantu - A chief is a chief through his people"
+        ],
+        'traditions': [
+            "Reed Dance (Umkhosi woMhlanga)",
+            "Lobola (Marriage customs)",
+            "Ancestral ceremonies (Amadlozi)"
+        ],
+        'festivals': [
+            "Umkhosi Womhlanga (Reed Dance Festival)",
+            "Umkhosi wokweshwama (First Fruits Festival)",
+            "Umgcagco (Traditional Wedding)"
+        ]
+    },
+    'xh': {
+        'name': 'Xhosa',
+        'proverbs': [
+            "Umntu ngumntu ngabantu - A person is a person through others",
+            "Inkomo ingazala umniniya - The cow can give birth to its owner",
+            "Ubuntu ngumuntu ngabanye abantu - Humanity is a person through other people"
+        ],
+        'traditions': [
+            "Ulwaluko (Male initiation)",
+            "Intonjane (Female initiation)",
+            "Imbeleko (Child naming ceremony)"
+        ],
+        'festivals': [
+            "Abakwetha (Initiation ceremonies)",
+            "Umgidi (Homecoming celebration)",
+            "Umthombo (Spring festival)"
+        ]
+    },
+    'af': {
+        'name': 'Afrikaans',
+        'proverbs': [
+            "'n Boer maak 'n plan - A farmer makes a plan",
+            "Al dra 'n aap 'n goue ring, bly hy 'n lelike ding - Even if a monkey wears a gold ring, it remains an ugly thing",
+            "Die een se dood is die ander se brood - One's death is another's bread"
+        ],
+        'traditions': [
+            "Braai (Barbecue culture)",
+            "Volkspele (Folk games)",
+            "Boeremusiek (Traditional music)"
+        ],
+        'festivals': [
+            "KKNK (Klein Karoo National Arts Festival)",
+            "Aardklop Arts Festival",
+            "Innibos Arts Festival"
+        ]
+    }
+}
+
+
+def source_hash(text: str, source_language: str) -> str:
+    """Key for one content string; changes whenever the text or its language does"""
+    return hashlib.sha256(f"{source_language}\x00{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def iter_content_strings() -> Iterator[Tuple[str, str]]:
+    """Yield (source language, text) for every translatable string"""
+    for language, content in CULTURAL_CONTENT.items():
+        for section in CONTENT_SECTIONS:
+            for text in content.get(section, []):
+                yield language, text
+
+
+def is_reliable(result: Dict[str, Any]) -> bool:
+    """Whether a translate_with_score result may be stored: a provider result or an exact memory match"""
+    if result["source"] == "none":
+        return False
+    return result["source"] != "memory" or result.get("match") == "exact"
+
+
+def _write(data: Dict[str, Any], path: str):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def _read(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"entries": {}}
+
+
+class CultureTranslations:
+    def __init__(self, path: str = TRANSLATIONS_PATH):
+        """Precomputed translations, reloaded when the file changes"""
+        self.path = path
+        self._entries = {}
+        self._mtime = None
+        # Unreliable live results, kept in process only so they aren't fetched again
+        self._unsaved = {}
+        self._lock = Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    self._entries = _read(self.path)["entries"] if mtime else {}
+                except (ValueError, KeyError) as e:
+                    print(f"Error loading culture translations: {e}")
+                    self._entries = {}
+                self._mtime = mtime
+            return self._entries
+
+    def get(self, text: str, source_language: str, target_language: str) -> Optional[str]:
+        """Built (or earlier live) translation of a content string, or None; never calls a translator"""
+        if source_language == target_language:
+            return text
+        key = source_hash(text, source_language)
+        entry = self._load().get(key)
+        translation = entry["translations"].get(target_language) if entry else None
+        if translation is None:
+            with self._lock:
+                translation = self._unsaved.get((key, target_language))
+        return translation
+
+    def translate(self, text: str, source_language: str, target_language: str, translator) -> Optional[str]:
+        """Translate a string that hasn't been built, saving the result if it is reliable.
+
+        Unreliable results are kept in memory instead, so get() returns them
+        without asking the translator again. Returns None when translation
+        failed.
+        """
+        translation = self.get(text, source_language, target_language)
+        if translation is not None:
+            return translation
+        result = translator.translate_with_score(text, target_language, source_language)
+        if result["source"] == "none":
+            return None
+        if is_reliable(result):
+            self.save(text, source_language, target_language, result["text"])
+        else:
+            with self._lock:
+                self._unsaved[(source_hash(text, source_language), target_language)] = result["text"]
+        return result["text"]
+
+    def save(self, text: str, source_language: str, target_language: str, translation: str):
+        """Add one translation to the file, keeping it in memory if the file can't be written"""
+        key = source_hash(text, source_language)
+        with self._lock:
+            try:
+                data = _read(self.path)
+            except ValueError:
+                data = {"entries": {}}
+            entries = data.setdefault("entries", {})
+            entry = entries.setdefault(key, {"source_language": source_language, "text": text, "translations": {}})
+            entry["translations"][target_language] = translation
+            try:
+                _write(data, self.path)
+                self._mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                print(f"Could not save culture translation: {e}")
+            self._entries = entries
+
+
+culture_translations = CultureTranslations()
+
+
+def build_translations(translator, path: str = TRANSLATIONS_PATH, languages: List[str] = None,
+                       force: bool = False) -> Dict[str, int]:
+    """Translate new or changed strings and write them next to the content.
+
+    Translations already in the file are kept unless force is set; entries for
+    strings no longer in the content are dropped. Failed translations, and
+    fuzzy or fallback memory matches, are left out so the next build retries
+    them.
+    """
+    languages = languages or TARGET_LANGUAGES
+    existing = {} if force else _read(path).get("entries", {})
+    entries = {}
+    summary = {"strings": 0, "translated": 0, "reused": 0, "failed": 0}
+
+    for source_language, text in iter_content_strings():
+        key = source_hash(text, source_language)
+        if key in entries:
+            continue
+        summary["strings"] += 1
+        translations = dict(existing.get(key, {}).get("translations", {}))
+        for target in languages:
+            if target == source_language:
+                continue
+            if target in translations:
+                summary["reused"] += 1
+                continue
+            result = translator.translate_with_score(text, target, source_language)
+            if not is_reliable(result):
+                summary["failed"] += 1
+                continue
+            translations[target] = result["text"]
+            summary["translated"] += 1
+        entries[key] = {"source_language": source_language, "text": text, "translations": translations}
+
+    _write({"languages": languages, "entries": entries}, path)
+    return summary
+
+
+def missing_translations(path: str = TRANSLATIONS_PATH, languages: List[str] = None) -> List[Dict[str, Any]]:
+    """Content strings whose translations are missing from the built file"""
+    languages = languages or TARGET_LANGUAGES
+    entries = _read(path).get("entries", {})
+    missing = []
+    for source_language, text in iter_content_strings():
+        built = entries.get(source_hash(text, source_language), {}).get("translations", {})
+        targets = [lang for lang in languages if lang != source_language and lang not in built]
+        if targets:
+            missing.append({"text": text, "source_language": source_language, "languages": targets})
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute translations of the Cultural Corner content")
+    parser.add_argument("--force", action="store_true", help="Retranslate every string")
+    parser.add_argument("--check", action="store_true", help="Only report missing or stale translations")
+    parser.add_argument("--language", nargs="+", choices=TARGET_LANGUAGES, help="Target languages (default: all)")
+    args = parser.parse_args()
+
+    if args.check:
+        missing = missing_translations(languages=args.language)
+        for item in missing:
+            print(f"[{item['source_language']}] {item['text']}: {', '.join(item['languages'])}")
+        print(f"{len(missing)} string(s) need translating")
+        sys.exit(1 if missing else 0)
+
+    from utils.translation import TranslationService
+
+    summary = build_translations(TranslationService(), languages=args.language, force=args.force)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
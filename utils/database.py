@@ -1,14 +1,61 @@
 import sqlite3
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime
 import json
+import time
+from collections import OrderedDict
+from itertools import count
 from contextlib import contextmanager
+from threading import Lock
+from utils.blob_store import blob_store
+from utils import instrumentation
+from utils.records import (
+    Achievement, LearningProgress, Post, SavedResource, TrainingEntry, TrainingEntryWithAuthor,
+    Translation, User, UserCredentials, UserStats
+)
+
+# Daily challenge targets, keyed by ledger activity type
+DAILY_CHALLENGE_TARGETS = {
+    'translation': 10,
+    'learning': 5,
+    'speaking': 3,
+    'cultural': 2
+}
+
+# Seconds a cached progress summary stays valid
+PROGRESS_CACHE_TTL = 60
+
+# Maximum number of users kept in the in-memory user cache
+USER_CACHE_SIZE = 1024
+
+# State shared by every Database instance on the same file, so a write through
+# one instance invalidates what another has cached
+_shared_state = {}
+_shared_state_lock = Lock()
+# Source of per-user write versions; next() on it is atomic
+_write_sequence = count(1)
+
+
+def _shared(db_path: str, name: str, factory):
+    with _shared_state_lock:
+        key = (os.path.abspath(db_path), name)
+        if key not in _shared_state:
+            _shared_state[key] = factory()
+        return _shared_state[key]
+
 
 class Database:
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ubuntu_language.db')
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv('DATABASE_PATH') or os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), 'data', 'ubuntu_language.db'
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._progress_cache = _shared(self.db_path, 'progress_cache', dict)
+        # Per-user write versions, so per-user caches elsewhere can tell they are stale
+        self._user_versions = _shared(self.db_path, 'user_versions', dict)
+        self._user_cache = _shared(self.db_path, 'user_cache', OrderedDict)
+        self._user_cache_lock = _shared(self.db_path, 'user_cache_lock', Lock)
         self._init_db()
     
     def _init_db(self):
@@ -41,6 +88,8 @@ class Database:
                     last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_learning_progress_resource
+                    ON learning_progress (user_id, resource_type, resource_id);
                 
                 CREATE TABLE IF NOT EXISTS achievements (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -130,9 +179,14 @@ class Database:
                     validation_status TEXT DEFAULT 'pending',
                     validation_count INTEGER DEFAULT 0,
                     submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    revision INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 );
                 
+                -- Natural key lookups for bulk imports
+                CREATE INDEX IF NOT EXISTS idx_language_training_language_phrase
+                    ON language_training (language, phrase, user_id);
+                
                 CREATE TABLE IF NOT EXISTS training_validations (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     training_id INTEGER NOT NULL,
@@ -174,6 +228,17 @@ class Database:
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 );
                 
+                CREATE TABLE IF NOT EXISTS training_ai_scores (
+                    training_id INTEGER PRIMARY KEY,
+                    accuracy REAL NOT NULL,
+                    cultural_relevance REAL NOT NULL,
+                    feedback TEXT,
+                    suggestions TEXT,
+                    cultural_notes TEXT,
+                    scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (training_id) REFERENCES language_training(id)
+                );
+                
                 CREATE TABLE IF NOT EXISTS user_stats (
                     user_id INTEGER PRIMARY KEY,
                     contributions INTEGER DEFAULT 0,
@@ -183,12 +248,170 @@ class Database:
                     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users(id)
                 );
+                
+                CREATE TABLE IF NOT EXISTS revoked_tokens (
+                    jti TEXT PRIMARY KEY,
+                    expires_at TIMESTAMP NOT NULL
+                );
+                
+                -- Append-only XP and activity ledger
+                CREATE TABLE IF NOT EXISTS activity_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    activity_type TEXT NOT NULL,
+                    xp INTEGER NOT NULL DEFAULT 0,
+                    amount INTEGER NOT NULL DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_activity_ledger_user_created
+                    ON activity_ledger (user_id, created_at);
+                
+                -- Running per-user totals maintained from the ledger
+                CREATE TABLE IF NOT EXISTS user_totals (
+                    user_id INTEGER PRIMARY KEY,
+                    total_xp INTEGER NOT NULL DEFAULT 0,
+                    activity_count INTEGER NOT NULL DEFAULT 0,
+                    last_activity_at TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(id)
+                );
+                
+                CREATE TRIGGER IF NOT EXISTS trg_activity_ledger_totals
+                AFTER INSERT ON activity_ledger
+                BEGIN
+                    INSERT INTO user_totals (user_id, total_xp, activity_count, last_activity_at)
+                    VALUES (NEW.user_id, NEW.xp, 1, NEW.created_at)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        total_xp = total_xp + excluded.total_xp,
+                        activity_count = activity_count + 1,
+                        last_activity_at = MAX(COALESCE(last_activity_at, ''), excluded.last_activity_at);
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_activity_ledger_no_update
+                BEFORE UPDATE ON activity_ledger
+                BEGIN
+                    SELECT RAISE(ABORT, 'activity_ledger is append-only');
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_activity_ledger_no_delete
+                BEFORE DELETE ON activity_ledger
+                BEGIN
+                    SELECT RAISE(ABORT, 'activity_ledger is append-only');
+                END;
+                
+                -- Adaptive games: item difficulty and learner ability on one logit scale
+                CREATE TABLE IF NOT EXISTS item_stats (
+                    item_id TEXT PRIMARY KEY,
+                    game_type TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    prior REAL NOT NULL,
+                    difficulty REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    correct INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_item_stats_pool
+                    ON item_stats (game_type, language, difficulty);
+                
+                CREATE TABLE IF NOT EXISTS user_ability (
+                    user_id INTEGER NOT NULL,
+                    language TEXT NOT NULL,
+                    ability REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, language),
+                    FOREIGN KEY (user_id) REFERENCES users(id)
+                );
+                
+                -- Graded game answers, written in batches by utils.answer_log
+                CREATE TABLE IF NOT EXISTS answer_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    item_id TEXT NOT NULL,
+                    game_type TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    correct INTEGER NOT NULL,
+                    latency_ms INTEGER,
+                    answer_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users(id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_answer_events_item_created
+                    ON answer_events (item_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_answer_events_user
+                    ON answer_events (user_id);
+                
+                -- Version of the last refit, so app processes notice it and reload their pools
+                CREATE TABLE IF NOT EXISTS difficulty_fit (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL DEFAULT 0,
+                    fitted_at TIMESTAMP
+                );
+                
+                -- Per-item daily answer totals, kept up to date by each batch
+                CREATE TABLE IF NOT EXISTS item_answer_daily (
+                    item_id TEXT NOT NULL,
+                    day DATE NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    correct INTEGER NOT NULL DEFAULT 0,
+                    timed_attempts INTEGER NOT NULL DEFAULT 0,
+                    latency_ms_total INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (item_id, day)
+                );
+            """)
+            
+            # user_stats is declared twice above; older databases only have the
+            # first set of columns, so add the training ones if missing
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(user_stats)")}
+            for column, definition in (
+                ('contributions', 'INTEGER DEFAULT 0'),
+                ('validations', 'INTEGER DEFAULT 0'),
+                ('suggestions', 'INTEGER DEFAULT 0'),
+                ('accuracy_score', 'REAL DEFAULT 0'),
+            ):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE user_stats ADD COLUMN {column} {definition}")
+            
+            # Every edit to a contribution takes the next revision, so the corpus
+            # export can pick up rows that changed after they were exported
+            if 'revision' not in {row['name'] for row in conn.execute("PRAGMA table_info(language_training)")}:
+                conn.execute("ALTER TABLE language_training ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_language_training_revision
+                    ON language_training (revision);
+                
+                CREATE TRIGGER IF NOT EXISTS trg_language_training_revision
+                AFTER UPDATE OF phrase, translation, context, category, difficulty, formality, validation_status
+                ON language_training
+                BEGIN
+                    UPDATE language_training
+                    SET revision = (SELECT COALESCE(MAX(revision), 0) + 1 FROM language_training)
+                    WHERE id = NEW.id;
+                END;
             """)
+            
+            # Each achievement is awarded once per user; older databases may hold
+            # duplicates, so drop them once before the unique index is created
+            if not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_user_achievements_user_title'"
+            ).fetchone():
+                conn.execute("""
+                    DELETE FROM user_achievements
+                    WHERE id NOT IN (SELECT MIN(id) FROM user_achievements GROUP BY user_id, title)
+                """)
+                conn.execute("""
+                    CREATE UNIQUE INDEX idx_user_achievements_user_title
+                        ON user_achievements (user_id, title)
+                """)
+            
+            conn.commit()
 
     @contextmanager
     def _get_db_connection(self):
         """Create a new database connection for thread-safe operations"""
         conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        instrumentation.attach(conn)
         try:
             yield conn
         finally:
@@ -218,24 +441,15 @@ class Database:
                 'error': 'Email already exists'
             }
 
-    def get_user(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email"""
+    def get_user(self, email: str) -> Optional[UserCredentials]:
+        """Get user by email, including the password hash"""
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, email, password_hash, created_at
+            cursor.execute(f'''
+                SELECT {UserCredentials.columns()}
                 FROM users WHERE email = ?
             ''', (email,))
-            user = cursor.fetchone()
-            
-            if user:
-                return {
-                    'id': user[0],
-                    'email': user[1],
-                    'password_hash': user[2],
-                    'created_at': user[3]
-                }
-            return None
+            return UserCredentials.from_row(cursor.fetchone())
 
     def update_user(self, user_id: int, **kwargs) -> Dict[str, Any]:
         """Update user information"""
@@ -265,6 +479,8 @@ class Database:
                     WHERE id = ?
                 ''', values)
                 
+                conn.commit()
+                self.invalidate_user(user_id)
                 if cursor.rowcount > 0:
                     return {'success': True}
                 return {'success': False, 'error': 'User not found'}
@@ -273,6 +489,13 @@ class Database:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def update_password_hash(self, user_id: int, password_hash: str):
+        """Replace a user's password hash, e.g. after a bcrypt cost change"""
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+            conn.commit()
+
     def save_resource(self, user_id: int, resource_type: str, resource_id: str) -> dict:
         """Save a learning resource for a user."""
         try:
@@ -287,59 +510,54 @@ class Database:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_saved_resources(self, user_id: int) -> list:
+    def get_saved_resources(self, user_id: int) -> List[SavedResource]:
         """Get all saved resources for a user."""
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM saved_resources WHERE user_id = ? ORDER BY created_at DESC",
+                    f"SELECT {SavedResource.columns()} FROM saved_resources WHERE user_id = ? ORDER BY created_at DESC",
                     (user_id,)
                 )
-                resources = cursor.fetchall()
-                return [dict(resource) for resource in resources]
+                return [SavedResource.from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting saved resources: {e}")
             return []
 
-    def update_learning_progress(self, user_id: int, resource_type: str, resource_id: str, progress: float, completed: bool = False) -> dict:
+    def update_learning_progress(self, user_id: int, resource_type: str, resource_id: str, progress: float, completed: bool = False, language: str = '') -> dict:
         """Update learning progress for a user."""
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO learning_progress (user_id, resource_type, resource_id, progress, completed)
-                    VALUES (?, ?, ?, ?, ?)
+                    INSERT INTO learning_progress (user_id, language, resource_type, resource_id, progress, completed)
+                    VALUES (?, ?, ?, ?, ?, ?)
                     ON CONFLICT (user_id, resource_type, resource_id)
                     DO UPDATE SET progress = ?, completed = ?, last_accessed = CURRENT_TIMESTAMP
-                """, (user_id, resource_type, resource_id, progress, completed, progress, completed))
+                """, (user_id, language, resource_type, resource_id, progress, completed, progress, completed))
                 conn.commit()
-                return {"success": True}
+            self._touch_user(user_id)
+            return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_learning_progress(self, user_id: int) -> List[Dict[str, Any]]:
+    def get_learning_progress(self, user_id: int) -> List[LearningProgress]:
         """Get user's learning progress."""
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT language, resource_type, progress, completed, last_accessed
+            cursor.execute(f"""
+                SELECT {LearningProgress.columns()}
                 FROM learning_progress
                 WHERE user_id = ?
                 ORDER BY last_accessed DESC
             """, (user_id,))
-            results = cursor.fetchall()
             
-            return [
-                {
-                    'language': row[0],
-                    'resource_type': row[1],
-                    'progress': row[2],
-                    'completed': bool(row[3]),
-                    'last_accessed': row[4]
-                }
-                for row in results
-            ]
+            records = []
+            for row in cursor.fetchall():
+                record = LearningProgress.from_row(row)
+                record.completed = bool(record.completed)
+                records.append(record)
+            return records
 
     def save_translation(self, source_text: str, source_language: str, target_text: str, target_language: str):
         """Save a translation to the database"""
@@ -351,27 +569,17 @@ class Database:
             ''', (source_text, source_language, target_text, target_language))
             conn.commit()
 
-    def get_recent_translations(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_recent_translations(self, limit: int = 10) -> List[Translation]:
         """Get recent translations"""
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT source_text, source_language, target_text, target_language, created_at
+            cursor.execute(f'''
+                SELECT {Translation.columns()}
                 FROM translations
                 ORDER BY created_at DESC
                 LIMIT ?
             ''', (limit,))
-            
-            translations = []
-            for row in cursor.fetchall():
-                translations.append({
-                    'source_text': row[0],
-                    'source_language': row[1],
-                    'target_text': row[2],
-                    'target_language': row[3],
-                    'created_at': row[4]
-                })
-            return translations
+            return [Translation.from_row(row) for row in cursor.fetchall()]
 
     def set_user_preferences(self, user_id: int, preferred_language: str = None, 
                            learning_languages: List[str] = None, settings: Dict[str, Any] = None):
@@ -424,47 +632,12 @@ class Database:
             row = cursor.fetchone()
             if row:
                 return {
-                    'preferred_language': row[0],
-                    'learning_languages': json.loads(row[1]) if row[1] else [],
-                    'settings': json.loads(row[2]) if row[2] else {}
+                    'preferred_language': row['preferred_language'],
+                    'learning_languages': json.loads(row['learning_languages']) if row['learning_languages'] else [],
+                    'settings': json.loads(row['settings']) if row['settings'] else {}
                 }
             return None
 
-    def sign_in(self, email: str, password: str) -> Dict[str, Any]:
-        """Sign in a user with email and password"""
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-            user = cursor.fetchone()
-            
-            if user:
-                # Get column names
-                columns = [description[0] for description in cursor.description]
-                user_dict = dict(zip(columns, user))
-                
-                # Update last login time
-                cursor.execute(
-                    'UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?',
-                    (user_dict['id'],)
-                )
-                
-                # Parse metadata if it exists
-                try:
-                    metadata = json.loads(user_dict.get('metadata', '{}'))
-                except:
-                    metadata = {}
-                
-                return {
-                    'success': True,
-                    'user': {
-                        'id': user_dict['id'],
-                        'email': user_dict['email'],
-                        'password_hash': user_dict['password_hash'],
-                        'metadata': metadata
-                    }
-                }
-            return {'success': False, 'error': 'User not found'}
-
     def sign_up(self, email: str, password: str, metadata: dict = None) -> Dict[str, Any]:
         """Create a new user account"""
         try:
@@ -499,17 +672,16 @@ class Database:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_forum_posts(self, forum: str) -> list:
+    def get_forum_posts(self, forum: str) -> List[Post]:
         """Get all posts for a specific forum."""
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM posts WHERE forum = ? ORDER BY created_at DESC",
+                    f"SELECT {Post.columns()} FROM posts WHERE forum = ? ORDER BY created_at DESC",
                     (forum,)
                 )
-                posts = cursor.fetchall()
-                return [dict(post) for post in posts]
+                return [Post.from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting forum posts: {e}")
             return []
@@ -528,20 +700,59 @@ class Database:
             print(f"Error getting user post count: {e}")
             return 0
 
-    def get_user_by_id(self, user_id: int) -> dict:
-        """Get user by ID."""
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID, served from a bounded in-memory cache when possible."""
+        with self._user_cache_lock:
+            if user_id in self._user_cache:
+                self._user_cache.move_to_end(user_id)
+                return User(**self._user_cache[user_id])
+        
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT * FROM users WHERE id = ?",
+                    f"SELECT {User.columns()} FROM users WHERE id = ?",
                     (user_id,)
                 )
-                user = cursor.fetchone()
-                return dict(user) if user else None
+                user = User.from_row(cursor.fetchone())
         except Exception as e:
             print(f"Error getting user by ID: {e}")
             return None
+        
+        if not user:
+            return None
+        
+        with self._user_cache_lock:
+            # Cache plain values so callers can't mutate the cached copy
+            self._user_cache[user_id] = user.to_dict()
+            if len(self._user_cache) > USER_CACHE_SIZE:
+                self._user_cache.popitem(last=False)
+        return user
+
+    def invalidate_user(self, user_id: int):
+        """Drop a user from the in-memory cache after it changes"""
+        with self._user_cache_lock:
+            self._user_cache.pop(user_id, None)
+
+    def revoke_token(self, jti: str, expires_at: str):
+        """Add a session token id to the revocation list"""
+        with self._get_db_connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                (jti, expires_at)
+            )
+            # Expired tokens fail verification anyway, so prune them here
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at < CURRENT_TIMESTAMP")
+            conn.commit()
+
+    def get_revoked_tokens(self) -> Dict[str, str]:
+        """Get revoked session token ids that have not expired yet"""
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT jti, expires_at FROM revoked_tokens WHERE expires_at >= CURRENT_TIMESTAMP"
+            )
+            return dict(cursor.fetchall())
 
     def save_conversation_state(self, user_id, language, topic, context, messages):
         """Save or update conversation state"""
@@ -607,19 +818,31 @@ class Database:
                     
                     # Get all messages for this conversation
                     cursor.execute("""
-                        SELECT role, content, audio_url 
+                        SELECT id, role, content, audio_url 
                         FROM conversation_messages 
                         WHERE conversation_id = ?
                         ORDER BY created_at ASC
                     """, (conversation_id,))
                     
                     messages = []
-                    for role, content, audio_url in cursor.fetchall():
+                    migrated = []
+                    for message_id, role, content, audio_url in cursor.fetchall():
                         message = {"role": role, "content": content}
+                        if isinstance(audio_url, bytes):
+                            # Older rows stored raw audio; move it to the blob store once
+                            audio_url = blob_store.put(audio_url)
+                            migrated.append((audio_url, message_id))
                         if audio_url:
                             message["audio"] = audio_url
                         messages.append(message)
                     
+                    if migrated:
+                        cursor.executemany(
+                            "UPDATE conversation_messages SET audio_url = ? WHERE id = ?",
+                            migrated,
+                        )
+                        conn.commit()
+                    
                     return {
                         "context": context,
                         "messages": messages
@@ -629,46 +852,16 @@ class Database:
             print(f"Error loading conversation: {str(e)}")
             return None
 
-    def get_user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user's learning statistics."""
+    def get_user_stats(self, user_id: int) -> Optional[UserStats]:
+        """Get user's learning and training statistics."""
         with self._get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT stories_read, lessons_completed, practice_sessions
+            cursor.execute(f"""
+                SELECT {UserStats.columns()}
                 FROM user_stats
                 WHERE user_id = ?
             """, (user_id,))
-            result = cursor.fetchone()
-            
-            if result:
-                return {
-                    'stories_read': result[0],
-                    'lessons_completed': result[1],
-                    'practice_sessions': result[2]
-                }
-            return None
-
-    def get_achievements(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get user's achievements."""
-        with self._get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT title, description, earned_date, progress
-                FROM achievements
-                WHERE user_id = ?
-                ORDER BY earned_date DESC
-            """, (user_id,))
-            results = cursor.fetchall()
-            
-            return [
-                {
-                    'title': row[0],
-                    'description': row[1],
-                    'earned_date': row[2],
-                    'progress': row[3]
-                }
-                for row in results
-            ]
+            return UserStats.from_row(cursor.fetchone())
 
     def get_user_settings(self, user_id: int) -> Dict[str, Any]:
         """Get user settings."""
@@ -690,9 +883,9 @@ class Database:
                 }
             
             return {
-                'preferred_language': result[0] or 'Zulu',
-                'email_notifications': bool(result[1]),
-                'progress_reminders': bool(result[2])
+                'preferred_language': result['preferred_language'] or 'Zulu',
+                'email_notifications': bool(result['email_notifications']),
+                'progress_reminders': bool(result['progress_reminders'])
             }
 
     def update_user_settings(self, user_id: int, settings: Dict[str, Any]) -> bool:
@@ -764,7 +957,7 @@ class Database:
                 
                 # Get current stats
                 cursor.execute("""
-                    SELECT * FROM user_stats WHERE user_id = ?
+                    SELECT user_id FROM user_stats WHERE user_id = ?
                 """, (user_id,))
                 stats = cursor.fetchone()
                 
@@ -825,9 +1018,9 @@ class Database:
                 stats = cursor.fetchone()
                 
                 return {
-                    "trends": trends,
-                    "categories": categories,
-                    "stats": stats
+                    "trends": [dict(row) for row in trends],
+                    "categories": [dict(row) for row in categories],
+                    "stats": dict(stats)
                 }
         except Exception as e:
             print(f"Error getting training analytics: {e}")
@@ -856,11 +1049,191 @@ class Database:
                 else:
                     cursor.execute(query + " GROUP BY u.id ORDER BY contributions DESC")
                 
-                return cursor.fetchall()
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting leaderboard: {e}")
             return []
 
+    def add_training_entry(self, user_id: int, language: str, phrase: str, translation: str, context: str,
+                           category: str, difficulty: str, formality: str) -> dict:
+        """Submit a phrase and its translation for community validation"""
+        try:
+            with self._get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO language_training (
+                        user_id, language, phrase, translation, context, category, difficulty, formality
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, language, phrase, translation, context, category, difficulty, formality))
+                conn.commit()
+                return {"success": True, "training_id": cursor.lastrowid}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def upsert_training_entries(self, user_id: int, entries: List[Dict[str, Any]], status: str = 'pending') -> dict:
+        """Insert or update a batch of a user's training entries in one transaction.
+
+        Entries are matched on (language, phrase) among the user's own rows, so
+        re-importing a list updates it in place without touching other users'
+        contributions. Rows that are already verified or rejected keep their
+        status unless the import changes their translation, which puts them
+        back to the import's status ('pending' unless the list is curated).
+        Unchanged rows aren't rewritten. Returns the number of rows inserted
+        and updated.
+        """
+        params = [
+            {
+                'user_id': user_id,
+                'language': entry['language'],
+                'phrase': entry['phrase'],
+                'translation': entry['translation'],
+                'context': entry.get('context'),
+                'category': entry['category'],
+                'difficulty': entry['difficulty'],
+                'formality': entry['formality'],
+                'status': status
+            }
+            for entry in entries
+        ]
+        with self._get_db_connection() as conn:
+            try:
+                before = conn.total_changes
+                conn.executemany("""
+                    UPDATE language_training
+                    SET translation = :translation, context = :context, category = :category,
+                        difficulty = :difficulty, formality = :formality,
+                        validation_status = CASE WHEN validation_status = 'pending'
+                                                      OR translation IS NOT :translation
+                                                 THEN :status ELSE validation_status END
+                    WHERE language = :language AND phrase = :phrase AND user_id = :user_id
+                      AND (translation IS NOT :translation OR context IS NOT :context
+                           OR category IS NOT :category OR difficulty IS NOT :difficulty
+                           OR formality IS NOT :formality
+                           OR (validation_status = 'pending' AND validation_status IS NOT :status))
+                """, params)
+                updated = conn.total_changes - before
+                
+                before = conn.total_changes
+                conn.executemany("""
+                    INSERT INTO language_training (
+                        user_id, language, phrase, translation, context, category, difficulty, formality,
+                        validation_status
+                    )
+                    SELECT :user_id, :language, :phrase, :translation, :context, :category, :difficulty,
+                           :formality, :status
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM language_training
+                        WHERE language = :language AND phrase = :phrase AND user_id = :user_id
+                    )
+                """, params)
+                inserted = conn.total_changes - before
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return {"inserted": inserted, "updated": updated}
+
+    def get_training_history(self, user_id: int, language: str = None, categories: List[str] = None,
+                             statuses: List[str] = None, limit: int = 10) -> List[TrainingEntryWithAuthor]:
+        """Get a user's most recent training entries with the contributor's email"""
+        query = f"""
+            SELECT {TrainingEntry.columns('lt')}, u.email AS user_email
+            FROM language_training lt
+            JOIN users u ON u.id = lt.user_id
+            WHERE lt.user_id = ?
+        """
+        params = [user_id]
+        if language:
+            query += " AND lt.language = ?"
+            params.append(language)
+        if categories:
+            query += " AND lt.category IN (%s)" % ','.join('?' for _ in categories)
+            params.extend(categories)
+        if statuses:
+            query += " AND lt.validation_status IN (%s)" % ','.join('?' for _ in statuses)
+            params.extend(statuses)
+        query += " ORDER BY lt.submitted_at DESC LIMIT ?"
+        params.append(limit)
+        
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [TrainingEntryWithAuthor.from_row(row) for row in cursor.fetchall()]
+
+    def iter_parallel_corpus(self) -> Iterator[Dict[str, Any]]:
+        """Stream (source, target) text pairs from verified contributions and the translations log.
+
+        Contributions are English phrases with a translation in the row's
+        language, and come first so they take precedence over logged translations.
+        """
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT 'english' AS source_language, language AS target_language,
+                       phrase AS source_text, translation AS target_text, 'contribution' AS origin
+                FROM language_training
+                WHERE validation_status = 'verified'
+                ORDER BY id
+            """)
+            for row in cursor:
+                yield dict(row)
+            cursor.execute("""
+                SELECT source_language, target_language, source_text, target_text, 'translation' AS origin
+                FROM translations
+                ORDER BY id
+            """)
+            for row in cursor:
+                yield dict(row)
+
+    def get_pending_training(self, language: str = None, limit: int = None) -> List[TrainingEntry]:
+        """Get pending training entries that have not been scored by the AI yet"""
+        query = """
+            SELECT lt.id, lt.language, lt.phrase, lt.translation, lt.context
+            FROM language_training lt
+            LEFT JOIN training_ai_scores s ON s.training_id = lt.id
+            WHERE lt.validation_status = 'pending' AND s.training_id IS NULL
+        """
+        params = []
+        if language:
+            query += " AND lt.language = ?"
+            params.append(language)
+        query += " ORDER BY lt.id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [TrainingEntry.from_row(row) for row in cursor.fetchall()]
+
+    def save_training_ai_scores(self, scores: List[Dict[str, Any]]) -> dict:
+        """Store AI scores for a batch of training entries"""
+        try:
+            with self._get_db_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO training_ai_scores (
+                        training_id, accuracy, cultural_relevance, feedback, suggestions, cultural_notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(training_id) DO UPDATE SET
+                        accuracy = excluded.accuracy,
+                        cultural_relevance = excluded.cultural_relevance,
+                        feedback = excluded.feedback,
+                        suggestions = excluded.suggestions,
+                        cultural_notes = excluded.cultural_notes,
+                        scored_at = CURRENT_TIMESTAMP
+                """, [
+                    (
+                        score['training_id'], score['accuracy'], score['cultural_relevance'],
+                        score.get('feedback'), score.get('suggestions'), score.get('cultural_notes')
+                    )
+                    for score in scores
+                ])
+                conn.commit()
+                return {"success": True, "saved": len(scores)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     def add_training_suggestion(self, training_id: int, user_id: int, suggestion: str) -> dict:
         """Add a suggestion for improving a training entry"""
         try:
@@ -889,20 +1262,315 @@ class Database:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_achievements(self, user_id: int) -> list:
+    def get_achievements(self, user_id: int) -> List[Achievement]:
         """Get user's achievements"""
         try:
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT * FROM user_achievements
+                cursor.execute(f"""
+                    SELECT {Achievement.columns()} FROM user_achievements
                     WHERE user_id = ?
                     ORDER BY earned_at DESC
                 """, (user_id,))
-                return cursor.fetchall()
+                return [Achievement.from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting achievements: {e}")
             return []
 
+    def award_achievement(self, user_id: int, title: str, description: str) -> Optional[bool]:
+        """Award an achievement, returning False if the user already has it and None on error"""
+        try:
+            with self._get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT OR IGNORE INTO user_achievements (user_id, title, description)
+                    VALUES (?, ?, ?)
+                """, (user_id, title, description))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error awarding achievement: {e}")
+            return None
+
+    def get_achievement_titles(self, user_id: int) -> set:
+        """Get the titles of all achievements a user has earned"""
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT title FROM user_achievements WHERE user_id = ?",
+                (user_id,)
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def record_activity(self, user_id: int, activity_type: str, xp: int = 0, amount: int = 1) -> dict:
+        """Append an activity event to the XP ledger"""
+        try:
+            with self._get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO activity_ledger (user_id, activity_type, xp, amount)
+                    VALUES (?, ?, ?, ?)
+                """, (user_id, activity_type, xp, amount))
+                conn.commit()
+            self._touch_user(user_id)
+            return {"success": True, "event_id": cursor.lastrowid}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def _touch_user(self, user_id: int):
+        """Invalidate per-user caches after a write"""
+        self._progress_cache.pop(user_id, None)
+        self._user_versions[user_id] = next(_write_sequence)
+
+    def user_version(self, user_id: int) -> int:
+        """Version that changes whenever this process writes the user's activity or progress"""
+        return self._user_versions.get(user_id, 0)
+
+    def get_user_activity_rows(self, user_id: int) -> List[tuple]:
+        """Everything a user has done, as (source, kind, language, score, amount, xp, day) rows.
+
+        source is 'activity' (XP ledger), 'progress' (learning progress) or
+        'answer' (graded game answers); kind is the activity, resource or game
+        type. score is 1 for ledger events, the progress fraction, or whether
+        the answer was correct; amount is challenge progress, completion, or 1.
+        """
+        with self._get_db_connection() as conn:
+            cursor = conn.execute("""
+                SELECT 'activity', activity_type, '', 1.0, amount, xp, DATE(created_at)
+                FROM activity_ledger WHERE user_id = ?
+                UNION ALL
+                SELECT 'progress', resource_type, language, progress, completed, 0, DATE(last_accessed)
+                FROM learning_progress WHERE user_id = ?
+                UNION ALL
+                SELECT 'answer', game_type, language, correct, 1, 0, DATE(created_at)
+                FROM answer_events WHERE user_id = ?
+            """, (user_id, user_id, user_id))
+            return [tuple(row) for row in cursor]
+
+    def update_user_xp(self, user_id: int, xp: int, activity_type: str = 'xp') -> dict:
+        """Award XP to a user"""
+        return self.record_activity(user_id, activity_type, xp=xp, amount=0)
+
+    def update_daily_challenge_progress(self, user_id: int, challenge_type: str, progress: int = 1) -> dict:
+        """Record progress towards one of today's challenges"""
+        return self.record_activity(user_id, challenge_type, amount=progress)
+
+    def get_progress_summary(self, user_id: int) -> Dict[str, Any]:
+        """Get XP, level, streak and today's challenge progress for a user.
+
+        Totals come from user_totals; the streak and daily counts are computed
+        over the ledger by date, so they reset at midnight (UTC) without any
+        scheduled job. Results are cached until the next write or the TTL.
+        """
+        cached = self._progress_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        with self._get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT total_xp, last_activity_at FROM user_totals WHERE user_id = ?
+            """, (user_id,))
+            totals = cursor.fetchone()
+
+            # Gaps-and-islands: consecutive days share the same day - row_number
+            cursor.execute("""
+                WITH days AS (
+                    SELECT DISTINCT DATE(created_at) AS day
+                    FROM activity_ledger
+                    WHERE user_id = ?
+                ),
+                islands AS (
+                    SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS grp
+                    FROM days
+                )
+                SELECT CASE WHEN MAX(day) >= DATE('now', '-1 day') THEN COUNT(*) ELSE 0 END
+                FROM islands
+                GROUP BY grp
+                ORDER BY MAX(day) DESC
+                LIMIT 1
+            """, (user_id,))
+            streak = cursor.fetchone()
+
+            cursor.execute("""
+                SELECT activity_type, SUM(amount)
+                FROM activity_ledger
+                WHERE user_id = ? AND created_at >= DATE('now')
+                GROUP BY activity_type
+            """, (user_id,))
+            today = dict(cursor.fetchall())
+
+        total_xp = totals[0] if totals else 0
+        summary = {
+            'xp': total_xp,
+            'level': 1 + total_xp // 100,
+            'daily_streak': streak[0] if streak else 0,
+            'last_activity_at': totals[1] if totals else None,
+            'daily_challenges': {
+                challenge: {'target': target, 'current': today.get(challenge, 0) or 0}
+                for challenge, target in DAILY_CHALLENGE_TARGETS.items()
+            }
+        }
+        self._progress_cache[user_id] = (time.monotonic() + PROGRESS_CACHE_TTL, summary)
+        return summary
+
+    def register_items(self, items: List[Dict[str, Any]]) -> int:
+        """Add game items to item_stats at their prior difficulty, keeping existing estimates"""
+        with self._get_db_connection() as conn:
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO item_stats (item_id, game_type, language, prior, difficulty)
+                VALUES (:item_id, :game_type, :language, :prior, :prior)
+            """, items)
+            conn.commit()
+            return cursor.rowcount
+
+    def get_item_difficulties(self, game_type: str, language: str) -> Dict[str, float]:
+        """Current difficulty of every item in a game and language"""
+        with self._get_db_connection() as conn:
+            cursor = conn.execute("""
+                SELECT item_id, difficulty FROM item_stats
+                WHERE game_type = ? AND language = ?
+                ORDER BY difficulty
+            """, (game_type, language))
+            return {row['item_id']: row['difficulty'] for row in cursor}
+
+    def get_item_stats(self, item_id: str) -> Optional[Dict[str, Any]]:
+        with self._get_db_connection() as conn:
+            row = conn.execute("""
+                SELECT item_id, game_type, language, prior, difficulty, attempts, correct, updated_at
+                FROM item_stats WHERE item_id = ?
+            """, (item_id,)).fetchone()
+            return dict(row) if row else None
+
+    def get_user_ability(self, user_id: int, language: str) -> Dict[str, Any]:
+        """A user's ability in a language, starting at 0 before their first answer"""
+        with self._get_db_connection() as conn:
+            row = conn.execute("""
+                SELECT ability, attempts FROM user_ability WHERE user_id = ? AND language = ?
+            """, (user_id, language)).fetchone()
+            return dict(row) if row else {'ability': 0.0, 'attempts': 0}
+
+    def save_answer_batch(self, events: List[Dict[str, Any]], abilities: List[tuple], items: List[tuple]) -> dict:
+        """Write a batch of answer events with the estimates they produced, in one transaction.
+
+        abilities holds (change, answers, user_id, language) and items holds
+        (change, answers, correct, item_id). answers and correct are counts
+        within the batch, and each change is added to the stored estimate, so a
+        refit written in the meantime is built on rather than overwritten.
+        """
+        daily = {}
+        for event in events:
+            totals = daily.setdefault((event['item_id'], event['created_at'][:10]), [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += event['correct']
+            if event.get('latency_ms') is not None:
+                totals[2] += 1
+                totals[3] += event['latency_ms']
+        try:
+            with self._get_db_connection() as conn:
+                conn.executemany("""
+                    INSERT INTO answer_events
+                        (user_id, item_id, game_type, language, correct, latency_ms, answer_hash, created_at)
+                    VALUES (:user_id, :item_id, :game_type, :language, :correct, :latency_ms, :answer_hash, :created_at)
+                """, events)
+                conn.executemany("""
+                    INSERT INTO item_answer_daily (item_id, day, attempts, correct, timed_attempts, latency_ms_total)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(item_id, day) DO UPDATE SET
+                        attempts = attempts + excluded.attempts,
+                        correct = correct + excluded.correct,
+                        timed_attempts = timed_attempts + excluded.timed_attempts,
+                        latency_ms_total = latency_ms_total + excluded.latency_ms_total
+                """, [(item_id, day, *totals) for (item_id, day), totals in daily.items()])
+                conn.executemany("""
+                    INSERT INTO user_ability (ability, attempts, user_id, language, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id, language) DO UPDATE SET
+                        ability = ability + excluded.ability,
+                        attempts = attempts + excluded.attempts,
+                        updated_at = CURRENT_TIMESTAMP
+                """, abilities)
+                conn.executemany("""
+                    UPDATE item_stats
+                    SET difficulty = difficulty + ?, attempts = attempts + ?, correct = correct + ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE item_id = ?
+                """, items)
+                conn.commit()
+            for user_id in {event['user_id'] for event in events}:
+                self._touch_user(user_id)
+            return {"success": True, "events": len(events)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def get_item_answer_summary(self, days: int = 30, limit: int = 50) -> List[Dict[str, Any]]:
+        """Attempts, accuracy and mean latency per item over the last days, busiest first"""
+        with self._get_db_connection() as conn:
+            cursor = conn.execute("""
+                SELECT d.item_id, s.game_type, s.language, s.difficulty,
+                       SUM(d.attempts) AS attempts,
+                       1.0 * SUM(d.correct) / SUM(d.attempts) AS accuracy,
+                       1.0 * SUM(d.latency_ms_total) / NULLIF(SUM(d.timed_attempts), 0) AS mean_latency_ms
+                FROM item_answer_daily d
+                LEFT JOIN item_stats s ON s.item_id = d.item_id
+                WHERE d.day >= DATE('now', ?)
+                GROUP BY d.item_id
+                ORDER BY attempts DESC
+                LIMIT ?
+            """, (f"-{int(days)} days", limit))
+            return [dict(row) for row in cursor]
+
+    def iter_item_responses(self) -> Iterator[tuple]:
+        """(user_id, language, item_id, correct) for every logged answer to a known item"""
+        with self._get_db_connection() as conn:
+            cursor = conn.execute("""
+                SELECT a.user_id, a.language, a.item_id, a.correct
+                FROM answer_events a
+                JOIN item_stats s ON s.item_id = a.item_id
+            """)
+            for row in cursor:
+                yield tuple(row)
+
+    def get_fit_version(self) -> int:
+        """Number of refits saved so far"""
+        with self._get_db_connection() as conn:
+            row = conn.execute("SELECT version FROM difficulty_fit WHERE id = 1").fetchone()
+            return row['version'] if row else 0
+
+    def get_item_priors(self) -> Dict[str, float]:
+        with self._get_db_connection() as conn:
+            return {row['item_id']: row['prior'] for row in conn.execute("SELECT item_id, prior FROM item_stats")}
+
+    def save_item_fit(self, items: List[tuple], abilities: List[tuple]) -> dict:
+        """Replace estimates with a refit.
+
+        items holds (difficulty, attempts, correct, item_id) and abilities
+        holds (ability, attempts, user_id, language). Both are written in one
+        transaction.
+        """
+        try:
+            with self._get_db_connection() as conn:
+                conn.executemany("""
+                    UPDATE item_stats
+                    SET difficulty = ?, attempts = ?, correct = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE item_id = ?
+                """, items)
+                conn.executemany("""
+                    INSERT INTO user_ability (ability, attempts, user_id, language, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id, language) DO UPDATE SET
+                        ability = excluded.ability,
+                        attempts = excluded.attempts,
+                        updated_at = CURRENT_TIMESTAMP
+                """, abilities)
+                conn.execute("""
+                    INSERT INTO difficulty_fit (id, version, fitted_at) VALUES (1, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT(id) DO UPDATE SET version = version + 1, fitted_at = CURRENT_TIMESTAMP
+                """)
+                conn.commit()
+            return {"success": True, "items": len(items), "abilities": len(abilities)}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
 # Create a database instance
 db = Database()
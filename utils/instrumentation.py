@@ -0,0 +1,329 @@
+"""Per-rerun timing spans and SQL statement tracing.
+
+Set ``INSTRUMENTATION=1`` to enable. Pages call ``begin_rerun`` near the top
+and ``render_debug_panel`` at the end; in between, every ``Database`` method,
+translation, text-to-speech and Gemini call, and any ``span("...")`` block
+is timed. SQL statements are counted through sqlite3's trace callback. A
+statement's duration is approximate: it runs until the next statement, or
+until the enclosing Database call returns. Statements slower than
+``SLOW_QUERY_MS`` are kept as slow queries.
+
+Finished reruns are appended as JSON lines to ``INSTRUMENTATION_LOG`` when
+it is set. Aggregates are written in Prometheus text format to
+``INSTRUMENTATION_METRICS_FILE``, for the node exporter's textfile collector,
+when that is set. When disabled, none of this is installed.
+"""
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from utils import memory_profiler
+
+# Statements at least this slow are recorded as slow queries (override with SLOW_QUERY_MS)
+SLOW_QUERY_MS = 50
+# Seconds between rewrites of the metrics file
+METRICS_FILE_INTERVAL = 10
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Longest SQL text kept for a slow query
+MAX_SQL_LENGTH = 500
+
+_local = threading.local()
+
+
+# Settings are read on use so a .env loaded after import still applies
+def enabled() -> bool:
+    return os.getenv("INSTRUMENTATION", "").lower() not in ("", "0", "false", "no")
+
+
+class RerunTrace:
+    def __init__(self, page: str):
+        """Spans and SQL statements recorded during one script rerun"""
+        self.page = page
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.statements = 0
+        self.slow_queries = []
+        self._depth = 0
+        self._pending_sql = None
+        self._slow_ms = float(os.getenv("SLOW_QUERY_MS", SLOW_QUERY_MS))
+
+    def _close_statement(self, now: float):
+        if self._pending_sql is None:
+            return
+        sql, started = self._pending_sql
+        self._pending_sql = None
+        elapsed_ms = (now - started) * 1000
+        if elapsed_ms >= self._slow_ms:
+            query = {"sql": sql[:MAX_SQL_LENGTH], "ms": round(elapsed_ms, 2), "page": self.page}
+            self.slow_queries.append(query)
+            metrics.record_slow_query(query)
+
+    def on_statement(self, sql: str):
+        now = time.perf_counter()
+        self._close_statement(now)
+        self.statements += 1
+        self._pending_sql = (" ".join(sql.split()), now)
+
+    def finish(self):
+        if self.duration_ms is None:
+            now = time.perf_counter()
+            self._close_statement(now)
+            self.duration_ms = (now - self._start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page": self.page,
+            "started_at": round(self.started_at, 3),
+            "duration_ms": round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            "statements": self.statements,
+            "spans": self.spans,
+            "slow_queries": self.slow_queries,
+        }
+
+
+class Metrics:
+    def __init__(self):
+        """Process-wide aggregates across every session's reruns"""
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.reruns = {}
+        self.statements = 0
+        self.slow_queries = deque(maxlen=100)
+        self.recent = deque(maxlen=200)
+        self._metrics_written_at = 0.0
+        self._export_lock = threading.Lock()
+
+    @staticmethod
+    def _observe(table: Dict, key, seconds: float):
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+        entry["count"] += 1
+        entry["sum"] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry["buckets"][i] += 1
+                break
+
+    def record_span(self, kind: str, name: str, seconds: float):
+        with self._lock:
+            self._observe(self.spans, (kind, name), seconds)
+
+    def record_slow_query(self, query: Dict[str, Any]):
+        with self._lock:
+            self.slow_queries.append(query)
+
+    def record_rerun(self, trace: RerunTrace):
+        with self._lock:
+            self._observe(self.reruns, trace.page, trace.duration_ms / 1000)
+            self.statements += trace.statements
+            self.recent.append(trace.to_dict())
+
+    def prometheus(self) -> str:
+        """Aggregates in the Prometheus text exposition format"""
+        def histogram(metric: str, table: Dict, labels) -> List[str]:
+            lines = [f"# TYPE {metric} histogram"]
+            for key, entry in sorted(table.items()):
+                label = labels(key)
+                cumulative = 0
+                for bound, count in zip(BUCKETS, entry["buckets"]):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {entry["count"]}')
+                lines.append(f"{metric}_sum{{{label}}} {entry['sum']:.6f}")
+                lines.append(f"{metric}_count{{{label}}} {entry['count']}")
+            return lines
+
+        escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"')
+        with self._lock:
+            lines = histogram("ubuntu_span_seconds", self.spans,
+                              lambda key: f'kind="{escape(key[0])}",name="{escape(key[1])}"')
+            lines += histogram("ubuntu_rerun_seconds", self.reruns, lambda page: f'page="{escape(page)}"')
+            lines += [
+                "# TYPE ubuntu_sql_statements_total counter",
+                f"ubuntu_sql_statements_total {self.statements}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def jsonl(self) -> str:
+        """Recent reruns, one JSON object per line"""
+        with self._lock:
+            return "".join(json.dumps(trace) + "\n" for trace in self.recent)
+
+    def export(self, trace: RerunTrace):
+        """Append a finished rerun to the JSONL log and refresh the metrics file"""
+        log_path = os.getenv("INSTRUMENTATION_LOG")
+        if log_path:
+            try:
+                with open(log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_dict()) + "\n")
+            except OSError as e:
+                print(f"Error writing instrumentation log: {e}")
+
+        metrics_path = os.getenv("INSTRUMENTATION_METRICS_FILE")
+        if not metrics_path:
+            return
+        with self._export_lock:
+            if time.monotonic() - self._metrics_written_at < METRICS_FILE_INTERVAL:
+                return
+            self._metrics_written_at = time.monotonic()
+            try:
+                tmp_path = metrics_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(self.prometheus())
+                os.replace(tmp_path, metrics_path)
+            except OSError as e:
+                print(f"Error writing instrumentation metrics: {e}")
+
+
+metrics = Metrics()
+
+
+def current_trace() -> Optional[RerunTrace]:
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def span(name: str, kind: str = "section"):
+    """Time a block as part of the current rerun"""
+    if not enabled():
+        yield
+        return
+    trace = current_trace()
+    started = time.perf_counter()
+    record = {"name": name, "kind": kind, "depth": trace._depth if trace else 0}
+    if trace:
+        trace.spans.append(record)
+        trace._depth += 1
+    try:
+        yield
+    except Exception as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        now = time.perf_counter()
+        if trace:
+            trace._depth -= 1
+            if kind == "db":
+                trace._close_statement(now)
+        record["ms"] = round((now - started) * 1000, 2)
+        metrics.record_span(kind, name, now - started)
+
+
+def timed(name: str, kind: str):
+    """Decorator form of span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+        wrapper._instrumented = True
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls, kind: str, methods: List[str] = None, prefix: str = ""):
+    """Wrap a class's public methods (or the named ones) in spans, once"""
+    names = methods or [
+        name for name, value in vars(cls).items()
+        if not name.startswith("_") and inspect.isfunction(value)
+    ]
+    for name in names:
+        func = getattr(cls, name, None)
+        # Generators return before their body runs, so timing them would measure nothing
+        if func is None or getattr(func, "_instrumented", False) or inspect.isgeneratorfunction(func):
+            continue
+        setattr(cls, name, timed(prefix + name, kind)(func))
+
+
+def attach(conn):
+    """Count and time the statements run on a sqlite3 connection"""
+    if enabled():
+        conn.set_trace_callback(_on_statement)
+
+
+def _on_statement(sql: str):
+    trace = current_trace()
+    if trace:
+        trace.on_statement(sql)
+
+
+_installed = set()
+
+
+def install():
+    """Instrument the database and external service calls"""
+    if "core" not in _installed:
+        from utils.audio import AudioService
+        from utils.database import Database
+        from utils.translation import TranslationService
+
+        instrument_methods(Database, "db")
+        # Schema setup runs whenever a page builds its own Database
+        instrument_methods(Database, "db", ["_init_db"])
+        instrument_methods(TranslationService, "service", ["translate_with_score", "detect_language"])
+        instrument_methods(AudioService, "service", ["text_to_speech"])
+        _installed.add("core")
+
+    # Only pages that use Gemini import it; wrap it once one has
+    genai = sys.modules.get("google.generativeai")
+    if "gemini" not in _installed and genai is not None and hasattr(genai, "GenerativeModel"):
+        instrument_methods(genai.GenerativeModel, "service", ["generate_content"], prefix="gemini.")
+        _installed.add("gemini")
+
+
+def begin_rerun(page: str):
+    """Start timing this rerun, finishing any rerun of this thread that stopped early"""
+    memory_profiler.begin_page(page)
+    if not enabled():
+        return
+    install()
+    end_rerun()
+    _local.trace = RerunTrace(page)
+
+
+def end_rerun() -> Optional[RerunTrace]:
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.finish()
+    metrics.record_rerun(trace)
+    metrics.export(trace)
+    return trace
+
+
+def render_debug_panel():
+    """Finish the current rerun and show where its time went in the sidebar"""
+    memory_profiler.end_page()
+    if not enabled():
+        return
+    import streamlit as st
+
+    trace = end_rerun()
+    if trace is None:
+        return
+    with st.sidebar.expander("⏱️ Rerun timing"):
+        st.write(f"**{trace.duration_ms:.0f} ms**, {trace.statements} SQL statements")
+        for record in trace.spans:
+            indent = " " * record["depth"]
+            error = f" ⚠️ {record['error']}" if record.get("error") else ""
+            st.caption(f"{indent}{record['name']} ({record['kind']}): {record.get('ms', 0):.1f} ms{error}")
+        if trace.slow_queries:
+            st.write("Slow queries")
+            for query in trace.slow_queries:
+                st.code(f"-- {query['ms']:.1f} ms\n{query['sql']}", language="sql")
+        st.download_button("Prometheus metrics", metrics.prometheus(), file_name="metrics.prom",
+                           mime="text/plain", key="instrumentation_prometheus")
+        st.download_button("Recent reruns (JSONL)", metrics.jsonl(), file_name="reruns.jsonl",
+                           mime="application/jsonl", key="instrumentation_jsonl")
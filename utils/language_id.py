@@ -0,0 +1,304 @@
+"""Offline language identification from character n-gram profiles.
+
+Each language gets a naive Bayes profile: log-probabilities of hashed
+character 1-4 grams, stored as one float32 matrix. A text is scored against
+every language with a single gather-and-sum, and a batch of texts with one
+gather over all their n-grams and a segmented sum, so detection is a local
+call in well under a millisecond.
+
+Profiles are trained from the project's own phrase data (the learning
+content, game content, verified contributions) plus the seed phrases below,
+and cached to ``data/language_id.npz`` with a checksum of those texts; the
+first use in a process retrains the model when the texts have changed. Run
+``python -m utils.language_id`` to retrain by hand.
+"""
+import argparse
+import hashlib
+import os
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from utils.languages import LANGUAGES, get_short_code
+
+# The 11 official written languages, matching TranslationService.google_codes
+LANGUAGE_CODES = ("af", "en", "nr", "nso", "st", "ss", "ts", "tn", "ve", "xh", "zu")
+
+NGRAM_SIZES = (1, 2, 3, 4)
+# Number of hash buckets per profile
+NUM_FEATURES = 1 << 14
+# Additive smoothing for unseen n-grams
+SMOOTHING = 0.1
+# Scale applied to per-n-gram average log-likelihoods before the softmax
+CONFIDENCE_SCALE = 10.0
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'language_id.npz')
+
+# Everyday phrases so languages with little curriculum content still get a usable profile
+SEED_PHRASES = {
+    "af": [
+        "Goeie môre, hoe gaan dit met jou?", "Dit gaan goed dankie", "Baie dankie vir jou hulp",
+        "Ek is lief vir my familie", "Waar is die naaste winkel?", "Ons gaan more skool toe",
+        "Wat is jou naam?", "My naam is", "Totsiens, lekker dag", "Die kinders speel buite in die son",
+        "Ek praat 'n bietjie Afrikaans", "Kom ons eet saam vanaand",
+    ],
+    "en": [
+        "Good morning, how are you?", "I am fine thank you", "Thank you very much for your help",
+        "I love my family", "Where is the nearest shop?", "We are going to school tomorrow",
+        "What is your name?", "My name is", "Goodbye, have a nice day", "The children are playing outside",
+        "I am learning a new language", "Let us eat together tonight",
+    ],
+    "nr": [
+        "Lotjhani", "Unjani namhlanje?", "Ngikhona, ngiyathokoza", "Ngiyathokoza khulu ngesizo sakho",
+        "Ngithanda umndeni wami", "Ibizo lami ngu", "Ibizo lakho ngubani?", "Salakuhle", "Khamba kuhle",
+        "Abantwana badlala ngaphandle", "Sizokudla ndawonye ebusuku", "Ngifunda isiNdebele",
+    ],
+    "nso": [
+        "Thobela", "Dumela, o kae?", "Ke gona, ke a leboga", "Ke leboga kudu ka thušo ya gago",
+        "Ke rata lapa la ka", "Leina la ka ke", "Leina la gago ke mang?", "Šala gabotse", "Sepela gabotse",
+        "Bana ba raloka ka ntle", "Re tla ja mmogo bošego", "Ke ithuta Sepedi",
+    ],
+    "st": [
+        "Dumela, o phela joang?", "Ke phela hantle, ke a leboha", "Ke leboha haholo ka thuso ya hao",
+        "Ke rata lelapa la ka", "Lebitso la ka ke", "Lebitso la hao ke mang?", "Sala hantle", "Tsamaya hantle",
+        "Bana ba bapala ka ntle", "Re tla ja mmoho bosiu", "Ke ithuta Sesotho", "Ho lokile",
+    ],
+    "ss": [
+        "Sawubona", "Unjani?", "Ngikhona, ngiyabonga", "Ngiyabonga kakhulu ngelusito lwakho",
+        "Ngiyawutsandza umndeni wami", "Libito lami ngu", "Ngubani libito lakho?", "Sala kahle",
+        "Hamba kahle", "Bantfwana badlala ngaphandle", "Sitawudla sonkhe ebusuku", "Ngifundza siSwati",
+        "Emanti amnandzi", "Ngitfola lutsandvo",
+    ],
+    "ts": [
+        "Avuxeni", "Xewani", "Mi njhani?", "Ndzi kona, ndza khensa", "Ndza khensa swinene hi mpfuno wa wena",
+        "Ndzi rhandza ndyangu wa mina", "Vito ra mina i", "Vito ra wena i mani?", "Salani kahle",
+        "Fambani kahle", "Vana va tlanga ehandle", "Hi ta dya swin'we nivusiku", "Ndzi dyondza Xitsonga",
+    ],
+    "tn": [
+        "Dumela, o tsogile jang?", "Ke tsogile sentle, ke a leboga", "Ke leboga thata thuso ya gago",
+        "Ke rata lelapa la me", "Leina la me ke", "Leina la gago ke mang?", "Sala sentle", "Tsamaya sentle",
+        "Bana ba tshameka kwa ntle", "Re tla ja mmogo bosigo", "Ke ithuta Setswana", "Go siame",
+    ],
+    "ve": [
+        "Ndaa", "Aa", "Vho vuwa hani?", "Ndo vuwa zwavhudi, ndi a livhuwa", "Ndi a livhuwa nga maanda",
+        "Ndi funa muṱa wanga", "Dzina ḽanga ndi", "Dzina ḽaṋu ndi nnyi?", "Salani zwavhudi",
+        "Tshimbilani zwavhudi", "Vhana vha khou tamba nnḓa", "Ri ḓo ḽa roṱhe vhusiku", "Ndi khou guda Tshivenḓa",
+    ],
+    "xh": [
+        "Molo", "Molweni", "Unjani?", "Ndiphilile, enkosi", "Enkosi kakhulu ngoncedo lwakho",
+        "Ndiyalithanda usapho lwam", "Igama lam ngu", "Ngubani igama lakho?", "Sala kakuhle",
+        "Hamba kakuhle", "Abantwana badlala ngaphandle", "Siza kutya kunye ngokuhlwa", "Ndifunda isiXhosa",
+    ],
+    "zu": [
+        "Sawubona", "Sanibonani", "Unjani?", "Ngiyaphila, ngiyabonga", "Ngiyabonga kakhulu ngosizo lwakho",
+        "Ngiyawuthanda umndeni wami", "Igama lami ngu", "Ngubani igama lakho?", "Sala kahle",
+        "Hamba kahle", "Izingane zidlala ngaphandle", "Sizodla ndawonye ebusuku", "Ngifunda isiZulu",
+    ],
+}
+
+_SPACE_RE = re.compile(r"\s+")
+_PLACEHOLDER_RE = re.compile(r"\{[^}]*\}")
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "").lower()).strip()
+
+
+def feature_ids(text: str) -> np.ndarray:
+    """Hashed character n-gram ids of a text (with repeats)"""
+    padded = f" {normalize(text)} "
+    ids = [
+        zlib.crc32(padded[i:i + n].encode("utf-8")) % NUM_FEATURES
+        for n in NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    ]
+    return np.array(ids, dtype=np.int64)
+
+
+def collect_training_texts(db=None) -> Dict[str, List[str]]:
+    """Gather labelled texts from the seed phrases and the project's content"""
+    texts = defaultdict(list)
+
+    def add(language, *values):
+        code = language if language in LANGUAGE_CODES else get_short_code(language)
+        if code in LANGUAGE_CODES:
+            texts[code].extend(_PLACEHOLDER_RE.sub("", value) for value in values if value)
+
+    for code, phrases in SEED_PHRASES.items():
+        add(code, *phrases)
+
+    for key, info in LANGUAGES.items():
+        add(key, info["hello"], info["thank_you"], info["how_are_you"], info["native_name"])
+
+    from utils.learning_content import LearningContent
+    for language, content in LearningContent().language_data.items():
+        for phrase, meaning in content["basics"]["greetings"]:
+            add(language, phrase)
+            add("en", meaning)
+        add(language, *content["basics"]["responses"])
+        for words in content["vocabulary"].values():
+            add(language, *words)
+
+    from utils.cultural_games import CulturalGames
+    games = CulturalGames().games_data
+    for language, items in games.get("proverb_match", {}).items():
+        for item in items:
+            add(language, item.get("proverb"))
+            add("en", item.get("meaning"), item.get("context"))
+    for language, items in games.get("memory_match", {}).items():
+        for item in items:
+            for pair in item.get("pairs", []):
+                for phrase, meaning in pair.items():
+                    add(language, phrase)
+                    add("en", meaning)
+    for language, items in games.get("word_association", {}).items():
+        for item in items:
+            for phrase, meaning in item.get("words", []):
+                add(language, phrase)
+                add("en", meaning)
+    for language, items in games.get("story_completion", {}).items():
+        for item in items:
+            add(language, item.get("title"), item.get("content"))
+    for items in games.get("cultural_quiz", {}).values():
+        for item in items:
+            add("en", item.get("question"), item.get("explanation"))
+
+    if db is not None:
+        try:
+            for row in db.iter_parallel_corpus():
+                add(row["source_language"], row["source_text"])
+                add(row["target_language"], row["target_text"])
+        except Exception as e:
+            print(f"Error reading contributions for language ID: {e}")
+
+    return dict(texts)
+
+
+def texts_checksum(texts: Dict[str, List[str]], codes: Tuple[str, ...] = LANGUAGE_CODES) -> str:
+    """SHA-256 over the labelled training texts, stored with the model to tell when it is stale"""
+    digest = hashlib.sha256()
+    for code in codes:
+        for text in texts.get(code, []):
+            digest.update(f"{code}\t{text}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LanguageIdentifier:
+    def __init__(self, log_probs: np.ndarray, codes: Tuple[str, ...] = LANGUAGE_CODES, checksum: str = ""):
+        """Profiles as a (languages x features) matrix of n-gram log-probabilities"""
+        self.log_probs = log_probs.astype(np.float32)
+        self.codes = tuple(codes)
+        self.checksum = checksum
+        # Feature-major copy so a batch gathers whole rows
+        self._log_probs_t = np.ascontiguousarray(self.log_probs.T)
+
+    @classmethod
+    def train(cls, texts: Dict[str, List[str]], codes: Tuple[str, ...] = LANGUAGE_CODES) -> "LanguageIdentifier":
+        counts = np.zeros((len(codes), NUM_FEATURES), dtype=np.float64)
+        for row, code in enumerate(codes):
+            for text in texts.get(code, []):
+                np.add.at(counts[row], feature_ids(text), 1)
+        counts += SMOOTHING
+        log_probs = np.log(counts / counts.sum(axis=1, keepdims=True))
+        return cls(log_probs, codes, texts_checksum(texts, codes))
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "LanguageIdentifier":
+        with np.load(path) as data:
+            return cls(data["log_probs"], tuple(data["codes"].tolist()), str(data["checksum"]))
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, log_probs=self.log_probs, codes=np.array(self.codes), checksum=np.array(self.checksum))
+
+    def _probabilities(self, scores: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        # Average per n-gram before the softmax so long texts aren't overconfident
+        scores = CONFIDENCE_SCALE * scores / np.maximum(lengths, 1)[:, None]
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Probability of each language for one text"""
+        ids = feature_ids(text)
+        raw = self.log_probs[:, ids].sum(axis=1)[None, :]
+        probs = self._probabilities(raw, np.array([len(ids)]))[0]
+        return dict(zip(self.codes, probs.tolist()))
+
+    def detect(self, text: str) -> Tuple[str, float]:
+        """Most likely language code and its probability"""
+        scores = self.scores(text)
+        code = max(scores, key=scores.get)
+        return code, scores[code]
+
+    def detect_batch(self, texts: Iterable[str]) -> List[Tuple[str, float]]:
+        """Detect many texts with one gather over all their n-grams and a segmented sum"""
+        id_lists = [feature_ids(text) for text in texts]
+        if not id_lists:
+            return []
+        lengths = np.array([len(ids) for ids in id_lists])
+        all_ids = np.concatenate(id_lists + [np.zeros(1, dtype=np.int64)])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        raw = np.add.reduceat(self._log_probs_t[all_ids], starts, axis=0)
+        # reduceat returns the single element at the start index for empty segments
+        raw[lengths == 0] = 0
+        probs = self._probabilities(raw, lengths)
+        best = probs.argmax(axis=1)
+        return [(self.codes[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+
+_identifier = None
+_identifier_lock = Lock()
+
+
+def get_identifier(db=None) -> LanguageIdentifier:
+    """Load the cached model, retraining and saving it when it is missing or its training texts changed.
+
+    Verified contributions come from db, the shared Database by default.
+    """
+    global _identifier
+    with _identifier_lock:
+        if _identifier is None:
+            if db is None:
+                from utils.database import db
+            texts = collect_training_texts(db)
+            try:
+                identifier = LanguageIdentifier.load()
+                if identifier.checksum != texts_checksum(texts, identifier.codes):
+                    identifier = None
+            except (OSError, KeyError, ValueError):
+                identifier = None
+            if identifier is None:
+                identifier = LanguageIdentifier.train(texts)
+                try:
+                    identifier.save()
+                except OSError as e:
+                    print(f"Could not save language ID model: {e}")
+            _identifier = identifier
+        return _identifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local language identifier")
+    parser.add_argument("--no-db", action="store_true", help="Train without verified contributions")
+    parser.add_argument("--out", default=MODEL_PATH, help="Where to save the model")
+    args = parser.parse_args()
+
+    db = None
+    if not args.no_db:
+        from utils.database import db
+
+    texts = collect_training_texts(db)
+    identifier = LanguageIdentifier.train(texts)
+    identifier.save(args.out)
+    for code in LANGUAGE_CODES:
+        print(f"{code}: {len(texts.get(code, []))} texts")
+    print(f"Saved {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
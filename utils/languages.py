@@ -1,4 +1,5 @@
 """Language configuration and utilities for Ubuntu Language Explorer."""
+import unicodedata
 
 LANGUAGES = {
     "afrikaans": {
@@ -118,6 +119,38 @@ COMMON_PHRASES = {
     for lang_code, lang_info in LANGUAGES.items()
 }
 
+# Categories and levels used for community training contributions
+TRAINING_CATEGORIES = {
+    "daily_phrases": "Daily Conversations",
+    "cultural": "Cultural Expressions",
+    "idioms": "Idioms & Proverbs",
+    "formal": "Formal Language",
+    "slang": "Modern Slang",
+    "storytelling": "Traditional Stories"
+}
+DIFFICULTY_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+FORMALITY_LEVELS = ["Informal", "Neutral", "Formal"]
+
+def _alias_key(value):
+    # Lower-case and drop diacritics so "Tshivenda" matches "Tshivenḓa"
+    decomposed = unicodedata.normalize("NFKD", str(value or "").strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+# Keys, names, native names and codes ("zu-ZA" and "zu") to LANGUAGES keys
+_LANGUAGE_ALIASES = {}
+for _key, _info in LANGUAGES.items():
+    for _alias in (_key, _info["name"], _info["native_name"], _info["code"], _info["code"].split("-")[0]):
+        _LANGUAGE_ALIASES.setdefault(_alias_key(_alias), _key)
+
+def resolve_language(value):
+    """Get the LANGUAGES key for a language key, name, native name or code."""
+    return _LANGUAGE_ALIASES.get(_alias_key(value))
+
+def get_short_code(value):
+    """Get the short code (e.g. "zu") for any language identifier resolve_language accepts."""
+    key = resolve_language(value)
+    return LANGUAGES[key]["code"].split("-")[0] if key else None
+
 def get_language_code(language_name):
     """Get the language code for a given language name."""
     for code, info in LANGUAGES.items():
@@ -0,0 +1,451 @@
+"""Lesson curriculum and its precompiled per-language bundles.
+
+A bundle holds every lesson of every level for one language: the native
+text and English for each phrase, where the native text came from, a
+reference to its pre-generated audio in the blob store, and exercise
+variants. Native text comes from ``LANGUAGES`` first, then the local
+translation memory, then (when building with ``--translate``) the
+translation providers. Phrases with no translation are marked missing
+rather than shown as their key.
+
+Bundles are compact JSON files under ``data/lesson_bundles``, one per
+language, so the Learn page renders a lesson from a single load. Run
+``python -m utils.lesson_content`` after changing the curriculum or adding
+translations; ``--audio`` also generates speech, and ``--check`` exits
+non-zero while any bundle is missing or stale. A language without a current
+bundle is compiled in memory from ``LANGUAGES`` and the translation memory.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from utils.audio import AudioService
+from utils.blob_store import blob_store
+from utils.languages import LANGUAGES, get_short_code, is_sign_language, resolve_language
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "lesson_bundles")
+BUNDLE_VERSION = 2
+# Options shown in a multiple choice exercise, answer included
+CHOICE_OPTIONS = 4
+
+# Lessons for each level: phrase keys (as used in LANGUAGES) with their English
+LESSON_CONTENT = {
+    "Beginner": {
+        1: {
+            "title": "Basic Greetings",
+            "description": "Learn essential greetings and introductions.",
+            "phrases": [
+                ("hello", "Hello"),
+                ("thank_you", "Thank you"),
+                ("how_are_you", "How are you?")
+            ]
+        },
+        2: {
+            "title": "Numbers and Counting",
+            "description": "Learn to count and use basic numbers.",
+            "phrases": [
+                ("one", "One"),
+                ("two", "Two"),
+                ("three", "Three")
+            ]
+        },
+        3: {
+            "title": "Days and Time",
+            "description": "Learn days of the week and telling time.",
+            "phrases": [
+                ("today", "Today"),
+                ("tomorrow", "Tomorrow"),
+                ("yesterday", "Yesterday")
+            ]
+        },
+        4: {
+            "title": "Family Members",
+            "description": "Learn words for family relationships.",
+            "phrases": [
+                ("mother", "Mother"),
+                ("father", "Father"),
+                ("sister", "Sister")
+            ]
+        },
+        5: {
+            "title": "Basic Phrases",
+            "description": "Learn common everyday phrases.",
+            "phrases": [
+                ("please", "Please"),
+                ("goodbye", "Goodbye"),
+                ("good_morning", "Good morning")
+            ]
+        }
+    },
+    "Intermediate": {
+        1: {
+            "title": "Weather and Seasons",
+            "description": "Learn to discuss weather and seasons.",
+            "phrases": [
+                ("sunny", "Sunny"),
+                ("rainy", "Rainy"),
+                ("cold", "Cold")
+            ]
+        },
+        2: {
+            "title": "Food and Drinks",
+            "description": "Learn vocabulary for food and drinks.",
+            "phrases": [
+                ("water", "Water"),
+                ("coffee", "Coffee"),
+                ("pizza", "Pizza")
+            ]
+        },
+        3: {
+            "title": "Travel and Directions",
+            "description": "Learn to ask for directions and discuss travel.",
+            "phrases": [
+                ("where_is", "Where is..."),
+                ("how_much", "How much is this?"),
+                ("i_am_lost", "I am lost")
+            ]
+        },
+        4: {
+            "title": "Shopping and Numbers",
+            "description": "Learn to shop and count in the target language.",
+            "phrases": [
+                ("how_much_is_this", "How much is this?"),
+                ("i_want_to_buy", "I want to buy..."),
+                ("do_you_have", "Do you have...?")
+            ]
+        },
+        5: {
+            "title": "Emergency and Help",
+            "description": "Learn to ask for help and discuss emergencies.",
+            "phrases": [
+                ("help", "Help!"),
+                ("call_police", "Call the police!"),
+                ("i_need_doctor", "I need a doctor")
+            ]
+        }
+    },
+    "Advanced": {
+        1: {
+            "title": "Complex Conversations",
+            "description": "Learn to handle complex dialogues.",
+            "phrases": [
+                ("can_you_help", "Can you help me?"),
+                ("i_understand", "I understand"),
+                ("explain", "Please explain")
+            ]
+        },
+        2: {
+            "title": "Debates and Discussions",
+            "description": "Learn to engage in debates and discussions.",
+            "phrases": [
+                ("i_agree", "I agree"),
+                ("i_disagree", "I disagree"),
+                ("what_do_you_think", "What do you think?")
+            ]
+        },
+        3: {
+            "title": "Formal and Informal Language",
+            "description": "Learn to use formal and informal language.",
+            "phrases": [
+                ("hello_formal", "Hello (formal)"),
+                ("hello_informal", "Hello (informal)"),
+                ("goodbye_formal", "Goodbye (formal)")
+            ]
+        },
+        4: {
+            "title": "Idioms and Expressions",
+            "description": "Learn common idioms and expressions.",
+            "phrases": [
+                ("break_a_leg", "Break a leg!"),
+                ("call_it_a_day", "Call it a day"),
+                ("cost_an_arm_and_a_leg", "Cost an arm and a leg")
+            ]
+        },
+        5: {
+            "title": "Business and Professional",
+            "description": "Learn business and professional vocabulary.",
+            "phrases": [
+                ("meeting", "Meeting"),
+                ("presentation", "Presentation"),
+                ("deadline", "Deadline")
+            ]
+        }
+    }
+}
+
+
+def lesson_count(level: str) -> int:
+    return len(LESSON_CONTENT[level])
+
+
+def content_hash(language_key: str) -> str:
+    """Hash of everything a language's bundle is compiled from, other than the translation memory"""
+    source = json.dumps([BUNDLE_VERSION, LESSON_CONTENT, LANGUAGES[language_key]], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def bundle_path(language_key: str, bundle_dir: str = BUNDLE_DIR) -> str:
+    return os.path.join(bundle_dir, f"{get_short_code(language_key)}.json")
+
+
+def _previous_phrases(previous: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    phrases = {}
+    for lessons in (previous or {}).get("levels", {}).values():
+        for lesson in lessons.values():
+            for phrase in lesson["phrases"]:
+                phrases[phrase["key"]] = phrase
+    return phrases
+
+
+def _native_text(phrase_key: str, english: str, language_key: str, memory, translator,
+                 previous: Optional[Dict[str, Any]]) -> tuple:
+    """Native text for a phrase and where it came from, or (None, "missing")"""
+    info = LANGUAGES[language_key]
+    code = get_short_code(language_key)
+    if info.get(phrase_key):
+        return info[phrase_key], "curated"
+    if code == "en":
+        return english, "curated"
+    if is_sign_language(info["code"]):
+        return None, "missing"
+
+    # Native text becomes the answer key, so only an exact memory match will do
+    match = memory.lookup(english, code, "en", min_score=1.0) if memory is not None else None
+    if match:
+        return match["text"], "memory"
+    # Keep an earlier provider translation instead of asking again
+    if previous and previous.get("english") == english and previous["source"] not in ("curated", "memory", "missing"):
+        return previous["native"], previous["source"]
+    if translator is not None:
+        result = translator.translate_with_score(english, code, "en")
+        # A fuzzy memory match used as a fallback is a different phrase, not an answer key
+        if result["source"] != "none" and (result["source"] != "memory" or result.get("match") == "exact"):
+            return result["text"], result["source"]
+    return None, "missing"
+
+
+def _audio_ref(native: str, language_key: str, audio, previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """Blob store reference for a phrase's speech, generated only when audio is given"""
+    code = LANGUAGES[language_key]["code"]
+    if not native or is_sign_language(code):
+        return None
+    cache_key = AudioService.cache_key(native, code)
+    earlier = (previous or {}).get("audio")
+    if earlier and earlier["cache_key"] == cache_key and blob_store.exists(earlier["blob"]):
+        return earlier
+    if audio is None:
+        return None
+    content = audio.text_to_speech(native, code)
+    if not content:
+        return None
+    return {"cache_key": cache_key, "blob": blob_store.put(content)}
+
+
+def _exercises(phrases: List[Dict[str, Any]], pool: List[str], seed: str) -> List[Dict[str, Any]]:
+    """Exercise variants for a lesson's translated phrases, the same on every build"""
+    rng = random.Random(seed)
+    exercises = []
+    for phrase in phrases:
+        native = phrase["native"]
+        if native is None:
+            continue
+        exercises.append({"type": "translate", "phrase": phrase["key"], "prompt": phrase["english"], "answer": native})
+        exercises.append({"type": "recall", "phrase": phrase["key"], "prompt": native, "answer": phrase["english"]})
+        distractors = sorted({text for text in pool if text.lower() != native.lower()})
+        if distractors:
+            options = rng.sample(distractors, min(CHOICE_OPTIONS - 1, len(distractors))) + [native]
+            rng.shuffle(options)
+            exercises.append({"type": "choice", "phrase": phrase["key"], "prompt": phrase["english"],
+                              "options": options, "answer": native})
+    return exercises
+
+
+def compile_bundle(language_key: str, memory=None, translator=None, audio=None,
+                   previous: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Every lesson of every level for one language.
+
+    Translations and audio from a previous bundle are reused where the text
+    hasn't changed, so rebuilding only does new work.
+    """
+    info = LANGUAGES[language_key]
+    earlier = _previous_phrases(previous)
+    natives = {}
+    levels = {}
+    for level, lessons in LESSON_CONTENT.items():
+        levels[level] = {}
+        for number, lesson in lessons.items():
+            phrases = []
+            for phrase_key, english in lesson["phrases"]:
+                if phrase_key not in natives:
+                    natives[phrase_key] = _native_text(
+                        phrase_key, english, language_key, memory, translator, earlier.get(phrase_key)
+                    )
+                native, source = natives[phrase_key]
+                phrases.append({
+                    "key": phrase_key,
+                    "english": english,
+                    "native": native,
+                    "source": source,
+                    "audio": _audio_ref(native, language_key, audio, earlier.get(phrase_key)),
+                })
+            levels[level][str(number)] = {
+                "title": lesson["title"],
+                "description": lesson["description"],
+                "phrases": phrases,
+            }
+
+    # Distractors for multiple choice come from the whole language, so short lessons still get options
+    pool = [native for native, _ in natives.values() if native]
+    for level, lessons in levels.items():
+        for number, lesson in lessons.items():
+            lesson["exercises"] = _exercises(lesson["phrases"], pool, f"{language_key}:{level}:{number}")
+
+    return {
+        "version": BUNDLE_VERSION,
+        "language": language_key,
+        "code": info["code"],
+        "name": info["name"],
+        "content_hash": content_hash(language_key),
+        "built_at": time.time(),
+        "levels": levels,
+    }
+
+
+def _read(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"Error loading lesson bundle {path}: {e}")
+        return None
+
+
+def write_bundle(bundle: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def is_current(bundle: Optional[Dict[str, Any]], language_key: str) -> bool:
+    return bool(bundle) and bundle.get("version") == BUNDLE_VERSION and bundle.get("content_hash") == content_hash(language_key)
+
+
+class LessonBundles:
+    def __init__(self, bundle_dir: str = BUNDLE_DIR):
+        """Per-language bundles, reloaded when their file changes"""
+        self.bundle_dir = bundle_dir
+        self._bundles = {}
+        self._lock = Lock()
+
+    def get(self, language: str) -> Optional[Dict[str, Any]]:
+        """Bundle for a language key, name or code, or None for an unknown language"""
+        language_key = resolve_language(language)
+        if language_key is None:
+            return None
+        path = bundle_path(language_key, self.bundle_dir)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            cached = self._bundles.get(language_key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            bundle = _read(path) if mtime else None
+            if not is_current(bundle, language_key):
+                # No usable build; compile from what is available locally until one is written
+                from utils.translation_memory import translation_memory
+                try:
+                    memory = translation_memory.get()
+                except Exception as e:
+                    print(f"Translation memory unavailable for lesson bundle: {e}")
+                    memory = None
+                bundle = compile_bundle(language_key, memory=memory, previous=bundle)
+            self._bundles[language_key] = (mtime, bundle)
+            return bundle
+
+    def lesson(self, language: str, level: str, lesson_number: int) -> Optional[Dict[str, Any]]:
+        bundle = self.get(language)
+        if bundle is None:
+            return None
+        return bundle["levels"].get(level, {}).get(str(lesson_number))
+
+
+lesson_bundles = LessonBundles()
+
+
+def build_bundles(languages: List[str] = None, translator=None, audio=None,
+                  bundle_dir: str = BUNDLE_DIR) -> Dict[str, Dict[str, int]]:
+    """Compile and write bundles, returning how many phrases came from each source per language"""
+    from utils.translation_memory import translation_memory
+
+    memory = translation_memory.get()
+    summary = {}
+    for language_key in languages or list(LANGUAGES):
+        path = bundle_path(language_key, bundle_dir)
+        bundle = compile_bundle(language_key, memory=memory, translator=translator, audio=audio, previous=_read(path))
+        write_bundle(bundle, path)
+
+        counts = {}
+        seen = set()
+        for lessons in bundle["levels"].values():
+            for lesson in lessons.values():
+                for phrase in lesson["phrases"]:
+                    if phrase["key"] in seen:
+                        continue
+                    seen.add(phrase["key"])
+                    counts[phrase["source"]] = counts.get(phrase["source"], 0) + 1
+                    if phrase["audio"]:
+                        counts["audio"] = counts.get("audio", 0) + 1
+        summary[language_key] = counts
+    return summary
+
+
+def stale_bundles(languages: List[str] = None, bundle_dir: str = BUNDLE_DIR) -> List[Dict[str, Any]]:
+    """Languages whose bundle is missing or was built from older content"""
+    stale = []
+    for language_key in languages or list(LANGUAGES):
+        bundle = _read(bundle_path(language_key, bundle_dir))
+        if bundle is None:
+            stale.append({"language": language_key, "reason": "missing"})
+        elif not is_current(bundle, language_key):
+            stale.append({"language": language_key, "reason": "stale"})
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile per-language lesson bundles")
+    parser.add_argument("--language", nargs="+", choices=list(LANGUAGES), help="Languages to build (default: all)")
+    parser.add_argument("--translate", action="store_true", help="Ask the translation providers for phrases the memory lacks")
+    parser.add_argument("--audio", action="store_true", help="Generate speech for each phrase into the blob store")
+    parser.add_argument("--check", action="store_true", help="Only report missing, stale or incomplete bundles")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_bundles(args.language)
+        for item in stale:
+            print(f"{item['language']}: {item['reason']}")
+        print(f"{len(stale)} bundle(s) need building")
+        sys.exit(1 if stale else 0)
+
+    translator = None
+    if args.translate:
+        from utils.translation import TranslationService
+        translator = TranslationService()
+    summary = build_bundles(args.language, translator=translator, audio=AudioService() if args.audio else None)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Opt-in tracemalloc profiling of page reruns.
+
+Set ``MEMORY_PROFILE=1`` to enable. Pages that call
+``instrumentation.begin_rerun`` and ``render_debug_panel`` get a tracemalloc
+snapshot before and after each rerun. The two are diffed, and each change is
+attributed to the innermost frame in this repository's ``pages/``, ``utils/``
+or ``modules/`` code (or ``app.py``). This blames the line that asked for the
+memory, not the library that allocated it.
+
+Two diffs are kept per page. "run" is the memory a single rerun left behind.
+"since_start" is the growth since the page's first profiled rerun, and that
+is where leaks accumulate. The top lines of both are appended as JSON lines to
+``<MEMORY_PROFILE_DIR>/<page>.jsonl``. A readable copy of the latest report
+goes to ``<page>.txt``. Run ``python -m utils.memory_profiler <page>.jsonl``
+to list the lines that kept growing.
+
+tracemalloc is process-wide, so concurrent sessions show up in each other's
+diffs. Profile with a single session where possible. Tracing slows every
+allocation, so leave this off in normal operation.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Directories (and files) whose lines allocations are attributed to
+ATTRIBUTION_PATHS = tuple(
+    os.path.join(ROOT, name) for name in ("pages" + os.sep, "utils" + os.sep, "modules" + os.sep, "app.py")
+)
+
+DEFAULT_REPORT_DIR = "memory_profiles"
+# Frames kept per allocation; enough to climb out of Streamlit and library code
+DEFAULT_FRAMES = 25
+DEFAULT_TOP_N = 25
+# Profile every Nth rerun of a page; snapshots are slow on a busy process
+DEFAULT_EVERY = 1
+
+_lock = threading.Lock()
+_local = threading.local()
+_baselines = {}
+_run_counts = {}
+
+
+def enabled() -> bool:
+    # Read on each call so a .env loaded after import still applies
+    return os.getenv("MEMORY_PROFILE", "").lower() not in ("", "0", "false", "no")
+
+
+def _setting(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    # Leave out tracemalloc's own bookkeeping
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+def _attribute(traceback: tracemalloc.Traceback) -> Optional[Tuple[str, int]]:
+    """Innermost frame of the traceback that lies in this repository's code"""
+    # Tracebacks are stored oldest call first
+    for frame in reversed(traceback):
+        if frame.filename.startswith(ATTRIBUTION_PATHS):
+            return os.path.relpath(frame.filename, ROOT), frame.lineno
+    return None
+
+
+def attributed_diff(after: tracemalloc.Snapshot, before: tracemalloc.Snapshot, top_n: int) -> List[Dict[str, Any]]:
+    """Net allocation change per repository line, largest growth first"""
+    totals = {}
+    for stat in after.compare_to(before, "traceback"):
+        if not stat.size_diff and not stat.count_diff:
+            continue
+        location = _attribute(stat.traceback) or ("<other>", 0)
+        entry = totals.setdefault(location, [0, 0])
+        entry[0] += stat.size_diff
+        entry[1] += stat.count_diff
+
+    rows = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+    return [
+        {"file": file, "line": line, "size_diff": size, "count_diff": count}
+        for (file, line), (size, count) in rows[:top_n]
+    ]
+
+
+def _report_name(page: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", page).strip("_") or "page"
+
+
+def _source_line(file: str, line: int) -> str:
+    try:
+        with open(os.path.join(ROOT, file), encoding="utf-8") as f:
+            for number, text in enumerate(f, 1):
+                if number == line:
+                    return text.strip()
+    except OSError:
+        pass
+    return ""
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['page']} rerun {report['rerun']} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['created_at']))}",
+        f"traced: {report['traced_current'] / 1024:.0f} KB current, {report['traced_peak'] / 1024:.0f} KB peak",
+    ]
+    for section, title in (("run", "Left behind by this rerun"), ("since_start", "Growth since the first profiled rerun")):
+        lines += ["", title]
+        for row in report[section]:
+            source = _source_line(row["file"], row["line"]) if row["line"] else ""
+            lines.append(
+                f"  {row['size_diff'] / 1024:>+10.1f} KB {row['count_diff']:>+8} blocks  "
+                f"{row['file']}:{row['line']}  {source[:80]}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def write_report(report: Dict[str, Any], report_dir: str):
+    os.makedirs(report_dir, exist_ok=True)
+    name = _report_name(report["page"])
+    with open(os.path.join(report_dir, f"{name}.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
+    with open(os.path.join(report_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+        f.write(format_report(report))
+
+
+def begin_page(page: str):
+    """Snapshot before a page rerun when profiling is on and this rerun is sampled"""
+    _local.pending = None
+    if not enabled():
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(_setting("MEMORY_PROFILE_FRAMES", DEFAULT_FRAMES))
+
+    with _lock:
+        _run_counts[page] = _run_counts.get(page, 0) + 1
+        run = _run_counts[page]
+    if (run - 1) % max(1, _setting("MEMORY_PROFILE_EVERY", DEFAULT_EVERY)):
+        return
+    _local.pending = (page, run, _take_snapshot())
+
+
+def end_page() -> Optional[Dict[str, Any]]:
+    """Diff against the snapshot from begin_page and write the report"""
+    pending = getattr(_local, "pending", None)
+    _local.pending = None
+    if pending is None or not tracemalloc.is_tracing():
+        return None
+    page, rerun, before = pending
+    after = _take_snapshot()
+    top_n = _setting("MEMORY_PROFILE_TOP", DEFAULT_TOP_N)
+
+    with _lock:
+        baseline = _baselines.setdefault(page, after)
+    current, peak = tracemalloc.get_traced_memory()
+    report = {
+        "page": page,
+        "rerun": rerun,
+        "created_at": time.time(),
+        "traced_current": current,
+        "traced_peak": peak,
+        "run": attributed_diff(after, before, top_n),
+        "since_start": attributed_diff(after, baseline, top_n) if baseline is not after else [],
+    }
+    try:
+        write_report(report, os.getenv("MEMORY_PROFILE_DIR", DEFAULT_REPORT_DIR))
+    except OSError as e:
+        print(f"Error writing memory profile: {e}")
+    return report
+
+
+def growth_summary(path: str, top_n: int = DEFAULT_TOP_N) -> List[Dict[str, Any]]:
+    """Lines whose growth since start kept rising across the reports in a JSONL file"""
+    history = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            report = json.loads(line)
+            for row in report["since_start"]:
+                history.setdefault((row["file"], row["line"]), []).append(row["size_diff"])
+
+    rows = []
+    for (file, line), sizes in history.items():
+        rises = sum(1 for a, b in zip(sizes, sizes[1:]) if b > a)
+        rows.append({
+            "file": file,
+            "line": line,
+            "latest_size_diff": sizes[-1],
+            "reports": len(sizes),
+            # Share of consecutive reports in which the line grew; near 1 looks like a leak
+            "rising": round(rises / (len(sizes) - 1), 2) if len(sizes) > 1 else 0.0,
+        })
+    rows.sort(key=lambda row: (row["rising"], row["latest_size_diff"]), reverse=True)
+    return rows[:top_n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize memory growth from a page's profiling reports")
+    parser.add_argument("path", help="A <page>.jsonl file from MEMORY_PROFILE_DIR")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="Lines to show")
+    args = parser.parse_args()
+
+    for row in growth_summary(args.path, args.top):
+        source = _source_line(row["file"], row["line"]) if row["line"] else ""
+        print(
+            f"{row['latest_size_diff'] / 1024:>+10.1f} KB  rising {row['rising']:.0%} of {row['reports']} reports  "
+            f"{row['file']}:{row['line']}  {source[:80]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
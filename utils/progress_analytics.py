@@ -0,0 +1,175 @@
+"""Per-user learning analytics for the Home and Profile charts.
+
+Everything a user has done is read in one query: XP ledger events, learning
+progress, and graded game answers. The rows go into numpy arrays, and each
+chart's numbers come from a few vectorized ops over them:
+
+- daily activity: XP and event counts per day over a recent window
+- skill mastery: per skill, the mean score of the rows that exercise it,
+  scaled down while there is little evidence
+- completion: per language and resource type, how many resources are
+  finished and the mean progress across them
+
+Results are cached per user. The database bumps a per-user counter on every
+write, which invalidates the entry; a TTL covers writes made by other
+processes.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, List
+
+import numpy as np
+
+SKILLS = ['Grammar', 'Vocabulary', 'Pronunciation', 'Culture', 'Writing']
+
+# Skill exercised by each (source, kind) row; rows not listed count as activity only
+SKILL_SOURCES = {
+    ('activity', 'lesson'): 'Grammar',
+    ('answer', 'story_completion'): 'Grammar',
+    ('activity', 'practice'): 'Vocabulary',
+    ('activity', 'word_of_the_day'): 'Vocabulary',
+    ('answer', 'word_association'): 'Vocabulary',
+    ('answer', 'memory_match'): 'Vocabulary',
+    ('progress', 'lesson'): 'Vocabulary',
+    ('activity', 'speaking'): 'Pronunciation',
+    ('activity', 'cultural'): 'Culture',
+    ('answer', 'proverb_match'): 'Culture',
+    ('answer', 'cultural_quiz'): 'Culture',
+    ('progress', 'story'): 'Culture',
+    ('activity', 'translation'): 'Writing',
+}
+_SKILL_INDEX = {f"{source}:{kind}": SKILLS.index(skill) for (source, kind), skill in SKILL_SOURCES.items()}
+
+# Days of history kept for the activity chart
+ACTIVITY_WINDOW_DAYS = 30
+# Rows of evidence at which a skill's mastery reaches ~63% of its mean score
+MASTERY_EVIDENCE = 10
+# Seconds a cached result stays valid without a local write
+ANALYTICS_CACHE_TTL = 300
+# Maximum number of users kept in the cache
+ANALYTICS_CACHE_SIZE = 1024
+
+
+def _empty(today: np.datetime64) -> Dict[str, Any]:
+    days = today - np.arange(ACTIVITY_WINDOW_DAYS - 1, -1, -1)
+    return {
+        'days': [str(day) for day in days],
+        'daily_xp': [0] * ACTIVITY_WINDOW_DAYS,
+        'daily_events': [0] * ACTIVITY_WINDOW_DAYS,
+        'skills': {skill: 0.0 for skill in SKILLS},
+        'completion': [],
+        'languages': {},
+    }
+
+
+def compute(rows: List[tuple], today: np.datetime64) -> Dict[str, Any]:
+    """Chart data from get_user_activity_rows rows, with days relative to today"""
+    result = _empty(today)
+    if not rows:
+        return result
+
+    sources, kinds, languages, scores, amounts, xp, days = zip(*rows)
+    sources = np.array(sources)
+    kinds = np.array(kinds)
+    scores = np.array(scores, dtype=float)
+    xp = np.array(xp, dtype=np.int64)
+    days = np.array([day or str(today) for day in days], dtype='datetime64[D]')
+
+    # Daily activity: bucket rows by age in days, oldest day first
+    age = (today - days).astype(np.int64)
+    recent = (age >= 0) & (age < ACTIVITY_WINDOW_DAYS)
+    slot = ACTIVITY_WINDOW_DAYS - 1 - age[recent]
+    result['daily_xp'] = np.bincount(slot, xp[recent], ACTIVITY_WINDOW_DAYS).astype(int).tolist()
+    result['daily_events'] = np.bincount(slot, minlength=ACTIVITY_WINDOW_DAYS).tolist()
+
+    # Skill mastery: map each distinct (source, kind) to a skill once, then spread
+    pairs, pair_index = np.unique(np.char.add(np.char.add(sources, ':'), kinds), return_inverse=True)
+    pair_skill = np.array([_SKILL_INDEX.get(str(pair), -1) for pair in pairs])
+    skill = pair_skill[pair_index]
+    known = skill >= 0
+    evidence = np.bincount(skill[known], minlength=len(SKILLS))
+    totals = np.bincount(skill[known], scores[known], len(SKILLS))
+    mean = np.divide(totals, evidence, out=np.zeros(len(SKILLS)), where=evidence > 0)
+    mastery = 100 * mean * (1 - np.exp(-evidence / MASTERY_EVIDENCE))
+    result['skills'] = {name: round(float(value), 1) for name, value in zip(SKILLS, mastery)}
+
+    # Completion per language and resource type, from learning progress rows
+    progress = sources == 'progress'
+    if progress.any():
+        language = np.array(languages)[progress]
+        kind = kinds[progress]
+        completed = np.array(amounts, dtype=float)[progress] > 0
+        fraction = scores[progress]
+        groups, group_index = np.unique(np.char.add(np.char.add(language, ':'), kind), return_inverse=True)
+        items = np.bincount(group_index, minlength=len(groups))
+        done = np.bincount(group_index, completed, len(groups)).astype(int)
+        mean_progress = np.bincount(group_index, fraction, len(groups)) / items
+        result['completion'] = [
+            {
+                'language': group.split(':', 1)[0],
+                'resource_type': group.split(':', 1)[1],
+                'items': int(items[n]),
+                'completed': int(done[n]),
+                'completion': float(done[n] / items[n]),
+                'progress': float(mean_progress[n]),
+            }
+            for n, group in enumerate(groups)
+        ]
+
+        language_names, language_index = np.unique(language, return_inverse=True)
+        language_items = np.bincount(language_index, minlength=len(language_names))
+        language_done = np.bincount(language_index, completed, len(language_names))
+        result['languages'] = {
+            str(name): float(language_done[n] / language_items[n]) for n, name in enumerate(language_names)
+        }
+    return result
+
+
+class ProgressAnalytics:
+    def __init__(self, db=None):
+        """Cached per-user chart data"""
+        self._db = db
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    def summary(self, user_id: int) -> Dict[str, Any]:
+        """Daily activity, skill mastery and completion for a user.
+
+        Returns {days, daily_xp, daily_events, skills, completion, languages}:
+        days are ISO dates (UTC, oldest first) over ACTIVITY_WINDOW_DAYS,
+        skills maps each of SKILLS to a 0-100 mastery, completion is a list
+        of per language and resource type ratios, and languages maps each
+        language to its overall completion ratio.
+        """
+        today = np.datetime64(datetime.now(timezone.utc).date(), 'D')
+        key = (self.db.user_version(user_id), today)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached and cached[0] == key and cached[1] > time.monotonic():
+                self._cache.move_to_end(user_id)
+                return cached[2]
+
+        try:
+            result = compute(self.db.get_user_activity_rows(user_id), today)
+        except Exception as e:
+            print(f"Error computing progress analytics: {e}")
+            return _empty(today)
+
+        with self._lock:
+            self._cache[user_id] = (key, time.monotonic() + ANALYTICS_CACHE_TTL, result)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > ANALYTICS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+
+progress_analytics = ProgressAnalytics()
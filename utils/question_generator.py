@@ -0,0 +1,240 @@
+"""Reproducible question sampling with generated distractors.
+
+A ``QuestionGenerator`` is built once over a pool of questions. Each question
+has an id, a prompt, an answer and a category. Drawing ``k`` questions:
+
+- Walks a seeded pseudo-random permutation of the pool. This is an affine
+  map ``i -> (a * i + b) mod n`` with ``a`` coprime to ``n``, so nothing is
+  shuffled or materialized.
+- With a learner's ``SeenItems``, draws from its index of unseen positions
+  instead, so a draw costs O(k) however much of the pool has been seen.
+- Fills in multiple-choice distractors from precomputed buckets of answers in
+  the same category and of similar length.
+
+With the seed from ``daily_seed``, a learner gets the same questions all day,
+and different ones the next day.
+"""
+import hashlib
+import math
+import random
+from collections import defaultdict
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from utils.translation_memory import normalize_text
+
+# Options in a generated multiple choice question, answer included
+DEFAULT_OPTIONS = 4
+# Answers are bucketed by word count in bands this wide
+LENGTH_BAND_WORDS = 3
+
+
+def daily_seed(user_id, scope: str, day: date = None) -> int:
+    """Seed that is fixed for a user, scope and day"""
+    day = day or date.today()
+    digest = hashlib.sha256(f"{user_id}:{scope}:{day.isoformat()}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def length_band(text: str) -> int:
+    return len(str(text).split()) // LENGTH_BAND_WORDS
+
+
+class SeenItems:
+    def __init__(self, size: int, data: bytes = None):
+        """Bitset over a generator's dense item positions, with an index of the unseen ones"""
+        self.size = size
+        self.bits = bytearray(data) if data else bytearray((size + 7) // 8)
+        self._count = sum(bin(byte).count("1") for byte in self.bits)
+        # Unseen positions and where each sits in that list, built on first use
+        self._unseen = None
+        self._where = None
+
+    def add(self, position: int):
+        if position in self:
+            return
+        self.bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+        if self._unseen is not None:
+            # Swap-remove, so marking an item is O(1)
+            index = self._where.pop(position)
+            last = self._unseen.pop()
+            if last != position:
+                self._unseen[index] = last
+                self._where[last] = index
+
+    def unseen(self) -> List[int]:
+        """Positions not seen yet; kept up to date by add(), so treat it as read-only"""
+        if self._unseen is None:
+            self._unseen = [position for position in range(self.size) if position not in self]
+            self._where = {position: index for index, position in enumerate(self._unseen)}
+        return self._unseen
+
+    def __contains__(self, position: int) -> bool:
+        return bool(self.bits[position >> 3] & (1 << (position & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self._count = 0
+        self._unseen = None
+        self._where = None
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.bits)
+
+
+class QuestionGenerator:
+    def __init__(self, questions: List[Dict[str, Any]]):
+        """Index a question pool.
+
+        Positions are assigned in id order, so they (and any SeenItems over
+        them) don't depend on the order the pool was built in.
+        """
+        self.questions = sorted(questions, key=lambda question: question["id"])
+        self.positions = {question["id"]: i for i, question in enumerate(self.questions)}
+        self.version = hashlib.sha256("\x00".join(self.positions).encode("utf-8")).hexdigest()[:12]
+
+        # Distractor buckets: distinct answers per (category, length band)
+        self._buckets = defaultdict(list)
+        self._bands = defaultdict(set)
+        seen_answers = set()
+        for question in self.questions:
+            key = (question["category"], normalize_text(question["answer"]))
+            if key in seen_answers:
+                continue
+            seen_answers.add(key)
+            band = length_band(question["answer"])
+            self._buckets[(question["category"], band)].append(question["answer"])
+            self._bands[question["category"]].add(band)
+        self._bands = {category: sorted(bands) for category, bands in self._bands.items()}
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def new_seen(self) -> SeenItems:
+        return SeenItems(len(self.questions))
+
+    def _distractors(self, question: Dict[str, Any], rng: random.Random, count: int) -> List[str]:
+        """Other answers from the question's category, nearest length bands first"""
+        answer = normalize_text(question["answer"])
+        band = length_band(question["answer"])
+        bands = sorted(self._bands.get(question["category"], []), key=lambda other: (abs(other - band), other))
+        chosen = []
+        for other in bands:
+            bucket = [text for text in self._buckets[(question["category"], other)]
+                      if normalize_text(text) != answer and text not in chosen]
+            chosen += rng.sample(bucket, min(count - len(chosen), len(bucket)))
+            if len(chosen) == count:
+                break
+        return chosen
+
+    def sample(self, seed: int, k: int, seen: Optional[SeenItems] = None,
+               options: int = DEFAULT_OPTIONS) -> List[Dict[str, Any]]:
+        """Draw up to k unseen questions, marking them seen, in O(k).
+
+        The same seed and seen state always give the same questions. Without
+        a seen set the draw walks the seeded permutation; with one it picks
+        from the set's index of unseen positions, so it doesn't slow down as
+        the pool fills up. Once every question has been seen the set is
+        cleared and the pool starts over. Questions that already carry
+        options keep them; the rest get options generated.
+        """
+        n = len(self.questions)
+        if not n or k <= 0:
+            return []
+        if seen is not None and len(seen) >= n:
+            seen.clear()
+
+        rng = random.Random(seed)
+        if seen is None:
+            stride = rng.randrange(1, n) if n > 1 else 1
+            while math.gcd(stride, n) != 1:
+                stride = rng.randrange(1, n)
+            offset = rng.randrange(n)
+            positions = [(stride * step + offset) % n for step in range(min(k, n))]
+        else:
+            positions = []
+            for _ in range(min(k, n - len(seen))):
+                unseen = seen.unseen()
+                position = unseen[rng.randrange(len(unseen))]
+                seen.add(position)
+                positions.append(position)
+
+        drawn = []
+        for position in positions:
+            question = dict(self.questions[position])
+            if "options" not in question and options > 1:
+                question["options"] = self._distractors(question, rng, options - 1) + [question["answer"]]
+                rng.shuffle(question["options"])
+            drawn.append(question)
+        return drawn
+
+
+_generators = {}
+_generators_lock = Lock()
+
+
+def _cached(key, version, build) -> QuestionGenerator:
+    with _generators_lock:
+        cached = _generators.get(key)
+        if cached is None or cached[0] != version:
+            cached = _generators[key] = (version, build())
+        return cached[1]
+
+
+def lesson_generator(language_code: str) -> Optional[QuestionGenerator]:
+    """Translated lesson phrases of a language, across levels; distractors come from the same level"""
+    from utils.lesson_content import lesson_bundles
+
+    bundle = lesson_bundles.get(language_code)
+    if bundle is None:
+        return None
+
+    def build():
+        questions = {}
+        for level, lessons in bundle["levels"].items():
+            for lesson in lessons.values():
+                for phrase in lesson["phrases"]:
+                    if phrase["native"] is not None:
+                        questions.setdefault(phrase["key"], {
+                            "id": phrase["key"],
+                            "prompt": phrase["english"],
+                            "answer": phrase["native"],
+                            "category": level,
+                            "audio": phrase["audio"],
+                        })
+        return QuestionGenerator(list(questions.values()))
+
+    return _cached(("lesson", bundle["language"]), (bundle["content_hash"], bundle["built_at"]), build)
+
+
+def game_generator(games, game_type: str, language: str, difficulty: int = None,
+                   stage: int = None) -> QuestionGenerator:
+    """Questions from a CulturalGames catalog: proverbs ask for their meaning, quizzes keep their options.
+
+    difficulty and stage, when given, limit the pool to that level and stage.
+    """
+    def build():
+        questions = []
+        for item in games.get_items(game_type, language):
+            if difficulty is not None and item.get("difficulty", 1) != difficulty:
+                continue
+            if stage is not None and item.get("stage", 1) != stage:
+                continue
+            question = {"id": item["item_id"], "category": f"{game_type}:{item.get('difficulty', 1)}", "item": item}
+            if game_type == "proverb_match":
+                question.update(prompt=item["proverb"], answer=item["meaning"])
+            elif game_type == "cultural_quiz":
+                question.update(prompt=item["question"], answer=item["options"][item["correct"]],
+                                options=list(item["options"]))
+            else:
+                continue
+            questions.append(question)
+        return QuestionGenerator(questions)
+
+    # Keyed to the catalog instance, so a rebuilt catalog gets a fresh generator
+    return _cached(("game", game_type, language, difficulty, stage), id(games), build)
@@ -0,0 +1,109 @@
+"""Lightweight typed records for database rows.
+
+Each record class lists the columns it holds in ``__slots__``, so a row costs
+one small object instead of a dict. Records still support ``record['column']``
+and ``record.get('column')``, so callers written against dict rows keep working.
+"""
+import sqlite3
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class Record:
+    __slots__ = ()
+    # All columns of the record, including those declared by base classes
+    fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(klass.__dict__.get('__slots__', ()))
+        cls.fields = tuple(fields)
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def columns(cls, alias: str = None) -> str:
+        """SQL projection for the record's columns, optionally table-qualified"""
+        prefix = f"{alias}." if alias else ""
+        return ", ".join(prefix + name for name in cls.fields)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Optional["Record"]:
+        """Build a record from a sqlite3.Row; columns the query did not select stay unset"""
+        if row is None:
+            return None
+        record = cls.__new__(cls)
+        for name in row.keys():
+            if name in cls.fields:
+                setattr(record, name, row[name])
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def keys(self) -> Iterator[str]:
+        return (name for name in self.fields if hasattr(self, name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.keys()}
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.keys())
+        return f"{type(self).__name__}({values})"
+
+
+class User(Record):
+    __slots__ = ('id', 'email', 'created_at')
+
+
+class UserCredentials(User):
+    __slots__ = ('password_hash',)
+
+
+class UserStats(Record):
+    __slots__ = ('user_id', 'stories_read', 'lessons_completed', 'practice_sessions',
+                 'contributions', 'validations', 'suggestions', 'accuracy_score')
+
+
+class LearningProgress(Record):
+    __slots__ = ('language', 'resource_type', 'resource_id', 'progress', 'completed', 'last_accessed')
+
+
+class SavedResource(Record):
+    __slots__ = ('id', 'user_id', 'resource_type', 'resource_id', 'created_at')
+
+
+class Translation(Record):
+    __slots__ = ('source_text', 'source_language', 'target_text', 'target_language', 'created_at')
+
+
+class Post(Record):
+    __slots__ = ('id', 'user_id', 'forum', 'title', 'content', 'created_at')
+
+
+class Achievement(Record):
+    __slots__ = ('id', 'user_id', 'title', 'description', 'earned_at')
+
+
+class TrainingEntry(Record):
+    __slots__ = ('id', 'user_id', 'language', 'phrase', 'translation', 'context', 'category',
+                 'difficulty', 'formality', 'validation_status', 'validation_count', 'submitted_at')
+
+
+class TrainingEntryWithAuthor(TrainingEntry):
+    __slots__ = ('user_email',)
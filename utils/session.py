@@ -1,9 +1,9 @@
 import streamlit as st
 from typing import Optional, Dict, Any
 import extra_streamlit_components as stx
-import json
 from datetime import datetime, timedelta
 from utils.database import db
+from utils.tokens import session_tokens
 
 # Cookie configuration
 COOKIE_NAME = "ubuntu_language_session"
@@ -27,24 +27,24 @@ def init_session_state():
         restore_session()
 
 def restore_session():
-    """Attempt to restore user session from cookie"""
+    """Attempt to restore user session from a signed session cookie"""
     try:
         cookie_manager = get_cookie_manager()
-        session_data = cookie_manager.get(COOKIE_NAME)
+        token = cookie_manager.get(COOKIE_NAME)
         
-        if session_data:
-            session_info = json.loads(session_data)
-            
-            # Verify session is not expired
-            expiry = datetime.fromisoformat(session_info['expiry'])
-            if expiry > datetime.now():
-                # Get fresh user data from database
-                user = db.get_user_by_id(session_info['user_id'])
+        if token:
+            # Signature, expiry and revocation are checked without a database round trip
+            payload = session_tokens.verify(token)
+            if payload:
+                # Profile fields come from the shared user cache rather than the
+                # token claims, so changes show up before the token expires
+                user = db.get_user_by_id(payload['sub'])
                 if user:
-                    set_current_user(user)
+                    set_current_user(user.to_dict(), remember=False)
+                    st.session_state.session_token = token
                     return True
             
-            # If session is expired or invalid, clear it
+            # If session is expired, revoked or forged, clear it
             cookie_manager.delete(COOKIE_NAME)
     except Exception as e:
         print(f"Error restoring session: {e}")
@@ -56,34 +56,44 @@ def get_current_user() -> Optional[Dict[str, Any]]:
     init_session_state()
     return st.session_state.user
 
-def set_current_user(user: Dict[str, Any]):
+def set_current_user(user: Dict[str, Any], remember: bool = True):
     """Set the current user in session state and create session cookie"""
     st.session_state.user = user
+    st.session_state.user_id = user['id']
     st.session_state.authenticated = True
     
+    if not remember:
+        return
+    
     try:
-        # Create session data
-        session_data = {
-            'user_id': user['id'],
-            'expiry': (datetime.now() + timedelta(days=COOKIE_EXPIRY_DAYS)).isoformat()
-        }
+        # Create a signed session token carrying the claims pages need
+        token = session_tokens.issue(
+            user['id'],
+            claims={'email': user.get('email'), 'created_at': user.get('created_at')},
+            ttl=timedelta(days=COOKIE_EXPIRY_DAYS)
+        )
+        st.session_state.session_token = token
         
         # Save to cookie
         cookie_manager = get_cookie_manager()
         cookie_manager.set(
             COOKIE_NAME,
-            json.dumps(session_data),
+            token,
             expires_at=datetime.now() + timedelta(days=COOKIE_EXPIRY_DAYS)
         )
     except Exception as e:
         print(f"Error setting session cookie: {e}")
 
 def clear_current_user():
-    """Clear the current user from session state and remove session cookie"""
+    """Clear the current user from session state, revoke and remove session cookie"""
     st.session_state.user = None
+    st.session_state.user_id = None
     st.session_state.authenticated = False
     
     try:
+        token = st.session_state.pop('session_token', None)
+        if token:
+            session_tokens.revoke(token)
         cookie_manager = get_cookie_manager()
         cookie_manager.delete(COOKIE_NAME)
     except Exception as e:
@@ -0,0 +1,93 @@
+"""Session-state memory accounting for Streamlit sessions."""
+import sys
+from typing import Any, Dict, List, Mapping, Optional
+
+import streamlit as st
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate the memory held by an object and everything it references"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, Mapping):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+
+def session_state_report(state: Mapping[str, Any] = None) -> List[Dict[str, Any]]:
+    """Per-key memory usage of a session state, largest first"""
+    if state is None:
+        state = st.session_state
+    report = []
+    for key in list(state.keys()):
+        try:
+            value = state[key]
+        except KeyError:
+            continue
+        report.append({
+            'key': str(key),
+            'type': type(value).__name__,
+            'bytes': deep_sizeof(value)
+        })
+    return sorted(report, key=lambda row: row['bytes'], reverse=True)
+
+
+def all_sessions_report() -> List[Dict[str, Any]]:
+    """Total session-state memory for every session on this server.
+
+    Relies on Streamlit runtime internals, so returns an empty list when they
+    are unavailable (e.g. outside `streamlit run`).
+    """
+    try:
+        from streamlit.runtime import Runtime
+        session_infos = Runtime.instance()._session_mgr.list_sessions()
+    except Exception as e:
+        print(f"Session listing unavailable: {e}")
+        return []
+
+    report = []
+    for info in session_infos:
+        session = info.session
+        state = session.session_state.filtered_state
+        report.append({
+            'session_id': session.id,
+            'keys': len(state),
+            'bytes': sum(row['bytes'] for row in session_state_report(state))
+        })
+    return sorted(report, key=lambda row: row['bytes'], reverse=True)
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def render_session_memory_panel(top_n: int = 10):
+    """Sidebar panel showing this session's largest keys and all sessions' totals"""
+    with st.sidebar.expander("🧠 Session memory"):
+        report = session_state_report()
+        st.write(f"This session: **{format_bytes(sum(row['bytes'] for row in report))}**")
+        for row in report[:top_n]:
+            st.caption(f"{row['key']} ({row['type']}): {format_bytes(row['bytes'])}")
+
+        sessions = all_sessions_report()
+        if sessions:
+            st.write(f"All sessions ({len(sessions)}): **{format_bytes(sum(row['bytes'] for row in sessions))}**")
+            for row in sessions[:top_n]:
+                st.caption(f"{row['session_id'][:8]}: {format_bytes(row['bytes'])} in {row['keys']} keys")
@@ -0,0 +1,133 @@
+"""HMAC-signed stateless session tokens with key rotation and revocation.
+
+Tokens look like ``v1.<kid>.<payload>.<signature>`` where the payload is
+base64url JSON holding the user id, expiry, token id and a small claims set.
+Signing keys come from SESSION_SIGNING_KEYS as comma separated ``kid:secret``
+pairs; the first key signs new tokens and the rest still verify, so keys can
+be rotated without logging everyone out.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from datetime import timedelta
+from threading import Lock
+from typing import Any, Dict, Optional
+
+TOKEN_VERSION = "v1"
+# Seconds between reloads of the shared revocation list
+REVOCATION_REFRESH_SECONDS = 60
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def load_signing_keys() -> Dict[str, bytes]:
+    """Read signing keys from the environment, active key first"""
+    keys = {}
+    for entry in os.getenv("SESSION_SIGNING_KEYS", "").split(","):
+        kid, _, secret = entry.strip().partition(":")
+        if kid and secret:
+            keys[kid] = secret.encode("utf-8")
+
+    if not keys:
+        print("SESSION_SIGNING_KEYS not set; using a random per-process session key")
+        keys["ephemeral"] = secrets.token_bytes(32)
+    return keys
+
+
+class SessionTokens:
+    def __init__(self, keys: Dict[str, bytes] = None, db=None):
+        """Initialize with signing keys ordered active first"""
+        self.keys = keys or load_signing_keys()
+        self.active_kid = next(iter(self.keys))
+        self._db = db
+        self._lock = Lock()
+        self._revoked = {}
+        self._revoked_loaded_at = 0.0
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    def _sign(self, kid: str, message: str) -> str:
+        return _b64encode(hmac.new(self.keys[kid], message.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, claims: Dict[str, Any] = None, ttl: timedelta = timedelta(days=30)) -> str:
+        """Create a signed token for a user"""
+        now = int(time.time())
+        payload = {
+            "sub": user_id,
+            "iat": now,
+            "exp": now + int(ttl.total_seconds()),
+            "jti": secrets.token_urlsafe(12),
+            "claims": claims or {}
+        }
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        message = f"{TOKEN_VERSION}.{self.active_kid}.{body}"
+        return f"{message}.{self._sign(self.active_kid, message)}"
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the payload of a token with a valid signature, ignoring expiry and revocation"""
+        try:
+            version, kid, body, signature = token.split(".")
+        except (AttributeError, ValueError):
+            return None
+        if version != TOKEN_VERSION or kid not in self.keys:
+            return None
+        expected = self._sign(kid, f"{version}.{kid}.{body}")
+        if not hmac.compare_digest(signature.encode("utf-8"), expected.encode("utf-8")):
+            return None
+        try:
+            return json.loads(_b64decode(body))
+        except ValueError:
+            return None
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the payload of a valid, unexpired and unrevoked token"""
+        payload = self.decode(token)
+        if not payload or payload.get("exp", 0) <= time.time():
+            return None
+        if self.is_revoked(payload.get("jti")):
+            return None
+        return payload
+
+    def _refresh_revocations(self):
+        now = time.time()
+        if now - self._revoked_loaded_at < REVOCATION_REFRESH_SECONDS:
+            return
+        try:
+            self._revoked = self.db.get_revoked_tokens()
+        except Exception as e:
+            print(f"Error loading revoked tokens: {e}")
+        self._revoked_loaded_at = now
+
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            self._refresh_revocations()
+            return jti in self._revoked
+
+    def revoke(self, token: str) -> bool:
+        """Revoke a token (e.g. on sign out) until it would have expired anyway"""
+        payload = self.decode(token)
+        if not payload:
+            return False
+        expires_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(payload["exp"]))
+        with self._lock:
+            self._revoked[payload["jti"]] = expires_at
+        self.db.revoke_token(payload["jti"], expires_at)
+        return True
+
+
+session_tokens = SessionTokens()
@@ -1,14 +1,62 @@
 """Translation service with fallback mechanisms for South African languages."""
 import os
-from typing import Optional
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
 from googletrans import Translator
+from utils.translation_memory import translation_memory
+from utils.translation_providers import (
+    VULAVULA_BASE_URL, GoogleTransProvider, ProviderError, ProviderPool, VulaVulaProvider
+)
+from utils.language_id import get_identifier
+
+# Upstream translations kept in process so repeated phrases skip the network
+RESULT_CACHE_SIZE = 2048
+
+VULAVULA_CODES = {
+    "af": "afr_Latn",  # Afrikaans
+    "zu": "zul_Latn",  # isiZulu
+    "st": "sot_Latn",  # Sesotho
+    "ss": "ssw_Latn",  # Swati
+    "ts": "tso_Latn",  # Tsonga
+    "en": "eng_Latn",  # English
+    "xh": "xho_Latn",  # isiXhosa
+    "tn": "tsn_Latn",  # Setswana
+    "nr": "nbl_Latn",  # isiNdebele
+    "ve": "ven_Latn",  # Tshivenda
+    "nso": "nso_Latn", # Sepedi
+}
+
+_provider_pool = None
+_provider_pool_lock = Lock()
+
+
+def get_provider_pool() -> ProviderPool:
+    """Process-wide provider pool, so circuit state is shared by every page"""
+    global _provider_pool
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            # googletrans first, hedged to VulaVula when it is slow and a key is configured
+            providers = [GoogleTransProvider()]
+            api_key = os.getenv("LELAPA_API_KEY")
+            if api_key:
+                providers.append(VulaVulaProvider(
+                    api_key, VULAVULA_CODES, base_url=os.getenv("VULAVULA_BASE_URL", VULAVULA_BASE_URL)
+                ))
+            _provider_pool = ProviderPool(providers)
+            print(f"Using {', '.join(p.name for p in providers)} as translation services")
+        return _provider_pool
+
 
 class TranslationService:
-    def __init__(self):
-        """Initialize the translation service with fallback to googletrans"""
+    def __init__(self, memory=translation_memory, providers: ProviderPool = None):
+        """Initialize the translation service, checking the local translation memory before the providers"""
+        self.memory = memory
+        self.providers = providers or get_provider_pool()
         self.translator = Translator()
         self.use_fallback = True
-        print("Using googletrans as translation service")
+        self._results = OrderedDict()
+        self._results_lock = Lock()
 
         # Cultural features by language
         self.cultural_features = {
@@ -80,19 +128,7 @@ class TranslationService:
             "zu": "zu-ZA",  # Zulu
         }
         
-        self.vulavula_codes = {
-            "af": "afr_Latn",  # Afrikaans
-            "zu": "zul_Latn",  # isiZulu
-            "st": "sot_Latn",  # Sesotho
-            "ss": "ssw_Latn",  # Swati
-            "ts": "tso_Latn",  # Tsonga
-            "en": "eng_Latn",  # English
-            "xh": "xho_Latn",  # isiXhosa
-            "tn": "tsn_Latn",  # Setswana
-            "nr": "nbl_Latn",  # isiNdebele
-            "ve": "ven_Latn",  # Tshivenda
-            "nso": "nso_Latn", # Sepedi
-        }
+        self.vulavula_codes = VULAVULA_CODES
 
     def get_cultural_features(self, language_code: str) -> dict:
         """Get cultural features for a specific language."""
@@ -123,20 +159,72 @@ class TranslationService:
         features = self.cultural_features.get(code, {})
         return features.get("proverbs", [])
 
-    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
-        """Translate text to target language"""
+    def _memory_lookup(self, text: str, target_language: str, source_language: Optional[str],
+                       min_score: float = None) -> Optional[Dict[str, Any]]:
+        if self.memory is None:
+            return None
         try:
-            if source_language:
-                result = self.translator.translate(text, dest=target_language, src=source_language)
-            else:
-                result = self.translator.translate(text, dest=target_language)
-            return result.text
+            return self.memory.get().lookup(text, target_language, source_language, min_score)
         except Exception as e:
+            print(f"Translation memory error: {str(e)}")
+            return None
+
+    def translate_with_score(self, text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
+        """Translate text, returning the translation with where it came from and a match score.
+
+        An exact match among the verified contributions in the local
+        translation memory is used as is; otherwise the provider pool is
+        asked. A fuzzy memory match is only a suggestion: it comes back as
+        "suggestion" next to the provider's translation, and is used as the
+        translation only when no provider is available. Failing that the
+        original text is returned, so pages never wait on a dead upstream.
+        """
+        match = self._memory_lookup(text, target_language, source_language)
+        if match and match["match"] == "exact":
+            return {"text": match["text"], "score": match["score"], "source": "memory", "match": match["match"]}
+
+        suggestion = {"text": match["text"], "score": match["score"]} if match else None
+        key = (text, target_language, source_language)
+        with self._results_lock:
+            cached = self._results.get(key)
+            if cached:
+                self._results.move_to_end(key)
+                return dict(cached, suggestion=suggestion)
+
+        try:
+            result = self.providers.translate(text, target_language, source_language)
+        except ProviderError as e:
             print(f"Translation error: {str(e)}")
-            return text  # Return original text if translation fails
+            if match:
+                return {"text": match["text"], "score": match["score"], "source": "memory", "match": match["match"]}
+            # Return original text if translation fails
+            return {"text": text, "score": 0.0, "source": "none", "match": None}
+
+        translated = {"text": result["text"], "score": None, "source": result["provider"], "match": None}
+        with self._results_lock:
+            self._results[key] = translated
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return dict(translated, suggestion=suggestion)
+
+    def provider_health(self) -> list:
+        """Circuit state and latency metrics for each translation provider"""
+        return self.providers.health()
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        """Translate text to target language"""
+        return self.translate_with_score(text, target_language, source_language)["text"]
 
     def detect_language(self, text: str) -> str:
-        """Detect the language of the text"""
+        """Detect the language of the text with the local n-gram model, falling back to googletrans"""
+        if not text or not text.strip():
+            return "en"
+        try:
+            code, _ = get_identifier().detect(text)
+            return code
+        except Exception as e:
+            print(f"Local language detection error: {str(e)}")
+        
         try:
             result = self.translator.detect(text)
             return result.lang
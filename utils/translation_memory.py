@@ -0,0 +1,224 @@
+"""Local translation memory built from verified contributions.
+
+Pairs from ``Database.iter_parallel_corpus`` are indexed both ways per
+language pair: an exact index on normalized text, and an inverted index of
+character trigrams for fuzzy matches. Fuzzy candidates are scored with the
+Dice coefficient of their trigram sets. Lookups never touch the network, so
+the curriculum phrases that make up most traffic translate locally.
+"""
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from threading import Lock, Thread
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from utils.languages import get_short_code
+
+# Minimum Dice score for a fuzzy match to be used
+MIN_MATCH_SCORE = 0.75
+# Seconds before the memory is rebuilt from the database
+MEMORY_REFRESH_SECONDS = 300
+# Trigrams that occur in more entries than this are skipped when gathering candidates
+MAX_POSTINGS = 5000
+
+_SPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCT_RE = re.compile(r"^[\W_]+|[\W_]+$")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, collapse whitespace and drop surrounding punctuation"""
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    return _EDGE_PUNCT_RE.sub("", _SPACE_RE.sub(" ", text).strip())
+
+
+def char_ngrams(text: str, n: int = 3) -> FrozenSet[str]:
+    """Character n-grams of normalized text, padded so short words still match"""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class LanguagePairIndex:
+    __slots__ = ("exact", "sources", "targets", "grams", "postings")
+
+    def __init__(self):
+        self.exact = {}
+        self.sources = []
+        self.targets = []
+        self.grams = []
+        self.postings = defaultdict(list)
+
+    def add(self, source_text: str, target_text: str) -> bool:
+        key = normalize_text(source_text)
+        if not key or key in self.exact:
+            return False
+        entry_id = len(self.targets)
+        self.exact[key] = entry_id
+        self.sources.append(source_text)
+        self.targets.append(target_text)
+        grams = char_ngrams(key)
+        self.grams.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(entry_id)
+        return True
+
+    def lookup(self, text: str, min_score: float) -> Optional[Tuple[int, float]]:
+        key = normalize_text(text)
+        if key in self.exact:
+            return self.exact[key], 1.0
+
+        grams = char_ngrams(key)
+        overlaps = Counter()
+        for gram in grams:
+            entries = self.postings.get(gram)
+            if entries and len(entries) <= MAX_POSTINGS:
+                overlaps.update(entries)
+
+        best = None
+        for entry_id, shared in overlaps.items():
+            score = 2 * shared / (len(grams) + self.grams[entry_id])
+            if score >= min_score and (best is None or score > best[1]):
+                best = (entry_id, score)
+        return best
+
+
+class TranslationMemory:
+    def __init__(self, min_score: float = MIN_MATCH_SCORE):
+        """Empty memory; fill it with add() or load()"""
+        self.min_score = min_score
+        self._pairs = defaultdict(LanguagePairIndex)
+
+    def __len__(self) -> int:
+        return sum(len(index.targets) for index in self._pairs.values())
+
+    def add(self, source_language: str, target_language: str, source_text: str, target_text: str) -> bool:
+        """Add a pair in both directions; the first translation seen for a text wins"""
+        source, target = get_short_code(source_language), get_short_code(target_language)
+        if not source or not target or source == target or not source_text or not target_text:
+            return False
+        added = self._pairs[(source, target)].add(source_text, target_text)
+        self._pairs[(target, source)].add(target_text, source_text)
+        return added
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Add rows shaped like Database.iter_parallel_corpus output, returning how many were new"""
+        return sum(
+            self.add(row["source_language"], row["target_language"], row["source_text"], row["target_text"])
+            for row in rows
+        )
+
+    def lookup(self, text: str, target_language: str, source_language: str = None,
+               min_score: float = None) -> Optional[Dict[str, Any]]:
+        """Best match for text, or None below min_score (the memory's own by default).
+
+        Without a source language every pair into the target is searched.
+        """
+        min_score = self.min_score if min_score is None else min_score
+        target = get_short_code(target_language)
+        if source_language:
+            pairs = [(get_short_code(source_language), target)]
+        else:
+            pairs = [pair for pair in self._pairs if pair[1] == target]
+
+        best = None
+        for pair in pairs:
+            index = self._pairs.get(pair)
+            if index is None:
+                continue
+            match = index.lookup(text, min_score)
+            if match and (best is None or match[1] > best[2]):
+                best = (pair, match[0], match[1])
+                if match[1] == 1.0:
+                    break
+
+        if best is None:
+            return None
+        (source, target), entry_id, score = best
+        index = self._pairs[(source, target)]
+        return {
+            "text": index.targets[entry_id],
+            "score": round(score, 3),
+            "match": "exact" if score == 1.0 else "fuzzy",
+            "matched_source": index.sources[entry_id],
+            "source_language": source,
+            "target_language": target
+        }
+
+
+class TranslationMemoryCache:
+    def __init__(self, db=None, refresh_seconds: int = MEMORY_REFRESH_SECONDS):
+        """Memory rebuilt from the database at most every refresh_seconds.
+
+        Only the first load blocks. After that a stale memory keeps being
+        served while a single background thread builds its replacement, which
+        is swapped in when ready.
+        """
+        self._db = db
+        self.refresh_seconds = refresh_seconds
+        self._memory = None
+        self._loaded_at = 0.0
+        self._invalidated_at = 0.0
+        self._building = False
+        self._lock = Lock()
+        self._first_load_lock = Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.database import db
+            self._db = db
+        return self._db
+
+    def _build(self) -> TranslationMemory:
+        memory = TranslationMemory()
+        memory.load(self.db.iter_parallel_corpus())
+        return memory
+
+    def _refresh(self, started: float):
+        try:
+            memory = self._build()
+        except Exception as e:
+            print(f"Error loading translation memory: {e}")
+            memory = None
+        with self._lock:
+            # On failure keep the old memory until the next refresh is due
+            if memory is not None:
+                self._memory = memory
+            self._loaded_at = started
+            self._building = False
+
+    def get(self) -> TranslationMemory:
+        with self._lock:
+            if self._memory is not None:
+                now = time.monotonic()
+                stale = now - self._loaded_at > self.refresh_seconds or self._loaded_at < self._invalidated_at
+                if stale and not self._building:
+                    self._building = True
+                    Thread(target=self._refresh, args=(now,), name="translation-memory", daemon=True).start()
+                return self._memory
+
+        # Nothing to serve yet: one caller builds, the rest wait for it
+        with self._first_load_lock:
+            with self._lock:
+                if self._memory is not None:
+                    return self._memory
+            started = time.monotonic()
+            try:
+                memory = self._build()
+            except Exception as e:
+                print(f"Error loading translation memory: {e}")
+                memory = TranslationMemory()
+            with self._lock:
+                self._memory = memory
+                self._loaded_at = started
+            return memory
+
+    def invalidate(self):
+        """Rebuild in the background on the next get, serving the current memory meanwhile"""
+        with self._lock:
+            self._invalidated_at = time.monotonic()
+
+
+translation_memory = TranslationMemoryCache()
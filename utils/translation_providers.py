@@ -0,0 +1,343 @@
+"""Translation backends behind per-provider timeouts, circuit breakers and hedging.
+
+A ``ProviderPool`` sends each request to the first healthy provider and, if
+it hasn't answered within ``hedge_after`` seconds, also to the next one,
+returning whichever succeeds first. Providers that keep failing or timing out
+have their circuit opened and are skipped until a cool-down passes, so a
+degraded upstream costs a page at most one timeout instead of one per call.
+
+``python -m benchmarks.fake_vulavula`` runs a local stand-in for the VulaVula
+API, with an optional delay and failure rate, to exercise this without the
+network.
+"""
+import asyncio
+import json
+import os
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional
+
+# Seconds each provider gets before the call counts as a timeout
+DEFAULT_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "4"))
+# Seconds to wait on the first provider before hedging to the next
+DEFAULT_HEDGE_AFTER = float(os.getenv("TRANSLATION_HEDGE_AFTER", "0.8"))
+# Consecutive failures that open a circuit, and seconds it stays open
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30
+# Calls allowed in flight per provider; hung calls beyond this fail fast
+MAX_IN_FLIGHT = 4
+
+VULAVULA_BASE_URL = "https://vulavula-services.lelapa.ai/api/v1"
+
+
+class ProviderError(Exception):
+    """A translation provider failed or is unavailable"""
+
+
+class CircuitOpenError(ProviderError):
+    """No provider is currently accepting requests"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        """Closed until failure_threshold consecutive failures, then open for reset_timeout seconds"""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through; half-open circuits let one trial call in"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ProviderHealth:
+    def __init__(self, window: int = 200):
+        """Counters and a rolling window of recent latencies"""
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=window)
+        self._lock = Lock()
+
+    def record(self, outcome: str, latency: float = None, error: str = None):
+        with self._lock:
+            if outcome == "rejected":
+                self.rejected += 1
+                return
+            self.calls += 1
+            if outcome == "success":
+                self.successes += 1
+                self.latencies.append(latency)
+            else:
+                self.failures += 1
+                self.timeouts += outcome == "timeout"
+                self.last_error = error
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        percentile = lambda p: round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "success_rate": round(self.successes / self.calls, 3) if self.calls else None,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "last_error": self.last_error
+        }
+
+
+class TranslationProvider:
+    name = "provider"
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.breaker = CircuitBreaker()
+        self.health = ProviderHealth()
+        self.in_flight = 0
+
+    def supports(self, target_language: str, source_language: Optional[str]) -> bool:
+        return True
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        """Return the translation or raise; called on a worker thread"""
+        raise NotImplementedError
+
+
+class GoogleTransProvider(TranslationProvider):
+    name = "googletrans"
+
+    def __init__(self, translator=None, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        if translator is None:
+            from googletrans import Translator
+            translator = Translator(timeout=timeout)
+        self.translator = translator
+        self._loop = None
+        self._loop_lock = Lock()
+
+    def _run(self, coroutine):
+        """Run a coroutine on this provider's event loop thread.
+
+        googletrans 4.x keeps one httpx.AsyncClient per Translator, and that
+        client only works on the loop it was first used on, so every call
+        goes through the same long-lived loop rather than a new asyncio.run.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                Thread(target=self._loop.run_forever, name="googletrans-loop", daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"googletrans timed out after {self.timeout}s")
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        kwargs = {"dest": target_language}
+        if source_language:
+            kwargs["src"] = source_language
+        result = self.translator.translate(text, **kwargs)
+        # googletrans 4.x is async; 3.x returns the result directly
+        if asyncio.iscoroutine(result):
+            result = self._run(result)
+        return result.text
+
+
+class VulaVulaProvider(TranslationProvider):
+    name = "vulavula"
+
+    def __init__(self, api_key: str, codes: Dict[str, str], base_url: str = VULAVULA_BASE_URL,
+                 timeout: float = DEFAULT_TIMEOUT):
+        """Lelapa VulaVula translation API; codes maps short codes like "zu" to "zul_Latn" """
+        super().__init__(timeout)
+        self.api_key = api_key
+        self.codes = codes
+        self.base_url = base_url.rstrip("/")
+
+    def supports(self, target_language: str, source_language: Optional[str]) -> bool:
+        # A missing source language is detected locally before the call
+        return target_language.split("-")[0] in self.codes \
+            and (not source_language or source_language.split("-")[0] in self.codes)
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> str:
+        if not source_language:
+            # VulaVula needs an explicit source language
+            from utils.language_id import get_identifier
+            source_language, _ = get_identifier().detect(text)
+            if source_language not in self.codes:
+                raise ProviderError(f"Detected source language {source_language} is not supported")
+        body = json.dumps({
+            "input_text": text,
+            "source_lang": self.codes[source_language.split("-")[0]],
+            "target_lang": self.codes[target_language.split("-")[0]]
+        }).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/translate/process",
+            data=body,
+            headers={"Content-Type": "application/json", "X-CLIENT-TOKEN": self.api_key},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+
+        translations = payload.get("translation")
+        if isinstance(translations, list) and translations:
+            return translations[0]["translated_text"]
+        if "translated_text" in payload:
+            return payload["translated_text"]
+        raise ProviderError(f"Unexpected VulaVula response: {str(payload)[:200]}")
+
+
+class ProviderPool:
+    def __init__(self, providers: List[TranslationProvider], hedge_after: float = DEFAULT_HEDGE_AFTER,
+                 max_workers: int = 8):
+        """Providers in order of preference"""
+        self.providers = providers
+        self.hedge_after = hedge_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._lock = Lock()
+
+    def _acquire(self, provider: TranslationProvider) -> bool:
+        with self._lock:
+            if provider.in_flight >= MAX_IN_FLIGHT:
+                return False
+            if not provider.breaker.allow():
+                return False
+            provider.in_flight += 1
+            return True
+
+    def _finish(self, provider: TranslationProvider, attempt: Dict[str, Any], outcome: str,
+                latency: float = None, error: str = None):
+        # Each attempt is recorded once: by the worker, or by the caller if it gave up first
+        with self._lock:
+            if attempt["recorded"]:
+                return
+            attempt["recorded"] = True
+        provider.health.record(outcome, latency=latency, error=error)
+        if outcome == "success":
+            provider.breaker.record_success()
+        else:
+            provider.breaker.record_failure()
+
+    def _call(self, provider: TranslationProvider, attempt: Dict[str, Any], text: str, target_language: str,
+              source_language: Optional[str]) -> str:
+        started = time.monotonic()
+        try:
+            result = provider.translate(text, target_language, source_language)
+        except Exception as e:
+            outcome = "timeout" if time.monotonic() - started >= provider.timeout or "timed out" in str(e) else "failure"
+            self._finish(provider, attempt, outcome, error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            with self._lock:
+                provider.in_flight -= 1
+        elapsed = time.monotonic() - started
+        if elapsed >= provider.timeout:
+            # A late answer (e.g. from an abandoned hedge) still counts as a timeout
+            self._finish(provider, attempt, "timeout", error=f"answered after {elapsed:.1f}s")
+        else:
+            self._finish(provider, attempt, "success", latency=elapsed)
+        return result
+
+    def translate(self, text: str, target_language: str, source_language: Optional[str] = None) -> Dict[str, Any]:
+        """Translate with the first provider to answer, hedging to the next one when the first is slow.
+
+        Returns {"text", "provider"}. Raises CircuitOpenError at once when no
+        provider is accepting requests, and ProviderError when all attempts fail.
+        """
+        candidates = [p for p in self.providers if p.supports(target_language, source_language)]
+        pending = {}
+        errors = []
+
+        def start_next() -> bool:
+            while candidates:
+                provider = candidates.pop(0)
+                if self._acquire(provider):
+                    attempt = {"recorded": False}
+                    future = self._executor.submit(self._call, provider, attempt, text, target_language, source_language)
+                    pending[future] = (provider, attempt, time.monotonic() + provider.timeout)
+                    return True
+                provider.health.record("rejected")
+            return False
+
+        if not start_next():
+            raise CircuitOpenError("No translation provider is available")
+
+        hedge_at = time.monotonic() + self.hedge_after
+        while pending:
+            now = time.monotonic()
+            deadline = min(deadline for _, _, deadline in pending.values())
+            wake_at = min(deadline, hedge_at) if candidates else deadline
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider, _, _ = pending.pop(future)
+                try:
+                    return {"text": future.result(), "provider": provider.name}
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+
+            now = time.monotonic()
+            # Give up on calls past their timeout; they finish in the background
+            for future, (provider, attempt, deadline) in list(pending.items()):
+                if now >= deadline:
+                    pending.pop(future)
+                    self._finish(provider, attempt, "timeout", error=f"no answer within {provider.timeout}s")
+                    errors.append(f"{provider.name}: timed out after {provider.timeout}s")
+
+            # Hedge when the current attempt is slow, and fail over when it has failed
+            if candidates and (not pending or now >= hedge_at):
+                if start_next():
+                    hedge_at = now + self.hedge_after
+
+        raise ProviderError("; ".join(errors) or "No translation provider answered")
+
+    def health(self) -> List[Dict[str, Any]]:
+        """Per-provider circuit state and metrics"""
+        return [
+            {"provider": p.name, "state": p.breaker.state, "in_flight": p.in_flight, **p.health.snapshot()}
+            for p in self.providers
+        ]